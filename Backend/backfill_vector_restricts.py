@@ -0,0 +1,181 @@
+"""One-off script to tag existing Vector Search datapoints with tenant restricts.
+
+Datapoints written before the ingestion function started attaching restricts
+carry no ``user_id``/``document_id`` tokens, so they are invisible to queries
+that use a tenant filter. This script walks the ``chunks`` collection, reads
+each chunk's stored vector back from the deployed index and re-upserts it with
+the same restricts that ``VectorIndexUploader.upsert_documents`` now writes.
+
+Run it once before setting ``VECTOR_TENANT_FILTER=true`` on the query API.
+
+Usage:
+    python backfill_vector_restricts.py \
+        --project-id YOUR_PROJECT \
+        --region us-central1 \
+        --index-id 1234567890 \
+        --index-endpoint projects/.../locations/us-central1/indexEndpoints/456 \
+        --deployed-index-id medical_rag_index_deployment_abc123 \
+        [--batch-size 100] [--dry-run]
+
+Prerequisites:
+    * You must be authenticated with gcloud ("gcloud auth application-default login").
+    * The index must have STREAM_UPDATE enabled (same as the ingestion function).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Dict, List
+
+from google.cloud import firestore
+from google.cloud.aiplatform import MatchingEngineIndexEndpoint, initializer
+from google.cloud.aiplatform_v1.services.index_service import IndexServiceClient
+from google.cloud.aiplatform_v1.types import IndexDatapoint, UpsertDatapointsRequest
+
+# Must match ingestion_function/modules/vector_index.py and
+# query_api/app/repositories/vector_repo.py
+USER_ID_NAMESPACE = "user_id"
+DOCUMENT_ID_NAMESPACE = "document_id"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-tag existing vector datapoints with user_id/document_id restricts."
+    )
+    parser.add_argument("--project-id", required=True, help="GCP project ID")
+    parser.add_argument("--region", required=True, help="Vertex AI region (e.g. us-central1)")
+    parser.add_argument("--index-id", required=True, help="Vector Search index ID")
+    parser.add_argument(
+        "--index-endpoint",
+        required=True,
+        help="Full resource name of the index endpoint",
+    )
+    parser.add_argument(
+        "--deployed-index-id",
+        required=True,
+        help="Deployed index ID on the endpoint",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Number of datapoints read and upserted per request",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be re-tagged without upserting anything",
+    )
+    return parser.parse_args()
+
+
+def read_vectors(
+    endpoint: MatchingEngineIndexEndpoint, deployed_index_id: str, chunk_ids: List[str]
+) -> Dict[str, List[float]]:
+    """Read stored feature vectors for chunk IDs from the deployed index."""
+    datapoints = endpoint.read_index_datapoints(
+        deployed_index_id=deployed_index_id, ids=chunk_ids
+    )
+    return {dp.datapoint_id: list(dp.feature_vector) for dp in datapoints}
+
+
+def retag_batch(
+    client: IndexServiceClient,
+    index_name: str,
+    endpoint: MatchingEngineIndexEndpoint,
+    deployed_index_id: str,
+    chunks: List[Dict[str, str]],
+    dry_run: bool,
+) -> tuple[int, int]:
+    """Re-upsert one batch of chunks with restricts. Returns (tagged, missing)."""
+    vectors = read_vectors(endpoint, deployed_index_id, [c["chunk_id"] for c in chunks])
+
+    datapoints = []
+    for chunk in chunks:
+        vector = vectors.get(chunk["chunk_id"])
+        if not vector:
+            continue
+        datapoints.append(
+            IndexDatapoint(
+                datapoint_id=chunk["chunk_id"],
+                feature_vector=vector,
+                restricts=[
+                    IndexDatapoint.Restriction(
+                        namespace=USER_ID_NAMESPACE, allow_list=[chunk["user_id"]]
+                    ),
+                    IndexDatapoint.Restriction(
+                        namespace=DOCUMENT_ID_NAMESPACE, allow_list=[chunk["document_id"]]
+                    ),
+                ],
+            )
+        )
+
+    if datapoints and not dry_run:
+        client.upsert_datapoints(
+            request=UpsertDatapointsRequest(index=index_name, datapoints=datapoints)
+        )
+
+    return len(datapoints), len(chunks) - len(datapoints)
+
+
+def main() -> None:
+    args = parse_args()
+
+    initializer.global_config.init(project=args.project_id, location=args.region)
+
+    db = firestore.Client(project=args.project_id)
+    endpoint = MatchingEngineIndexEndpoint(index_endpoint_name=args.index_endpoint)
+    client = IndexServiceClient(
+        client_options={"api_endpoint": f"{args.region}-aiplatform.googleapis.com"}
+    )
+    index_name = f"projects/{args.project_id}/locations/{args.region}/indexes/{args.index_id}"
+
+    tagged = 0
+    missing = 0
+    skipped = 0
+    batch: List[Dict[str, str]] = []
+
+    def flush() -> None:
+        nonlocal tagged, missing
+        done, absent = retag_batch(
+            client, index_name, endpoint, args.deployed_index_id, batch, args.dry_run
+        )
+        tagged += done
+        missing += absent
+        batch.clear()
+        print(f"  re-tagged {tagged} datapoints so far ({missing} not in index)")
+
+    print("Scanning chunks collection...")
+    for chunk_doc in db.collection("chunks").select(["user_id", "document_id"]).stream():
+        data = chunk_doc.to_dict()
+        if not data.get("user_id") or not data.get("document_id"):
+            skipped += 1
+            continue
+
+        batch.append(
+            {
+                "chunk_id": chunk_doc.id,
+                "user_id": data["user_id"],
+                "document_id": data["document_id"],
+            }
+        )
+        if len(batch) >= args.batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    action = "Would re-tag" if args.dry_run else "Re-tagged"
+    print(
+        f"{action} {tagged} datapoints "
+        f"({missing} chunks had no vector in the index, "
+        f"{skipped} chunks lacked user_id/document_id)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"ERROR: {exc}")
+        sys.exit(1)
@@ -0,0 +1,105 @@
+"""
+Chunk persistence benchmark: sequential WriteBatch commits vs. BulkWriter.
+
+Writes N synthetic chunks shaped like the ingestion function's (text plus a
+768-d packed float32 embedding) to a scratch collection, once with the old
+sequential 500-write batches and once with modules.firestore_bulk.bulk_write,
+and reports wall time and writes/second for each. The scratch documents are
+deleted afterwards (with bulk_write, not timed).
+
+Usage (from Backend/ingestion_function; honours FIRESTORE_EMULATOR_HOST):
+    python benchmarks/chunk_write_benchmark.py --project-id my-project [--chunks 5000]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from array import array
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore  # noqa: E402
+
+from modules.firestore_bulk import bulk_write  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare chunk write strategies.")
+    parser.add_argument("--project-id", default=os.getenv("PROJECT_ID"), help="GCP project ID")
+    parser.add_argument("--chunks", type=int, default=5000, help="Chunks per run")
+    parser.add_argument(
+        "--collection", default="benchmark_chunks", help="Scratch collection (emptied afterwards)"
+    )
+    return parser.parse_args()
+
+
+def synthetic_chunk(index: int) -> Dict:
+    """A chunk document of realistic size (~1.5 KB text, 3 KB embedding)."""
+    return {
+        "chunk_id": str(uuid.uuid4()),
+        "user_id": "benchmark",
+        "document_id": "benchmark",
+        "text": f"Chunk {index}: " + "Hemoglobin A1c 6.1% (reference 4.0-5.6). " * 35,
+        "embedding_f32": array("f", [index / 1000.0] * 768).tobytes(),
+        "metadata": {"chunk_type": "paragraph", "chunk_index": index},
+        "created_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def write_sequential_batches(db: firestore.Client, collection: str, chunks: List[Dict]) -> None:
+    """The previous implementation: commit 500-write batches one after another."""
+    batch = db.batch()
+    for i, chunk in enumerate(chunks):
+        batch.set(db.collection(collection).document(chunk["chunk_id"]), chunk)
+        if (i + 1) % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+
+
+def write_bulk(db: firestore.Client, collection: str, chunks: List[Dict]) -> None:
+    result = bulk_write(
+        db,
+        (("set", db.collection(collection).document(chunk["chunk_id"]), chunk) for chunk in chunks),
+    )
+    if result.failed:
+        print(f"Warning: {len(result.failed)} writes failed")
+
+
+def run(
+    name: str,
+    writer: Callable[[firestore.Client, str, List[Dict]], None],
+    db: firestore.Client,
+    collection: str,
+    count: int,
+) -> None:
+    chunks = [synthetic_chunk(i) for i in range(count)]
+    start = time.perf_counter()
+    writer(db, collection, chunks)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<20} {elapsed:>8.2f}s {count / elapsed:>10.0f} writes/s")
+
+
+def cleanup(db: firestore.Client, collection: str) -> None:
+    refs = [doc.reference for doc in db.collection(collection).select([]).stream()]
+    bulk_write(db, (("delete", ref, None) for ref in refs))
+    print(f"Deleted {len(refs)} scratch documents")
+
+
+def main() -> None:
+    args = parse_args()
+    db = firestore.Client(project=args.project_id)
+
+    print(f"Writing {args.chunks} chunks per strategy to '{args.collection}'")
+    print(f"{'strategy':<20} {'time':>9} {'throughput':>17}")
+    try:
+        run("sequential batches", write_sequential_batches, db, args.collection, args.chunks)
+        run("bulk writer", write_bulk, db, args.collection, args.chunks)
+    finally:
+        cleanup(db, args.collection)
+
+
+if __name__ == "__main__":
+    main()
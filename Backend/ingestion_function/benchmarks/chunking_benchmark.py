@@ -0,0 +1,123 @@
+"""
+Chunking benchmark: per-sentence tokenization vs. the single-pass chunker.
+
+Chunks the same text with DocumentChunker.iter_chunk_text_per_sentence (one
+tokenizer call per sentence) and DocumentChunker.iter_chunk_text (one call
+for the whole text, chunks cut by token offsets), reports the median wall
+time of each next to the sentence-splitting time both share, and checks
+that the outputs are identical.
+
+Input is a plain-text file (e.g. extracted layout text) or synthetic
+clinical-note text of N characters.
+
+Usage (from Backend/ingestion_function):
+    python benchmarks/chunking_benchmark.py --text layout.txt [--repeat 5]
+    python benchmarks/chunking_benchmark.py --synthetic-chars 2000000 [--overlap 64]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chunking import DocumentChunker  # noqa: E402
+
+SYNTHETIC_SENTENCES = [
+    "Patient presents with shortness of breath and intermittent chest pain.",
+    "Hemoglobin A1c 6.1% (reference 4.0-5.6).",
+    "Blood pressure 142/91 mmHg, heart rate 88 bpm, SpO2 96% on room air.",
+    "Continue metformin 500 mg twice daily and lisinopril 10 mg once daily.",
+    "No known drug allergies.",
+    "Chest X-ray shows no acute cardiopulmonary process.",
+    "Follow up in 3 months with repeat lipid panel and basic metabolic panel.",
+    "LDL cholesterol 162 mg/dL (desirable < 100).",
+    "Assessment: type 2 diabetes mellitus without complications; essential hypertension.",
+    "Patient counseled on diet, exercise and medication adherence.",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare chunking implementations.")
+    parser.add_argument("--text", help="Plain-text file to chunk")
+    parser.add_argument("--synthetic-chars", type=int, help="Generate synthetic text")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per implementation")
+    parser.add_argument(
+        "--overlap", type=int, default=0, help="Also time the single-pass chunker with overlap"
+    )
+    args = parser.parse_args()
+    if not args.text and not args.synthetic_chars:
+        parser.error("one of --text or --synthetic-chars is required")
+    return args
+
+
+def synthetic_text(num_chars: int) -> str:
+    """Clinical-note-like text: sentences in paragraphs and newline-separated lines."""
+    rng = random.Random(0)
+    parts: List[str] = []
+    size = 0
+    while size < num_chars:
+        sentence = rng.choice(SYNTHETIC_SENTENCES)
+        separator = rng.choice([" ", " ", " ", "\n", "\n\n"])
+        parts.append(sentence + separator)
+        size += len(sentence) + len(separator)
+    return "".join(parts)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> tuple:
+    """Run func repeat times; return its last result and the median milliseconds."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.text:
+        with open(args.text, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(args.synthetic_chars)
+
+    chunker = DocumentChunker()
+    sentences, split_ms = measure(lambda: chunker.split_into_sentences(text), args.repeat)
+    print(f"Text: {len(text):,} chars, {len(sentences):,} sentences")
+
+    reference, reference_ms = measure(
+        lambda: list(chunker.iter_chunk_text_per_sentence(text)), args.repeat
+    )
+    single_pass, single_pass_ms = measure(
+        lambda: list(chunker.iter_chunk_text(text, overlap_tokens=0)), args.repeat
+    )
+
+    print(f"{'implementation':<22} {'median ms':>10} {'excl. split':>12} {'chunks':>8}")
+    print(f"{'sentence split only':<22} {split_ms:>10.1f} {'':>12} {'':>8}")
+    for name, ms, chunks in (
+        ("per-sentence", reference_ms, reference),
+        ("single-pass", single_pass_ms, single_pass),
+    ):
+        print(f"{name:<22} {ms:>10.1f} {ms - split_ms:>12.1f} {len(chunks):>8}")
+
+    if args.overlap:
+        overlapped, overlap_ms = measure(
+            lambda: list(chunker.iter_chunk_text(text, overlap_tokens=args.overlap)), args.repeat
+        )
+        name = f"single-pass ({args.overlap} ovl)"
+        print(f"{name:<22} {overlap_ms:>10.1f} {overlap_ms - split_ms:>12.1f} {len(overlapped):>8}")
+
+    if reference == single_pass:
+        print(f"✓ Outputs match ({len(reference)} chunks)")
+    else:
+        print("ERROR: Per-sentence and single-pass chunker outputs differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold-start benchmark: import and first-call latency of the modules package.
+
+Starts N fresh interpreters (python -X importtime), each of which imports
+the modules package, chunks a short text once (which loads the tokenizer
+resources) and once more warm. Reports the median of each phase, whether the
+resources were loaded from the vendored copies, and the slowest imports
+(top-level and one level down) of the last run.
+
+Usage (from Backend/ingestion_function):
+    python benchmarks/cold_start_benchmark.py [--runs 5] [--top 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+FUNCTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_TEXT = (
+    "Patient presents with shortness of breath and intermittent chest pain. "
+    "Hemoglobin A1c 6.1% (reference 4.0-5.6). "
+    "Continue metformin 500 mg twice daily and lisinopril 10 mg once daily."
+)
+
+# Runs in the child interpreter; prints one JSON line of timings
+CHILD_SCRIPT = f"""
+import json, os, time
+start = time.perf_counter()
+import modules
+imported = time.perf_counter()
+from modules import chunking
+chunker = modules.DocumentChunker()
+chunker.chunk_text({SAMPLE_TEXT!r})
+first_call = time.perf_counter()
+chunker.chunk_text({SAMPLE_TEXT!r})
+warm_call = time.perf_counter()
+import nltk
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_call_ms": (first_call - imported) * 1000,
+    "warm_call_ms": (warm_call - first_call) * 1000,
+    "vendored_tiktoken": os.environ.get("TIKTOKEN_CACHE_DIR") == chunking.TIKTOKEN_CACHE_DIR,
+    "vendored_nltk": chunking.NLTK_DATA_DIR in nltk.data.path,
+}}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure ingestion cold-start latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    return parser.parse_args()
+
+
+def run_once() -> Tuple[Dict, float, str]:
+    """Start one interpreter; return its timings, process wall ms and importtime log."""
+    env = dict(os.environ)
+    env.pop("TIKTOKEN_CACHE_DIR", None)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+        cwd=FUNCTION_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        print(completed.stderr[-2000:])
+        raise RuntimeError(f"Cold-start run failed with exit code {completed.returncode}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, wall_ms, completed.stderr
+
+
+def slowest_imports(importtime_log: str, max_depth: int = 1) -> List[Tuple[str, float]]:
+    """Cumulative milliseconds of imports nested at most max_depth deep in a -X importtime log."""
+    imports = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # -X importtime indents each nesting level by two spaces
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= max_depth:
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)
+
+
+def main() -> None:
+    args = parse_args()
+    results = []
+    wall_times = []
+    importtime_log = ""
+    for _ in range(args.runs):
+        timings, wall_ms, importtime_log = run_once()
+        results.append(timings)
+        wall_times.append(wall_ms)
+
+    print(f"Median of {args.runs} fresh interpreters:")
+    print(f"{'phase':<28} {'ms':>10}")
+    for key, name in (
+        ("import_ms", "import modules"),
+        ("first_call_ms", "first chunk_text call"),
+        ("warm_call_ms", "warm chunk_text call"),
+    ):
+        print(f"{name:<28} {statistics.median(r[key] for r in results):>10.1f}")
+    print(f"{'process wall time':<28} {statistics.median(wall_times):>10.1f}")
+
+    for key, name in (("vendored_tiktoken", "tiktoken"), ("vendored_nltk", "NLTK punkt")):
+        if all(r[key] for r in results):
+            print(f"✓ {name} loaded from vendor/")
+        else:
+            print(f"Warning: {name} not vendored (run scripts/vendor_tokenizer_resources.py)")
+
+    print("\nSlowest imports, up to one level deep (last run, cumulative ms):")
+    for name, ms in slowest_imports(importtime_log)[: args.top]:
+        print(f"  {name:<40} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Extraction benchmark: MessageToDict + dict walk vs. walking the Document proto.
+
+Runs extract_layout_text, extract_form_kv_pairs and SemanticChunker on the
+same Document both ways and reports wall time and peak Python allocation
+(tracemalloc) per pass. The outputs are compared so a regression in either
+path shows up as a mismatch.
+
+Input is a recorded Document AI response (JSON as written by the API or a
+binary Document .pb), or a synthetic document of N pages.
+
+Usage (from Backend/ingestion_function):
+    python benchmarks/extraction_benchmark.py --document layout.json [--form form.json]
+    python benchmarks/extraction_benchmark.py --synthetic-pages 200 [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import documentai  # noqa: E402
+from google.protobuf.json_format import MessageToDict  # noqa: E402
+
+from modules.docai import DocumentAIProcessor  # noqa: E402
+from modules.semantic_chunking import SemanticChunker  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare dict and proto extraction paths.")
+    parser.add_argument("--document", help="Layout parser output (.json or .pb)")
+    parser.add_argument("--form", help="Form parser output (.json or .pb); defaults to --document")
+    parser.add_argument("--synthetic-pages", type=int, help="Generate a synthetic document")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per path")
+    args = parser.parse_args()
+    if not args.document and not args.synthetic_pages:
+        parser.error("one of --document or --synthetic-pages is required")
+    return args
+
+
+def load_document(path: str) -> documentai.Document:
+    """Load a Document from JSON or binary protobuf."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".json"):
+        return documentai.Document.from_json(data, ignore_unknown_fields=True)
+    return documentai.Document.deserialize(data)
+
+
+def synthetic_document(num_pages: int) -> documentai.Document:
+    """Build a Document with paragraphs, a table and form fields on every page."""
+    text_parts = []
+    offset = 0
+
+    def span(text: str) -> documentai.Document.TextAnchor:
+        nonlocal offset
+        text_parts.append(text)
+        start, offset = offset, offset + len(text)
+        return documentai.Document.TextAnchor(
+            text_segments=[{"start_index": start, "end_index": offset}]
+        )
+
+    pages = []
+    blocks = []
+    for number in range(1, num_pages + 1):
+        paragraphs = [
+            {"layout": {"text_anchor": span(f"Page {number} paragraph {i}: HbA1c 6.{i}% "
+                                            "measured after fasting, metformin 500 mg.\n"),
+                        "confidence": 0.98}}
+            for i in range(8)
+        ]
+        header = [{"cells": [{"layout": {"text_anchor": span(f"{name}\n")}}
+                             for name in ("Test", "Result", "Range")]}]
+        body = [{"cells": [{"layout": {"text_anchor": span(f"{value}\n")}}
+                           for value in (f"Lab {r}", f"{r}.{number}", "0-10")]}
+                for r in range(5)]
+        form_fields = [
+            {"field_name": {"text_anchor": span(f"Field {i}:"), "confidence": 0.9},
+             "field_value": {"text_anchor": span(f" value {i}\n"), "confidence": 0.9}}
+            for i in range(4)
+        ]
+        pages.append({
+            "page_number": number,
+            "paragraphs": paragraphs,
+            "tables": [{"header_rows": header, "body_rows": body}],
+            "form_fields": form_fields,
+        })
+        blocks.append({
+            "block_id": str(number),
+            "text_block": {
+                "text": f"Section {number}",
+                "type_": "heading-1",
+                "blocks": [{"text_block": {"text": f"Summary of page {number}.",
+                                           "type_": "paragraph"}}],
+            },
+        })
+
+    return documentai.Document(
+        text="".join(text_parts),
+        pages=pages,
+        document_layout={"blocks": blocks},
+    )
+
+
+def extract_all(layout: Any, form: Any) -> Tuple[str, list, list]:
+    return (
+        DocumentAIProcessor.extract_layout_text(layout),
+        DocumentAIProcessor.extract_form_kv_pairs(form),
+        SemanticChunker.extract_semantic_chunks(layout, form),
+    )
+
+
+def via_dict(layout: documentai.Document, form: documentai.Document) -> Tuple[str, list, list]:
+    layout_json = MessageToDict(layout._pb)
+    form_json = layout_json if form is layout else MessageToDict(form._pb)
+    return extract_all(layout_json, form_json)
+
+
+def via_proto(layout: documentai.Document, form: documentai.Document) -> Tuple[str, list, list]:
+    return extract_all(layout, form)
+
+
+def measure(fn: Callable, repeat: int, *args: Any) -> Tuple[Any, float, float]:
+    """Return (result, median ms, peak MiB) over `repeat` passes."""
+    times = []
+    peaks = []
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+        tracemalloc.stop()
+    return result, statistics.median(times), max(peaks)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.synthetic_pages:
+        layout = form = synthetic_document(args.synthetic_pages)
+    else:
+        layout = load_document(args.document)
+        form = load_document(args.form) if args.form else layout
+
+    print(f"Document: {len(layout.pages)} pages, {len(layout.text):,} chars, "
+          f"{documentai.Document.pb(layout).ByteSize() / 1024:.0f} KiB serialized")
+
+    dict_result, dict_ms, dict_mib = measure(via_dict, args.repeat, layout, form)
+    proto_result, proto_ms, proto_mib = measure(via_proto, args.repeat, layout, form)
+
+    print(f"{'path':<6} {'median ms':>10} {'peak MiB':>10}")
+    print(f"{'dict':<6} {dict_ms:>10.1f} {dict_mib:>10.1f}")
+    print(f"{'proto':<6} {proto_ms:>10.1f} {proto_mib:>10.1f}")
+
+    if dict_result == proto_result:
+        print(f"✓ Outputs match ({len(proto_result[2])} semantic chunks, "
+              f"{len(proto_result[1])} form fields)")
+    else:
+        print("ERROR: Dict and proto extraction outputs differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
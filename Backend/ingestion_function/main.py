@@ -3,11 +3,22 @@ Cloud Function entry point for processing uploaded medical PDFs.
 
 Triggered by: Google Cloud Storage (finalize event) on the uploads bucket.
 Workflow:
-    1. Download the uploaded PDF from GCS.
+    1. Download the uploaded PDF from GCS. If the user already has a completed
+       document with the same content (SHA-256), alias it and stop.
     2. Submit the document to Document AI (layout + form processors).
     3. Perform semantic chunking of the extracted text and key-value pairs.
     4. Filter out short chunks (< 50 chars) for better quality.
-    5. Add resulting documents to the Vertex AI Vector Search index in batches.
+    5. Stream resulting documents through embedding, Firestore writes and the
+       Vertex AI Vector Search index as overlapping, bounded batches.
+    6. Mark the document completed (queryable) with summary_status "pending".
+
+While it runs, processing_status is "processing" ("failed" if it raised) and
+the document's progress map records the stage, ocr_done, chunks_persisted,
+vectors_upserted and vectors_total (see modules/progress.py).
+
+The summary is generated off the critical path by summarize_document,
+triggered by a Pub/Sub message on SUMMARY_TOPIC that process_document
+publishes once the document is completed.
 
 Environment variables expected:
     PROJECT_ID               -> GCP Project ID
@@ -18,17 +29,40 @@ Environment variables expected:
     VERTEX_INDEX_ENDPOINT    -> Full resource name of the index endpoint
     DEPLOYED_INDEX_ID        -> Deployed index ID on the endpoint
     VERTEX_INDEX_ID          -> Vector index ID
-    ARTIFACT_BUCKET          -> GCS bucket for artifacts
+    ARTIFACT_BUCKET          -> GCS bucket for artifacts (Document AI checkpoints, batch I/O)
+    SUMMARY_TOPIC            -> Pub/Sub topic of the summary stage (default document-summary)
 """
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import base64
+import json
 import tempfile
 import uuid
 
-from google.cloud import storage, firestore
-
-from modules import Config, DocumentAIProcessor, DocumentChunker, VectorIndexUploader
+from google.cloud import aiplatform, storage, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from modules import (
+    Config,
+    DocumentAIProcessor,
+    DocumentChunker,
+    DocumentDeduplicator,
+    DocumentSummarizer,
+    IngestionProgress,
+    LexicalIndexWriter,
+    VectorIndexUploader,
+)
+from modules.progress import STAGE_COMPLETED, STAGE_INDEXING
 from modules.vector_index import Document
 
+# summary_status values: pending -> running -> completed | failed. A
+# summarize_document message claims a pending summary (or a running one whose
+# claim is older than the timeout: that run died).
+SUMMARY_PENDING = "pending"
+SUMMARY_RUNNING = "running"
+SUMMARY_CLAIM_TIMEOUT_SECONDS = 900  # longer than the function timeout (540 s)
+SUMMARY_PUBLISH_TIMEOUT_SECONDS = 30
+
 
 def process_document(event: Dict[str, Any], context: Any) -> None:
     """
@@ -61,71 +95,274 @@ def process_document(event: Dict[str, Any], context: Any) -> None:
     # 1. Download PDF
     pdf_bytes = _download_blob(bucket_name, object_name)
 
+    # 1b. Re-upload of a document the user already has: reuse its chunks,
+    # embeddings and summary instead of processing it again
+    deduplicator = DocumentDeduplicator(project_id=config.project_id)
+    content_sha256 = deduplicator.fingerprint(pdf_bytes)
+    try:
+        canonical = deduplicator.find_canonical(user_id, content_sha256, document_id)
+        if canonical:
+            deduplicator.alias_document(document_id, canonical, content_sha256)
+            print(
+                f"✓ Document {document_id} is a duplicate of "
+                f"{canonical['document_id']}, aliased without reprocessing"
+            )
+            return
+    except Exception as e:
+        # Deduplication is an optimisation: fall back to full processing
+        print(f"Warning: Duplicate check failed, processing normally: {e}")
+
+    # 2-5. OCR, chunk and index, with per-stage progress on the document.
+    # Other documents stay queryable meanwhile; retrieval excludes this one
+    # until it is completed.
+    db = firestore.Client(project=config.project_id)
+    doc_ref = db.collection("documents").document(document_id)
+    progress = IngestionProgress(doc_ref)
+    progress.start()
+    try:
+        docs = _index_document(
+            config,
+            pdf_bytes,
+            user_id=user_id,
+            document_id=document_id,
+            gcs_path=f"gs://{bucket_name}/{object_name}",
+            progress=progress,
+        )
+    except Exception as e:
+        print(f"ERROR: Ingestion of document {document_id} failed: {e}")
+        progress.fail(e)
+        raise
+    progress.flush()
+
+    # 5b. Write keyword postings for hybrid (BM25 + vector) retrieval
+    try:
+        LexicalIndexWriter(project_id=config.project_id).write_document(
+            user_id=user_id,
+            document_id=document_id,
+            chunk_ids=[doc.metadata["chunk_id"] for doc in docs],
+            texts=[doc.page_content for doc in docs],
+        )
+    except Exception as e:
+        # Dense retrieval still works without postings
+        print(f"Warning: Could not write keyword postings: {e}")
+
+    # 6. Mark the document completed: it is queryable from here on. The
+    # summary is generated by the summarize_document stage, queued below.
+    try:
+        doc_ref.update(
+            {
+                "processing_status": "completed",
+                "progress.stage": STAGE_COMPLETED,
+                "summary_status": SUMMARY_PENDING,
+                "page_count": len(docs),
+                "chunk_count": len(docs),
+                "content_sha256": content_sha256,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }
+        )
+        print(f"✓ Updated document {document_id} status to 'completed' (summary pending)")
+        _enqueue_summary(config, document_id)
+
+        # Document set changed: invalidate the user's cached answers
+        db.collection("users").document(user_id).set(
+            {"document_set_version": firestore.Increment(1)}, merge=True
+        )
+    except Exception as e:
+        print(f"Warning: Could not update document status: {e}")
+
+    print("Ingestion completed successfully")
+
+
+def summarize_document(event: Dict[str, Any], context: Any) -> None:
+    """
+    Entry point for the summary stage.
+
+    Triggered by: a Pub/Sub message ({"document_id": ...}) on SUMMARY_TOPIC,
+    published by process_document once the document is queryable (publish
+    one by hand, with summary_status set to "pending", to regenerate a
+    summary). Summaries of aliases are copied from their canonical document
+    instead.
+
+    Args:
+        event: Pub/Sub event data (base64-encoded JSON message in "data")
+        context: Cloud Function context
+    """
+    document_id = json.loads(base64.b64decode(event["data"]))["document_id"]
+
+    config = Config.from_env()
+    aiplatform.init(project=config.project_id, location=config.vertex_region)
+    db = firestore.Client(project=config.project_id)
+    doc_ref = db.collection("documents").document(document_id)
+
+    # Duplicate deliveries race here; only one run claims the summary. A claim
+    # older than SUMMARY_CLAIM_TIMEOUT_SECONDS belongs to a run that died
+    # and is taken over.
+    if not _claim_summary(db.transaction(), doc_ref):
+        print(f"Summary for document {document_id} not claimable, skipping")
+        return
+
+    print(f"Generating summary for document {document_id}")
+    try:
+        texts = _load_chunk_texts(db, document_id)
+        summary = _generate_summary(texts, document_id, config, db)
+    except Exception as e:
+        # Release the claim rather than leaving the summary "running"
+        print(f"ERROR: Summary of document {document_id} failed: {e}")
+        doc_ref.update({"summary_status": "failed", "updated_at": firestore.SERVER_TIMESTAMP})
+        raise
+
+    if summary:
+        summary_data = {
+            "summary": summary,
+            "summary_status": "completed",
+            "summary_generated_at": firestore.SERVER_TIMESTAMP,
+        }
+    else:
+        summary_data = {"summary_status": "failed"}
+    doc_ref.update({**summary_data, "updated_at": firestore.SERVER_TIMESTAMP})
+    print(f"✓ Summary status of document {document_id}: {summary_data['summary_status']}")
+
+    # Re-uploads aliased while the summary was pending
+    aliases = (
+        db.collection("documents")
+        .where(filter=FieldFilter("alias_of", "==", document_id))
+        .stream()
+    )
+    for alias in aliases:
+        alias.reference.update(summary_data)
+        print(f"✓ Copied summary to alias document {alias.id}")
+
+
+@firestore.transactional
+def _claim_summary(transaction: firestore.Transaction, doc_ref: firestore.DocumentReference) -> bool:
+    """
+    Move summary_status to running if it is pending or a stale running claim.
+
+    Returns:
+        False if there is nothing to claim (missing, alias, completed, failed
+        or claimed by a live run)
+    """
+    snapshot = doc_ref.get(transaction=transaction)
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    if data.get("alias_of"):
+        return False
+    status = data.get("summary_status")
+    if status == SUMMARY_RUNNING:
+        claimed_at = data.get("summary_claimed_at")
+        stale_before = datetime.now(timezone.utc) - timedelta(
+            seconds=SUMMARY_CLAIM_TIMEOUT_SECONDS
+        )
+        if claimed_at and claimed_at > stale_before:
+            return False
+        print(f"Reclaiming stale summary claim of document {doc_ref.id}")
+    elif status != SUMMARY_PENDING:
+        return False
+    transaction.update(
+        doc_ref,
+        {
+            "summary_status": SUMMARY_RUNNING,
+            "summary_claimed_at": datetime.now(timezone.utc),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        },
+    )
+    return True
+
+
+def _enqueue_summary(config: Config, document_id: str) -> None:
+    """Publish the summary stage's message for a document (failures are logged)."""
+    try:
+        from google.cloud import pubsub_v1
+
+        publisher = pubsub_v1.PublisherClient()
+        topic = publisher.topic_path(config.project_id, config.summary_topic)
+        message = json.dumps({"document_id": document_id}).encode("utf-8")
+        publisher.publish(topic, message).result(timeout=SUMMARY_PUBLISH_TIMEOUT_SECONDS)
+        print(f"✓ Queued summary of document {document_id} on {config.summary_topic}")
+    except Exception as e:
+        # The summary stays pending; publish the message again to generate it
+        print(f"Warning: Could not queue summary of document {document_id}: {e}")
+
+
+def _load_chunk_texts(db: firestore.Client, document_id: str) -> List[str]:
+    """Load a document's chunk texts in document order (layout text, then form fields)."""
+    chunks = (
+        db.collection("chunks")
+        .where(filter=FieldFilter("document_id", "==", document_id))
+        .select(["text", "metadata"])
+        .stream()
+    )
+    ordered = []
+    for chunk in chunks:
+        data = chunk.to_dict() or {}
+        metadata = data.get("metadata", {})
+        ordered.append(
+            (
+                metadata.get("chunk_type") == "kv_pair",
+                metadata.get("chunk_index", 0),
+                data.get("text", ""),
+            )
+        )
+    ordered.sort(key=lambda item: item[:2])
+    return [text for _, _, text in ordered]
+
+
+def _index_document(
+    config: Config,
+    pdf_bytes: bytes,
+    user_id: str,
+    document_id: str,
+    gcs_path: str,
+    progress: IngestionProgress,
+) -> List[Document]:
+    """
+    Run Document AI, chunk the output and upload the chunks.
+
+    Returns:
+        The uploaded chunk documents (with metadata["chunk_id"] set)
+    """
     # 2. Process with Document AI
     docai_processor = DocumentAIProcessor(
-        project_id=config.project_id, location=config.docai_location
+        project_id=config.project_id,
+        location=config.docai_location,
+        artifact_bucket=config.artifact_bucket,
     )
     layout_json, form_json = docai_processor.process_document(
         pdf_bytes=pdf_bytes,
         layout_processor_id=config.layout_processor_id,
         form_processor_id=config.form_processor_id,
     )
+    progress.set_stage(STAGE_INDEXING, ocr_done=True)
 
-    # 3. Build chunks
+    # 3-5. Chunk, filter out short chunks, and upload to the vector index.
+    # Chunks stream straight into the upload pipeline, so embedding and
+    # writing overlap with chunking and with each other.
     chunker = DocumentChunker()
-    chunks = chunker.build_chunks(layout_json, form_json)
-    print(f"Generated {len(chunks)} chunks from DocAI output")
-
-    # 4. Filter out short chunks
-    filtered_chunks = chunker.filter_substantive_chunks(chunks)
-    print(
-        f"Prepared {len(filtered_chunks)} documents for vector store "
-        f"(filtered from {len(chunks)} total chunks, "
-        f"min length: {chunker.MIN_CHUNK_LENGTH} chars)"
-    )
+    chunk_counts = {"total": 0}
 
-    # Convert to Document objects
-    docs = [
-        Document(page_content=chunk["text"], metadata=chunk["metadata"])
-        for chunk in filtered_chunks
-    ]
+    def substantive_documents():
+        for chunk in chunker.iter_chunks(layout_json, form_json):
+            chunk_counts["total"] += 1
+            if chunker.is_substantive(chunk):
+                yield Document(page_content=chunk["text"], metadata=chunk["metadata"])
 
-    # 5. Upload to vector index
     uploader = VectorIndexUploader(
         project_id=config.project_id,
         region=config.vertex_region,
         index_id=config.index_id,
     )
-    uploader.upsert_documents(
-        documents=docs,
+    docs = uploader.upsert_stream(
+        substantive_documents(),
         user_id=user_id,
         document_id=document_id,
-        gcs_path=f"gs://{bucket_name}/{object_name}",
+        gcs_path=gcs_path,
+        progress=progress,
     )
-
-    print("Ingestion completed successfully")
-
-    # 6. Generate document summary using Gemini
-    summary = _generate_summary(docs, config)
-
-    # 7. Update document status in Firestore with summary
-    try:
-        db = firestore.Client(project=config.project_id)
-        doc_ref = db.collection("documents").document(document_id)
-        update_data = {
-            "processing_status": "completed",
-            "page_count": len(docs),
-            "chunk_count": len(docs),
-            "updated_at": firestore.SERVER_TIMESTAMP,
-        }
-        if summary:
-            update_data["summary"] = summary
-            update_data["summary_generated_at"] = firestore.SERVER_TIMESTAMP
-
-        doc_ref.update(update_data)
-        print(f"✓ Updated document {document_id} status to 'completed' with summary")
-    except Exception as e:
-        print(f"Warning: Could not update document status: {e}")
+    print(
+        f"Uploaded {len(docs)} documents to vector store "
+        f"(filtered from {chunk_counts['total']} total chunks, "
+        f"min length: {chunker.MIN_CHUNK_LENGTH} chars)"
+    )
+    return docs
 
 
 def _download_blob(bucket_name: str, object_name: str) -> bytes:
@@ -140,93 +377,16 @@ def _download_blob(bucket_name: str, object_name: str) -> bytes:
         return temp_file.read()
 
 
-def _generate_summary(docs: list, config: Config) -> str:
+def _generate_summary(
+    texts: List[str], document_id: str, config: Config, db: firestore.Client
+) -> Optional[str]:
     """Generate a comprehensive, detailed summary of the document using Gemini."""
+    if not texts:
+        print("Warning: Document has no chunks to summarize")
+        return None
     try:
-        from vertexai.generative_models import GenerativeModel, GenerationConfig
-
-        # Combine ALL chunks for comprehensive summary (use more content)
-        combined_text = "\n\n".join([doc.page_content for doc in docs])
-        # Limit to ~15000 chars to fit in context (allows for much more detail)
-        if len(combined_text) > 15000:
-            combined_text = combined_text[:15000]
-
-        prompt = f"""You are a medical document summarizer. Create a comprehensive summary that explains medical information in VERY SIMPLE, CLEAR language that anyone can understand - as if explaining to someone with no medical knowledge.
-
-**CRITICAL REQUIREMENTS:**
-1. **Explain ALL medical jargon** - Never use medical terms without immediately explaining them in plain English
-2. Use VERY SIMPLE language - write as if talking to a friend
-3. Keep the summary up to 2000 tokens (approximately 1500 words)
-4. Use markdown formatting with headers, bullet points, and bold for highlights
-5. Include ALL important information from the document
-6. Be STRAIGHT TO THE POINT - no complex sentences
-
-**STRUCTURE YOUR SUMMARY:**
-
-# Brief Summary
-[In 2-3 SIMPLE sentences, explain what this medical document is about and the main points. Use everyday language.]
-
-# Patient Information
-- **Name:** [if available]
-- **Age/DOB:** [if available]
-- **Gender:** [if available]
-- **ID Number:** [if available]
-
-# Why They Went to the Doctor
-[Explain in simple words what problem or symptoms brought them to the hospital/clinic]
-
-# Medical Background
-## Previous Health Problems
-- [List conditions in plain English. For example: "High blood pressure (when blood pushes too hard against artery walls)" or "Diabetes (body can't properly control blood sugar levels)"]
-
-## Current Medications
-- [List medications and explain what they do. For example: "Metformin (helps lower blood sugar)" or "Lisinopril (lowers blood pressure)"]
-
-## Allergies
-- [List any allergies and reactions in simple terms]
-
-# This Visit
-## What They Were Experiencing
-- [Describe symptoms in everyday language. Instead of "dyspnea", say "trouble breathing" or "shortness of breath"]
-
-## What the Doctor Found
-- **Vital Signs:** [Explain what these numbers mean. For example: "Blood pressure 140/90 (a bit high, normal is around 120/80)"]
-- **Physical Exam:** [Describe findings in plain English]
-
-## Tests Done & Results
-- [Explain tests and results simply. For example: "Blood sugar test: 180 mg/dL (higher than normal, which is 70-100)" or "X-ray showed fluid in lungs (meaning lungs had extra water in them)"]
-- **IMPORTANT RESULTS** in bold with explanations
-
-## What's Wrong (Diagnosis)
-- [Explain conditions in simple terms. For example: instead of "acute myocardial infarction", say "heart attack (when blood flow to the heart is blocked)"]
-
-## Treatment & What They Did
-- [Describe treatments clearly. For example: "Started on antibiotics (medicine to kill bacteria causing infection)" or "Given IV fluids (water and minerals through a tube into the vein)"]
-
-# Most Important Things to Know
-[List the critical points in simple bullet points - things that really matter for the patient to understand]
-
-# What Happens Next
-[Explain follow-up care, instructions, or next appointments in clear, simple language]
-
----
-
-**MEDICAL DOCUMENT:**
-{combined_text}
-
----
-
-**REMEMBER: Explain EVERY medical term you use. Be as simple and clear as possible. Imagine explaining to someone who knows nothing about medicine.**"""
-
-        # Configure for longer output
-        generation_config = GenerationConfig(
-            max_output_tokens=2048,  # Allow full 2000 token summary
-            temperature=0.3,  # Lower temperature for more factual, structured output
-        )
-
-        model = GenerativeModel("gemini-2.0-flash-exp", generation_config=generation_config)
-        response = model.generate_content(prompt)
-        summary = response.text.strip()
+        summarizer = DocumentSummarizer(project_id=config.project_id, db=db)
+        summary = summarizer.summarize(texts, document_id)
         print(f"✓ Generated comprehensive summary ({len(summary)} chars)")
         return summary
     except Exception as e:
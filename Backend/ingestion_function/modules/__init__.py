@@ -3,12 +3,20 @@ from .config import Config
 from .docai import DocumentAIProcessor
 from .chunking import DocumentChunker
 from .vector_index import VectorIndexUploader
+from .lexical_index import LexicalIndexWriter
 from .semantic_chunking import SemanticChunker
+from .dedup import DocumentDeduplicator
+from .summarizer import DocumentSummarizer
+from .progress import IngestionProgress
 
 __all__ = [
     "Config",
     "DocumentAIProcessor",
     "DocumentChunker",
     "VectorIndexUploader",
+    "LexicalIndexWriter",
     "SemanticChunker",
+    "DocumentDeduplicator",
+    "DocumentSummarizer",
+    "IngestionProgress",
 ]
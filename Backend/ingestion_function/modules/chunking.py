@@ -1,17 +1,64 @@
 """Document chunking logic."""
-from typing import Dict, Any, List
-import nltk
+from typing import Dict, Any, Iterator, List, Optional
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import os
+import threading
+
 import tiktoken
 
-# Download NLTK data
-nltk.download("punkt", quiet=True)
-nltk.download("punkt_tab", quiet=True)
+from .docai_access import DocNode
+
+# Tokenizer resources are vendored into the deployment by
+# scripts/vendor_tokenizer_resources.py and loaded on first use, so importing
+# this module does no network or disk I/O. Without the vendored copies they
+# are downloaded on first use instead.
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vendor")
+NLTK_DATA_DIR = os.path.join(VENDOR_DIR, "nltk_data")
+TIKTOKEN_CACHE_DIR = os.path.join(VENDOR_DIR, "tiktoken_cache")
+TIKTOKEN_ENCODING_NAME = "cl100k_base"
+NLTK_SENTENCE_RESOURCE = "punkt_tab"
+
+# Joins sentences for single-call token counting (see sentence_token_counts)
+SENTENCE_SEPARATOR = "<|endoftext|>"
+
+_encoding: Optional[tiktoken.Encoding] = None
+_sent_tokenize = None
+_resource_lock = threading.Lock()
+
 
-# Initialize tokenizer
-try:
-    ENCODING = tiktoken.get_encoding("cl100k_base")
-except Exception:
-    ENCODING = tiktoken.encoding_for_model("gpt-4")
+def get_encoding() -> tiktoken.Encoding:
+    """Return the tiktoken encoding, loading it on first use."""
+    global _encoding
+    if _encoding is None:
+        with _resource_lock:
+            if _encoding is None:
+                if os.path.isdir(TIKTOKEN_CACHE_DIR):
+                    # tiktoken reads its cache directory from the environment
+                    os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+                else:
+                    print(f"Warning: {TIKTOKEN_ENCODING_NAME} is not vendored, downloading it")
+                _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING_NAME)
+    return _encoding
+
+
+def get_sentence_tokenizer():
+    """Return nltk.sent_tokenize, importing NLTK and locating punkt on first use."""
+    global _sent_tokenize
+    if _sent_tokenize is None:
+        with _resource_lock:
+            if _sent_tokenize is None:
+                import nltk
+
+                if os.path.isdir(NLTK_DATA_DIR) and NLTK_DATA_DIR not in nltk.data.path:
+                    nltk.data.path.insert(0, NLTK_DATA_DIR)
+                try:
+                    nltk.data.find(f"tokenizers/{NLTK_SENTENCE_RESOURCE}/english/")
+                except LookupError:
+                    print(f"Warning: NLTK {NLTK_SENTENCE_RESOURCE} is not vendored, downloading it")
+                    nltk.download(NLTK_SENTENCE_RESOURCE, quiet=True)
+                _sent_tokenize = nltk.sent_tokenize
+    return _sent_tokenize
 
 
 class DocumentChunker:
@@ -19,16 +66,17 @@ class DocumentChunker:
 
     MIN_CHUNK_LENGTH = 50  # Characters
     MAX_TOKENS = 512  # Tokens per chunk
+    OVERLAP_TOKENS = 0  # Tokens of whole sentences repeated between chunks
 
     @staticmethod
     def count_tokens(text: str) -> int:
         """Count tokens in text."""
-        return len(ENCODING.encode(text))
+        return len(get_encoding().encode(text))
 
     @staticmethod
     def split_into_sentences(text: str) -> List[str]:
         """Split text into sentences."""
-        sentences = nltk.sent_tokenize(text)
+        sentences = get_sentence_tokenizer()(text)
         refined = []
         for sentence in sentences:
             refined.extend(
@@ -37,27 +85,116 @@ class DocumentChunker:
         return [s for s in refined if s]
 
     @classmethod
-    def chunk_text(cls, text: str) -> List[Dict[str, Any]]:
+    def sentence_token_counts(cls, sentences: List[str]) -> List[int]:
         """
-        Chunk text using rule-based approach.
+        Count the tokens of every sentence with a single tokenizer call.
+
+        The sentences are joined with a special token, which the tokenizer
+        never merges across: each segment is encoded exactly as it would be
+        on its own, so the counts equal count_tokens() per sentence.
 
         Args:
-            text: Input text
+            sentences: Sentences, in order
 
         Returns:
-            List of chunk dicts with text and metadata
+            Token count of each sentence
+        """
+        if not sentences:
+            return []
+        if any(SENTENCE_SEPARATOR in sentence for sentence in sentences):
+            # The separator would be ambiguous; count one sentence at a time
+            return [cls.count_tokens(sentence) for sentence in sentences]
+
+        encoding = get_encoding()
+        separator_token = encoding.encode_single_token(SENTENCE_SEPARATOR)
+        tokens = encoding.encode(
+            SENTENCE_SEPARATOR.join(sentences), allowed_special={SENTENCE_SEPARATOR}
+        )
+        counts = []
+        start = 0
+        for _ in range(len(sentences) - 1):
+            end = tokens.index(separator_token, start)
+            counts.append(end - start)
+            start = end + 1
+        counts.append(len(tokens) - start)
+        return counts
+
+    @classmethod
+    def iter_chunk_text(
+        cls, text: str, overlap_tokens: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Chunk text using rule-based approach, yielding chunks as they close.
+
+        Sentences are greedily grouped into chunks of up to MAX_TOKENS (a
+        longer sentence becomes a chunk of its own). The text is tokenized
+        once; chunks are cut by bisecting the sentences' cumulative token
+        offsets and sliced out of the joined text by character offsets.
+
+        Args:
+            text: Input text
+            overlap_tokens: Tokens of trailing whole sentences repeated at
+                the start of the next chunk (default OVERLAP_TOKENS)
+
+        Yields:
+            Chunk dicts with text and metadata
+        """
+        if overlap_tokens is None:
+            overlap_tokens = cls.OVERLAP_TOKENS
+        sentences = cls.split_into_sentences(text)
+        if not sentences:
+            return
+
+        # token_offsets[i] / char_offsets[i]: where sentence i starts in the
+        # token stream / in the single-space-joined text
+        token_offsets = [0, *accumulate(cls.sentence_token_counts(sentences))]
+        char_offsets = [0]
+        for sentence in sentences:
+            char_offsets.append(char_offsets[-1] + len(sentence) + 1)
+        joined = " ".join(sentences)
+
+        start = 0
+        end = 0
+        idx = 0
+        while end < len(sentences):
+            # Longest run of sentences within the budget, with at least one
+            # sentence the previous chunk did not have
+            end = max(
+                bisect_right(token_offsets, token_offsets[start] + cls.MAX_TOKENS) - 1,
+                end + 1,
+            )
+            idx += 1
+            yield cls._rule_based_chunk(joined[char_offsets[start] : char_offsets[end] - 1], idx)
+
+            # The next chunk starts with the trailing whole sentences that
+            # fit the overlap (never with this chunk's first sentence)
+            if overlap_tokens > 0:
+                start = max(
+                    bisect_left(token_offsets, token_offsets[end] - overlap_tokens), start + 1
+                )
+            else:
+                start = end
+
+    @classmethod
+    def iter_chunk_text_per_sentence(cls, text: str) -> Iterator[Dict[str, Any]]:
+        """
+        Reference chunker: tokenizes sentence by sentence (no overlap).
+
+        Kept to check iter_chunk_text against (see
+        benchmarks/chunking_benchmark.py).
         """
         sentences = cls.split_into_sentences(text)
 
         # Simple rule-based chunking: group sentences by token count
-        simple_chunks = []
         current_chunk = []
         current_tokens = 0
+        idx = 0
 
         for sentence in sentences:
             sentence_tokens = cls.count_tokens(sentence)
             if current_tokens + sentence_tokens > cls.MAX_TOKENS and current_chunk:
-                simple_chunks.append(" ".join(current_chunk))
+                idx += 1
+                yield cls._rule_based_chunk(" ".join(current_chunk), idx)
                 current_chunk = [sentence]
                 current_tokens = sentence_tokens
             else:
@@ -65,52 +202,76 @@ class DocumentChunker:
                 current_tokens += sentence_tokens
 
         if current_chunk:
-            simple_chunks.append(" ".join(current_chunk))
-
-        # Create chunk dicts
-        doc_chunks = []
-        for idx, chunk_text in enumerate(simple_chunks, start=1):
-            doc_chunks.append(
-                {
-                    "text": chunk_text,
-                    "metadata": {"chunk_type": "rule_based", "chunk_index": idx},
-                }
-            )
-
-        return doc_chunks
+            yield cls._rule_based_chunk(" ".join(current_chunk), idx + 1)
 
     @classmethod
-    def build_chunks(
-        cls, layout_json: Dict[str, Any], form_json: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    def chunk_text(cls, text: str) -> List[Dict[str, Any]]:
         """
-        Build chunks from Document AI outputs.
+        Chunk text using rule-based approach.
 
         Args:
-            layout_json: Layout parser output
-            form_json: Form parser output
+            text: Input text
 
         Returns:
-            List of chunk dicts
+            List of chunk dicts with text and metadata
+        """
+        return list(cls.iter_chunk_text(text))
+
+    @staticmethod
+    def _rule_based_chunk(text: str, idx: int) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "metadata": {"chunk_type": "rule_based", "chunk_index": idx},
+        }
+
+    @classmethod
+    def iter_chunks(cls, layout_json: DocNode, form_json: DocNode) -> Iterator[Dict[str, Any]]:
+        """
+        Build chunks from Document AI outputs, yielding them as they are made.
+
+        Lets ingestion start embedding the first chunks while later ones
+        are still being tokenized.
+
+        Args:
+            layout_json: Layout parser output (Document proto or JSON dict)
+            form_json: Form parser output (Document proto or JSON dict)
+
+        Yields:
+            Chunk dicts: layout text chunks, then form key-value pairs
         """
         from modules.docai import DocumentAIProcessor
 
         # Extract layout text and chunk it
         layout_text = DocumentAIProcessor.extract_layout_text(layout_json)
-        doc_chunks = cls.chunk_text(layout_text)
+        yield from cls.iter_chunk_text(layout_text)
 
         # Add form key-value pairs as separate chunks
         kv_items = DocumentAIProcessor.extract_form_kv_pairs(form_json)
-        if kv_items:
-            for idx, kv_item in enumerate(kv_items, start=1):
-                doc_chunks.append(
-                    {
-                        "text": kv_item["text"],
-                        "metadata": {"chunk_type": "kv_pair", "chunk_index": idx},
-                    }
-                )
+        for idx, kv_item in enumerate(kv_items or [], start=1):
+            yield {
+                "text": kv_item["text"],
+                "metadata": {"chunk_type": "kv_pair", "chunk_index": idx},
+            }
+
+    @classmethod
+    def build_chunks(cls, layout_json: DocNode, form_json: DocNode) -> List[Dict[str, Any]]:
+        """
+        Build chunks from Document AI outputs.
+
+        Args:
+            layout_json: Layout parser output (Document proto or JSON dict)
+            form_json: Form parser output (Document proto or JSON dict)
+
+        Returns:
+            List of chunk dicts
+        """
+        return list(cls.iter_chunks(layout_json, form_json))
 
-        return doc_chunks
+    @classmethod
+    def is_substantive(cls, chunk: Dict[str, Any]) -> bool:
+        """Check that a chunk is long enough to be worth indexing."""
+        text = chunk["text"].strip()
+        return bool(text) and len(text) >= cls.MIN_CHUNK_LENGTH
 
     @classmethod
     def filter_substantive_chunks(
@@ -125,9 +286,4 @@ class DocumentChunker:
         Returns:
             Filtered list of chunks
         """
-        return [
-            chunk
-            for chunk in chunks
-            if chunk["text"].strip()
-            and len(chunk["text"].strip()) >= cls.MIN_CHUNK_LENGTH
-        ]
+        return [chunk for chunk in chunks if cls.is_substantive(chunk)]
@@ -24,6 +24,7 @@ class Config:
     endpoint_id: str
     deployed_index_id: str
     artifact_bucket: str
+    summary_topic: str
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -52,4 +53,5 @@ class Config:
             endpoint_id=endpoint_id,
             deployed_index_id=_require_env("DEPLOYED_INDEX_ID"),
             artifact_bucket=_require_env("ARTIFACT_BUCKET"),
+            summary_topic=os.getenv("SUMMARY_TOPIC", "document-summary"),
         )
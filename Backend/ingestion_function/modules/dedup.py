@@ -0,0 +1,97 @@
+"""Content-hash deduplication of uploaded documents."""
+from typing import Any, Dict, Optional
+import hashlib
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+# Fields copied from the canonical document onto an alias. A summary still
+# pending on the canonical document is copied over when it completes (see
+# main.summarize_document).
+ALIAS_COPIED_FIELDS = (
+    "page_count",
+    "chunk_count",
+    "summary",
+    "summary_status",
+    "summary_generated_at",
+)
+
+
+class DocumentDeduplicator:
+    """
+    Detects re-uploads of a PDF the user already has and aliases them.
+
+    An alias is a normal document record (its own filename and PDF in GCS)
+    with ``alias_of`` set to the canonical document. It owns no chunks,
+    vectors or postings: those stay with the canonical document, so
+    duplicates never compete with each other at query time.
+    """
+
+    def __init__(self, project_id: str, db: Optional[firestore.Client] = None):
+        """
+        Initialize deduplicator.
+
+        Args:
+            project_id: GCP project ID
+            db: Firestore client (created if not given)
+        """
+        self.db = db or firestore.Client(project=project_id)
+
+    @staticmethod
+    def fingerprint(pdf_bytes: bytes) -> str:
+        """Return the hex SHA-256 of the PDF bytes."""
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def find_canonical(
+        self, user_id: str, content_sha256: str, document_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the user's completed, non-alias document with the same content.
+
+        Args:
+            user_id: Owner of the new upload
+            content_sha256: Fingerprint of the new upload
+            document_id: The new upload's document ID (never matched)
+
+        Returns:
+            The canonical document's data, or None
+        """
+        matches = (
+            self.db.collection("documents")
+            .where(filter=FieldFilter("user_id", "==", user_id))
+            .where(filter=FieldFilter("content_sha256", "==", content_sha256))
+            .stream()
+        )
+        for doc in matches:
+            data = doc.to_dict() or {}
+            if (
+                doc.id != document_id
+                and data.get("processing_status") == "completed"
+                and not data.get("alias_of")
+            ):
+                return {**data, "document_id": doc.id}
+        return None
+
+    def alias_document(
+        self, document_id: str, canonical: Dict[str, Any], content_sha256: str
+    ) -> None:
+        """
+        Mark document_id as a completed alias of the canonical document.
+
+        Args:
+            document_id: The new upload's document ID
+            canonical: Canonical document data (from find_canonical)
+            content_sha256: Shared fingerprint
+        """
+        update_data = {
+            field: canonical[field] for field in ALIAS_COPIED_FIELDS if field in canonical
+        }
+        update_data.update(
+            {
+                "alias_of": canonical["document_id"],
+                "content_sha256": content_sha256,
+                "processing_status": "completed",
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }
+        )
+        self.db.collection("documents").document(document_id).update(update_data)
@@ -1,112 +1,371 @@
 """Document AI processing logic."""
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import hashlib
 import re
-from google.cloud import documentai
-from google.protobuf.json_format import MessageToDict
+import time
+
+from google.api_core import exceptions as core_exceptions
+from google.api_core.retry import Retry, if_exception_type
+from google.cloud import documentai, storage
+
+from .docai_access import DocNode, get_field
+from .docai_checkpoint import DocAICheckpointStore
+from .docai_sharding import count_pdf_pages, merge_documents, split_pdf
+
+# Per-attempt deadline for one online processing call
+DOCAI_CALL_TIMEOUT_SECONDS = 120.0
+
+# Total time (all attempts plus backoff) one processor may spend retrying
+DOCAI_RETRY_BUDGET_SECONDS = 300.0
+
+# Transient errors worth retrying; anything else fails the processor immediately
+DOCAI_RETRYABLE_ERRORS = (
+    core_exceptions.ServiceUnavailable,
+    core_exceptions.DeadlineExceeded,
+    core_exceptions.InternalServerError,
+    core_exceptions.ResourceExhausted,
+)
+
+# Online requests are limited to 15 pages; longer PDFs are split into
+# page-range shards of this size and processed in parallel
+DOCAI_SHARD_PAGES = 15
+DOCAI_SHARD_CONCURRENCY = 4
+
+# PDFs above this many pages go through batch processing (GCS in/out)
+DOCAI_BATCH_PAGE_THRESHOLD = 200
+DOCAI_BATCH_TIMEOUT_SECONDS = 900.0
 
 
 class DocumentAIProcessor:
     """Handles Document AI processing operations."""
 
-    def __init__(self, project_id: str, location: str):
-        """Initialize Document AI client."""
+    def __init__(self, project_id: str, location: str, artifact_bucket: Optional[str] = None):
+        """
+        Initialize Document AI client.
+
+        Args:
+            project_id: GCP project ID
+            location: Document AI location (e.g. "us")
+            artifact_bucket: Bucket for output checkpoints and batch processing
+                input/output; without it nothing is checkpointed and very
+                large PDFs are processed as online shards instead
+        """
         self.project_id = project_id
         self.location = location
+        self.artifact_bucket = artifact_bucket
         client_options = {"api_endpoint": f"{location}-documentai.googleapis.com"}
         self.client = documentai.DocumentProcessorServiceClient(
             client_options=client_options
         )
+        self.checkpoints = (
+            DocAICheckpointStore(artifact_bucket, project_id) if artifact_bucket else None
+        )
 
     def process_document(
         self, pdf_bytes: bytes, layout_processor_id: str, form_processor_id: str
-    ) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    ) -> tuple[DocNode, DocNode]:
         """
         Process PDF with both layout and form processors.
 
+        The two processors are called concurrently, each with its own
+        per-attempt timeout and retry budget. A partial result is accepted:
+        if the form processor fails its output is empty (no key-value
+        chunks); if the layout processor fails, the form processor's OCR
+        text is used for the layout text instead.
+
+        PDFs longer than DOCAI_SHARD_PAGES are split into page-range shards
+        that are processed in parallel and merged back into one document;
+        PDFs longer than DOCAI_BATCH_PAGE_THRESHOLD use batch processing
+        through the artifact bucket.
+
+        Each processor's output is checkpointed in the artifact bucket, keyed
+        by the PDF's SHA-256 and the processor version, and reused on the
+        next run over the same PDF (function retries, re-chunking), so only
+        processors without a checkpoint are called.
+
         Args:
             pdf_bytes: PDF file bytes
             layout_processor_id: Layout processor ID
             form_processor_id: Form processor ID
 
         Returns:
-            Tuple of (layout_json, form_json)
+            Tuple of (layout, form) Document protos; a failed form processor
+            yields an empty dict. The extraction helpers accept either.
+
+        Raises:
+            Exception: The layout processor's error, if both processors fail
         """
-        layout_json = self._process_with_processor(
-            pdf_bytes, layout_processor_id, "layout"
+        pdf_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        processors = {"layout": layout_processor_id, "form": form_processor_id}
+        versions = {
+            name: self._processor_version(processor_id)
+            for name, processor_id in processors.items()
+        }
+        cached: Dict[str, documentai.Document] = {}
+        for name, version in versions.items():
+            document = self.checkpoints.load(pdf_sha256, version) if version else None
+            if document is not None:
+                print(f"✓ DocAI {name} output loaded from checkpoint")
+                cached[name] = document
+        if len(cached) == len(processors):
+            return cached["layout"], cached["form"]
+
+        def run(
+            name: str,
+            shards: Optional[List[Tuple[int, bytes]]],
+            gcs_input_uri: Optional[str],
+        ) -> documentai.Document:
+            """Return the checkpointed output, or process and checkpoint it."""
+            if name in cached:
+                return cached[name]
+            document = self._process_with_processor(
+                pdf_bytes, processors[name], name, shards, gcs_input_uri
+            )
+            if versions[name]:
+                self.checkpoints.save(pdf_sha256, versions[name], document)
+            return document
+
+        page_count = count_pdf_pages(pdf_bytes)
+        use_batch = (
+            page_count is not None
+            and page_count > DOCAI_BATCH_PAGE_THRESHOLD
+            and bool(self.artifact_bucket)
         )
-        form_json = self._process_with_processor(
-            pdf_bytes, form_processor_id, "form"
+        shards = None
+        if not use_batch and page_count is not None and page_count > DOCAI_SHARD_PAGES:
+            shards = split_pdf(pdf_bytes, DOCAI_SHARD_PAGES)
+
+        if use_batch:
+            print(f"DocAI: {page_count} pages, using batch processing")
+        elif shards:
+            print(f"DocAI: {page_count} pages, processing {len(shards)} shards")
+
+        with self._batch_input(pdf_bytes if use_batch else None) as gcs_input_uri:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                layout_future = executor.submit(run, "layout", shards, gcs_input_uri)
+                form_future = executor.submit(run, "form", shards, gcs_input_uri)
+                layout_error = layout_future.exception()
+                form_error = form_future.exception()
+
+        if layout_error and form_error:
+            print(f"ERROR: DocAI layout and form processors both failed: {layout_error}")
+            raise layout_error
+
+        form_json = {} if form_error else form_future.result()
+        if form_error:
+            print(f"Warning: DocAI form processor failed, continuing without form fields: {form_error}")
+
+        if layout_error:
+            print(f"Warning: DocAI layout processor failed, using form OCR text: {layout_error}")
+            return form_json, form_json
+
+        return layout_future.result(), form_json
+
+    def _processor_version(self, processor_id: str) -> Optional[str]:
+        """
+        Resolve the processor's default version (what a request is served by).
+
+        Returns:
+            Full processor version resource name, or None if it cannot be
+            resolved (checkpoints are then skipped for this processor)
+        """
+        if not self.checkpoints:
+            return None
+        processor_name = self.client.processor_path(
+            self.project_id, self.location, processor_id
         )
-        return layout_json, form_json
+        try:
+            return self.client.get_processor(name=processor_name).default_processor_version
+        except Exception as e:
+            print(f"Warning: Could not resolve DocAI processor version, skipping checkpoint: {e}")
+            return None
 
     def _process_with_processor(
-        self, pdf_bytes: bytes, processor_id: str, name: str
-    ) -> Dict[str, Any]:
-        """Process document with a specific processor."""
+        self,
+        pdf_bytes: bytes,
+        processor_id: str,
+        name: str,
+        shards: Optional[List[Tuple[int, bytes]]] = None,
+        gcs_input_uri: Optional[str] = None,
+    ) -> documentai.Document:
+        """Process document with a specific processor (whole, sharded or batch)."""
         processor_name = self.client.processor_path(
             self.project_id, self.location, processor_id
         )
+
+        start = time.perf_counter()
+        try:
+            if gcs_input_uri:
+                document = self._process_batch(gcs_input_uri, processor_name, name)
+            elif shards:
+                document = self._process_shards(shards, processor_name, name)
+            else:
+                document = self._process_online(pdf_bytes, processor_name, name)
+        except Exception:
+            print(f"DocAI {name} processor failed after {time.perf_counter() - start:.2f}s")
+            raise
+
+        elapsed = time.perf_counter() - start
+        print(f"DocAI {name} processor complete in {elapsed:.2f}s")
+        return document
+
+    def _process_online(
+        self, pdf_bytes: bytes, processor_name: str, name: str
+    ) -> documentai.Document:
+        """Process (part of) a PDF with one online request, retrying transient errors."""
         request = documentai.ProcessRequest(
             name=processor_name,
             raw_document=documentai.RawDocument(
                 content=pdf_bytes, mime_type="application/pdf"
             ),
         )
-        result = self.client.process_document(request=request)
-        document_dict = MessageToDict(result.document._pb)
-        print(f"DocAI {name} processor complete")
-        return document_dict
+
+        def on_retry(error: Exception) -> None:
+            print(f"DocAI {name} processor attempt failed ({error}), retrying")
+
+        result = self.client.process_document(
+            request=request,
+            timeout=DOCAI_CALL_TIMEOUT_SECONDS,
+            retry=Retry(
+                predicate=if_exception_type(*DOCAI_RETRYABLE_ERRORS),
+                initial=2.0,
+                maximum=30.0,
+                multiplier=2.0,
+                timeout=DOCAI_RETRY_BUDGET_SECONDS,
+                on_error=on_retry,
+            ),
+        )
+        return result.document
+
+    def _process_shards(
+        self, shards: List[Tuple[int, bytes]], processor_name: str, name: str
+    ) -> documentai.Document:
+        """Process page-range shards in parallel and merge them in page order."""
+        with ThreadPoolExecutor(max_workers=DOCAI_SHARD_CONCURRENCY) as executor:
+            documents = list(
+                executor.map(
+                    lambda shard: self._process_online(
+                        shard[1], processor_name, f"{name} (pages from {shard[0] + 1})"
+                    ),
+                    shards,
+                )
+            )
+        return merge_documents(documents, [first_page for first_page, _ in shards])
+
+    @contextmanager
+    def _batch_input(self, pdf_bytes: Optional[bytes]) -> Iterator[Optional[str]]:
+        """Stage the PDF in the artifact bucket for batch processing, then delete it."""
+        if pdf_bytes is None:
+            yield None
+            return
+
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        bucket = storage.Client(project=self.project_id).bucket(self.artifact_bucket)
+        blob = bucket.blob(f"docai/batch/{digest}/input.pdf")
+        blob.upload_from_string(pdf_bytes, content_type="application/pdf")
+        try:
+            yield f"gs://{self.artifact_bucket}/{blob.name}"
+        finally:
+            # The staged copies contain PHI: remove input and outputs
+            for staged in bucket.list_blobs(prefix=f"docai/batch/{digest}/"):
+                staged.delete()
+
+    def _process_batch(
+        self, gcs_input_uri: str, processor_name: str, name: str
+    ) -> documentai.Document:
+        """Run a batch process operation and merge its output shards."""
+        output_prefix = gcs_input_uri.rsplit("/", 1)[0] + f"/output-{name}/"
+        request = documentai.BatchProcessRequest(
+            name=processor_name,
+            input_documents=documentai.BatchDocumentsInputConfig(
+                gcs_documents=documentai.GcsDocuments(
+                    documents=[
+                        documentai.GcsDocument(
+                            gcs_uri=gcs_input_uri, mime_type="application/pdf"
+                        )
+                    ]
+                )
+            ),
+            document_output_config=documentai.DocumentOutputConfig(
+                gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+                    gcs_uri=output_prefix
+                )
+            ),
+        )
+        operation = self.client.batch_process_documents(request=request)
+        operation.result(timeout=DOCAI_BATCH_TIMEOUT_SECONDS)
+
+        bucket_name, prefix = output_prefix[len("gs://"):].split("/", 1)
+        bucket = storage.Client(project=self.project_id).bucket(bucket_name)
+        documents = [
+            documentai.Document.from_json(
+                blob.download_as_bytes(), ignore_unknown_fields=True
+            )
+            for blob in bucket.list_blobs(prefix=prefix)
+            if blob.name.endswith(".json")
+        ]
+        if not documents:
+            raise RuntimeError(f"DocAI {name} batch operation produced no output")
+
+        # Output shards already carry absolute page numbers and global text
+        # anchors; only their texts have to be concatenated in shard order
+        documents.sort(key=lambda document: document.shard_info.shard_index)
+        return merge_documents(
+            documents,
+            [0] * len(documents),
+            [document.shard_info.text_offset for document in documents],
+        )
 
     @staticmethod
-    def extract_layout_text(layout_json: Dict[str, Any]) -> str:
+    def extract_layout_text(layout_json: DocNode) -> str:
         """
-        Extract text from Document AI Layout Parser JSON.
+        Extract text from Document AI Layout Parser output.
 
         Args:
-            layout_json: Layout parser output
+            layout_json: Layout parser output (Document proto or JSON dict)
 
         Returns:
             Extracted text
         """
         # Check if there's a top-level text field (fallback)
-        if "text" in layout_json and layout_json["text"]:
+        text = get_field(layout_json, "text")
+        if text:
             print("Found top-level text field")
-            return layout_json["text"]
+            return text
 
         # Extract from documentLayout blocks (primary method for layout parser)
-        if "documentLayout" not in layout_json:
+        document_layout = get_field(layout_json, "document_layout")
+        if document_layout is None:
             print("WARNING: No documentLayout found in layout JSON")
             return ""
 
-        blocks = layout_json.get("documentLayout", {}).get("blocks", [])
+        blocks = get_field(document_layout, "blocks", [])
         collected_texts = []
 
-        def extract_from_blocks(block_list: List[Dict[str, Any]]) -> None:
+        def extract_from_blocks(block_list: List[DocNode]) -> None:
             """Recursively extract text from nested blocks."""
             for block in block_list:
+                text_block = get_field(block, "text_block")
+                table = get_field(block, "table_block")
+
                 # Extract text from textBlock
-                if "textBlock" in block:
-                    text_block = block["textBlock"]
-                    if "text" in text_block and text_block["text"]:
-                        collected_texts.append(text_block["text"])
+                if text_block is not None:
+                    block_text = get_field(text_block, "text")
+                    if block_text:
+                        collected_texts.append(block_text)
 
                     # Recursively process nested blocks
-                    if "blocks" in text_block:
-                        extract_from_blocks(text_block["blocks"])
+                    extract_from_blocks(get_field(text_block, "blocks", []))
 
                 # Handle tableBlock if present
-                elif "tableBlock" in block:
-                    table = block["tableBlock"]
-                    # Extract from header rows
-                    for row in table.get("headerRows", []):
-                        for cell in row.get("cells", []):
-                            if "blocks" in cell:
-                                extract_from_blocks(cell["blocks"])
-                    # Extract from body rows
-                    for row in table.get("bodyRows", []):
-                        for cell in row.get("cells", []):
-                            if "blocks" in cell:
-                                extract_from_blocks(cell["blocks"])
+                elif table is not None:
+                    # Extract from header rows, then body rows
+                    for rows in ("header_rows", "body_rows"):
+                        for row in get_field(table, rows, []):
+                            for cell in get_field(row, "cells", []):
+                                extract_from_blocks(get_field(cell, "blocks", []))
 
         print(f"Extracting from {len(blocks)} top-level blocks")
         extract_from_blocks(blocks)
@@ -117,24 +376,24 @@ class DocumentAIProcessor:
         return full_text
 
     @staticmethod
-    def extract_form_kv_pairs(form_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def extract_form_kv_pairs(form_json: DocNode) -> List[Dict[str, Any]]:
         """
         Extract key-value pairs from form processor output.
 
         Args:
-            form_json: Form processor output
+            form_json: Form processor output (Document proto or JSON dict)
 
         Returns:
             List of key-value pair dicts
         """
-        full_text = form_json.get("text", "")
+        full_text = get_field(form_json, "text", "")
         kv_items = []
 
-        for page in form_json.get("pages", []):
-            page_number = page.get("pageNumber", 0)
-            for form_field in page.get("formFields", []):
-                key_anchor = form_field.get("fieldName", {}).get("textAnchor")
-                value_anchor = form_field.get("fieldValue", {}).get("textAnchor")
+        for page in get_field(form_json, "pages", []):
+            page_number = get_field(page, "page_number", 0)
+            for form_field in get_field(page, "form_fields", []):
+                key_anchor = get_field(get_field(form_field, "field_name"), "text_anchor")
+                value_anchor = get_field(get_field(form_field, "field_value"), "text_anchor")
                 key = DocumentAIProcessor._read_anchor_text(key_anchor, full_text)
                 value = DocumentAIProcessor._read_anchor_text(value_anchor, full_text)
                 if key and value:
@@ -143,13 +402,13 @@ class DocumentAIProcessor:
         return kv_items
 
     @staticmethod
-    def _read_anchor_text(anchor: Dict[str, Any], full_text: str) -> str:
+    def _read_anchor_text(anchor: Optional[DocNode], full_text: str) -> str:
         """Read text from text anchor."""
         if not anchor:
             return ""
         out = []
-        for segment in anchor.get("textSegments", []):
-            start = int(segment.get("startIndex", 0))
-            end = int(segment.get("endIndex", 0))
+        for segment in get_field(anchor, "text_segments", []):
+            start = int(get_field(segment, "start_index", 0))
+            end = int(get_field(segment, "end_index", 0))
             out.append(full_text[start:end])
         return re.sub(r"\s+", " ", "".join(out)).strip()
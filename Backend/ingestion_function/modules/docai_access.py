@@ -0,0 +1,75 @@
+"""Uniform read access to Document AI output as protobuf or JSON dict.
+
+The extraction helpers in docai.py and semantic_chunking.py read Document AI
+output through these accessors, so the same code walks either the protobuf
+``Document`` returned by the API (no MessageToDict copy) or its JSON form
+(camelCase keys, as in recorded fixtures).
+
+Field names are given in proto snake_case. Presence follows MessageToDict:
+unset messages, empty repeated fields and scalars at their default value are
+treated as missing, so both representations yield the same results.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Union
+
+from google.protobuf.internal.type_checkers import ToShortestFloat
+from google.protobuf.message import Message
+
+# A Document (or any sub-message) as proto-plus wrapper, raw protobuf or dict
+DocNode = Union[Dict[str, Any], Message, Any]
+
+
+@lru_cache(maxsize=None)
+def _json_name(name: str) -> str:
+    """Convert a snake_case proto field name to its camelCase JSON name."""
+    first, *rest = name.split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+
+def _message(node: DocNode) -> Message:
+    """Unwrap proto-plus wrappers to the underlying protobuf message."""
+    return getattr(node, "_pb", node)
+
+
+def _is_repeated(field) -> bool:
+    """FieldDescriptor.label is deprecated in newer protobuf releases."""
+    is_repeated = getattr(field, "is_repeated", None)
+    if is_repeated is not None:
+        return is_repeated
+    return field.label == field.LABEL_REPEATED
+
+
+def get_field(node: DocNode, name: str, default: Any = None) -> Any:
+    """
+    Read a field from a Document node.
+
+    Args:
+        node: Dict, protobuf message or proto-plus wrapper (None is allowed)
+        name: Field name in snake_case
+        default: Returned when the field is missing
+
+    Returns:
+        The field value (sub-messages and repeated fields in the node's own
+        representation), or default
+    """
+    if node is None:
+        return default
+    if isinstance(node, dict):
+        return node.get(_json_name(name), default)
+
+    message = _message(node)
+    field = message.DESCRIPTOR.fields_by_name.get(name)
+    if field is None:
+        return default
+
+    value = getattr(message, name)
+    if _is_repeated(field):
+        return value if len(value) else default
+    if field.message_type is not None:
+        return value if message.HasField(name) else default
+    if value == field.default_value:
+        return default
+    if field.cpp_type == field.CPPTYPE_FLOAT:
+        # float32 values are widened to double; round like MessageToDict
+        return ToShortestFloat(value)
+    return value
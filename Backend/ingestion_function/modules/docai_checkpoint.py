@@ -0,0 +1,80 @@
+"""Checkpoints of Document AI outputs in the artifact bucket."""
+from typing import Optional
+import gzip
+
+from google.api_core import exceptions as core_exceptions
+from google.cloud import documentai, storage
+
+# Object prefix for checkpoints: {prefix}/{pdf sha256}/{processor id}-{version id}.pb.gz
+CHECKPOINT_PREFIX = "docai/checkpoints"
+
+
+class DocAICheckpointStore:
+    """
+    Gzipped, serialized Document protos keyed by PDF content hash and
+    processor version.
+
+    A retried ingestion, or a re-chunking/re-embedding run over the same PDF,
+    loads the checkpoint instead of paying for OCR again. Keying on the
+    processor version means a processor upgrade naturally misses the cache.
+    """
+
+    def __init__(self, bucket_name: str, project_id: Optional[str] = None):
+        """
+        Initialize checkpoint store.
+
+        Args:
+            bucket_name: Artifact bucket name
+            project_id: GCP project ID
+        """
+        self.bucket = storage.Client(project=project_id).bucket(bucket_name)
+
+    @staticmethod
+    def object_name(pdf_sha256: str, processor_version: str) -> str:
+        """
+        Build the checkpoint object name.
+
+        Args:
+            pdf_sha256: Hex SHA-256 of the PDF bytes
+            processor_version: Full processor version resource name
+                (projects/.../processors/{id}/processorVersions/{version})
+        """
+        parts = processor_version.split("/")
+        processor_id, version_id = parts[-3], parts[-1]
+        return f"{CHECKPOINT_PREFIX}/{pdf_sha256}/{processor_id}-{version_id}.pb.gz"
+
+    def load(self, pdf_sha256: str, processor_version: str) -> Optional[documentai.Document]:
+        """
+        Load a checkpointed Document.
+
+        Returns:
+            The Document, or None if there is no (readable) checkpoint
+        """
+        blob = self.bucket.blob(self.object_name(pdf_sha256, processor_version))
+        try:
+            data = blob.download_as_bytes()
+        except core_exceptions.NotFound:
+            return None
+        except Exception as e:
+            print(f"Warning: Could not read DocAI checkpoint {blob.name}: {e}")
+            return None
+
+        try:
+            return documentai.Document.deserialize(gzip.decompress(data))
+        except Exception as e:
+            print(f"Warning: Ignoring corrupt DocAI checkpoint {blob.name}: {e}")
+            return None
+
+    def save(
+        self, pdf_sha256: str, processor_version: str, document: documentai.Document
+    ) -> None:
+        """Write a Document checkpoint (failures are logged, not raised)."""
+        blob = self.bucket.blob(self.object_name(pdf_sha256, processor_version))
+        try:
+            data = gzip.compress(documentai.Document.serialize(document))
+            # Stored as a plain .gz object (no Content-Encoding) so GCS never
+            # transcodes it on download
+            blob.upload_from_string(data, content_type="application/gzip")
+            print(f"✓ Saved DocAI checkpoint {blob.name} ({len(data) / 1024:.0f} KiB)")
+        except Exception as e:
+            print(f"Warning: Could not save DocAI checkpoint {blob.name}: {e}")
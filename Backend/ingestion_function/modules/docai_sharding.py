@@ -0,0 +1,135 @@
+"""Page-range sharding of PDFs and merging of per-shard Document AI outputs."""
+from typing import List, Optional, Tuple
+import io
+
+from google.cloud import documentai
+from google.protobuf.message import Message
+from pypdf import PdfReader, PdfWriter
+
+from .docai_access import _is_repeated
+
+# Message types whose fields point into Document.text or at pages
+_TEXT_ANCHOR = "google.cloud.documentai.v1.Document.TextAnchor"
+_PAGE = "google.cloud.documentai.v1.Document.Page"
+_PAGE_REF = "google.cloud.documentai.v1.Document.PageAnchor.PageRef"
+_LAYOUT_BLOCK = "google.cloud.documentai.v1.Document.DocumentLayout.DocumentLayoutBlock"
+_LAYOUT_PAGE_SPAN = (
+    "google.cloud.documentai.v1.Document.DocumentLayout.DocumentLayoutBlock.LayoutPageSpan"
+)
+_CHUNK = "google.cloud.documentai.v1.Document.ChunkedDocument.Chunk"
+_CHUNK_PAGE_SPAN = "google.cloud.documentai.v1.Document.ChunkedDocument.Chunk.ChunkPageSpan"
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> Optional[int]:
+    """Return the PDF's page count, or None if it cannot be parsed."""
+    try:
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception as e:
+        print(f"Warning: Could not read PDF page count: {e}")
+        return None
+
+
+def split_pdf(pdf_bytes: bytes, pages_per_shard: int) -> List[Tuple[int, bytes]]:
+    """
+    Split a PDF into page-range shards.
+
+    Returns:
+        List of (first page index, shard PDF bytes), in page order
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    shards = []
+    for start in range(0, len(reader.pages), pages_per_shard):
+        writer = PdfWriter()
+        for page in reader.pages[start : start + pages_per_shard]:
+            writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        shards.append((start, buffer.getvalue()))
+    return shards
+
+
+def merge_documents(
+    documents: List[documentai.Document],
+    page_offsets: List[int],
+    text_offsets: Optional[List[int]] = None,
+) -> documentai.Document:
+    """
+    Merge per-shard Documents into one, as if the PDF had been processed whole.
+
+    Shard texts are concatenated, and every text anchor, page number, page
+    reference and layout page span is rebased onto the merged document, so
+    the extraction helpers work unchanged on the result. Layout block and
+    chunk IDs are prefixed with the shard index to keep them unique.
+
+    Args:
+        documents: Shard outputs, in page order (modified in place)
+        page_offsets: Pages preceding each shard in the original PDF
+        text_offsets: Offset of each shard's text that its anchors already
+            include (batch output shards use global offsets,
+            ``shard_info.text_offset``); defaults to 0 (shard-local anchors)
+
+    Returns:
+        Merged Document
+    """
+    merged = documentai.Document()
+    merged_pb = merged._pb
+    text_parts = []
+    text_offset = 0
+    if text_offsets is None:
+        text_offsets = [0] * len(documents)
+
+    for index, (document, page_offset, anchor_offset) in enumerate(
+        zip(documents, page_offsets, text_offsets)
+    ):
+        shard = document._pb
+        _rebase(shard, text_offset - anchor_offset, page_offset, f"s{index}-")
+
+        if not merged_pb.mime_type:
+            merged_pb.mime_type = shard.mime_type
+        merged_pb.pages.extend(shard.pages)
+        merged_pb.entities.extend(shard.entities)
+        merged_pb.document_layout.blocks.extend(shard.document_layout.blocks)
+        merged_pb.chunked_document.chunks.extend(shard.chunked_document.chunks)
+
+        text_parts.append(shard.text)
+        text_offset += len(shard.text)
+
+    merged_pb.text = "".join(text_parts)
+    return merged
+
+
+def _rebase(message: Message, text_offset: int, page_offset: int, id_prefix: str) -> None:
+    """Recursively shift text/page references in a Document (sub)message."""
+    name = message.DESCRIPTOR.full_name
+
+    if name == _TEXT_ANCHOR:
+        if text_offset:
+            for segment in message.text_segments:
+                segment.start_index += text_offset
+                segment.end_index += text_offset
+        return
+    if name == _PAGE:
+        message.page_number += page_offset
+    elif name == _PAGE_REF:
+        message.page += page_offset  # zero-based index into Document.pages
+    elif name in (_LAYOUT_PAGE_SPAN, _CHUNK_PAGE_SPAN):
+        if message.page_start:
+            message.page_start += page_offset
+        if message.page_end:
+            message.page_end += page_offset
+    elif name == _LAYOUT_BLOCK:
+        if message.block_id:
+            message.block_id = id_prefix + message.block_id
+    elif name == _CHUNK:
+        if message.chunk_id:
+            message.chunk_id = id_prefix + message.chunk_id
+        message.source_block_ids[:] = [id_prefix + i for i in message.source_block_ids]
+
+    for field, value in message.ListFields():
+        if field.type != field.TYPE_MESSAGE:
+            continue
+        if _is_repeated(field):
+            for item in value:
+                _rebase(item, text_offset, page_offset, id_prefix)
+        else:
+            _rebase(value, text_offset, page_offset, id_prefix)
@@ -0,0 +1,179 @@
+"""Per-user, content-addressed cache of chunk embeddings."""
+from typing import Dict, List
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import re
+import threading
+
+from google.cloud import firestore
+
+EMBEDDING_CACHE_COLLECTION = "chunk_embedding_cache"
+
+# Entries carry expires_at; a Firestore TTL policy on that field deletes them
+EMBEDDING_CACHE_TTL_DAYS = 90
+
+# In-memory front, kept across warm invocations of the function. Vectors are
+# held packed (~3 KB each for 768 dimensions), so this is ~30 MB when full.
+EMBEDDING_CACHE_MEMORY_ENTRIES = 10000
+
+# Firestore limits: keys per get_all round trip, writes per batch
+CACHE_READ_BATCH = 300
+CACHE_WRITE_BATCH = 500
+
+_memory_entries: "OrderedDict[str, bytes]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by a hash of the user, normalized text and model.
+
+    Text that recurs across a user's documents (form labels, headers,
+    disclaimers, re-ingested documents) is embedded once. Lookups go to the
+    in-memory front first, then Firestore, where vectors are stored as packed
+    float32 bytes. Embeddings of patient chunks are PHI, so entries are never
+    shared between users: each records the user and the document that wrote
+    it, and the query API deletes a document's entries with the document.
+    """
+
+    def __init__(
+        self,
+        db: firestore.Client,
+        model_name: str,
+        collection: str = EMBEDDING_CACHE_COLLECTION,
+        ttl_days: int = EMBEDDING_CACHE_TTL_DAYS,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            db: Firestore client
+            model_name: Embedding model name (part of every key)
+            collection: Firestore collection holding the entries
+            ttl_days: Lifetime of Firestore entries
+        """
+        self.db = db
+        self.model_name = model_name
+        self.collection = collection
+        self.ttl_days = ttl_days
+        self.memory_hits = 0
+        self.firestore_hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def make_key(self, text: str, user_id: str) -> str:
+        """Build a cache key from the user, whitespace-normalized text and model name."""
+        normalized = re.sub(r"\s+", " ", text).strip()
+        return hashlib.sha256(
+            f"{self.model_name}\x00{user_id}\x00{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Return cached vectors for the keys that are present.
+
+        Args:
+            keys: Distinct cache keys
+
+        Returns:
+            Mapping of key to vector for every hit
+        """
+        found = {}
+        missing = []
+        with _memory_lock:
+            for key in keys:
+                packed = _memory_entries.get(key)
+                if packed is None:
+                    missing.append(key)
+                else:
+                    _memory_entries.move_to_end(key)
+                    found[key] = array("f", packed).tolist()
+        memory_hits = len(found)
+
+        shared: Dict[str, bytes] = {}
+        if missing:
+            try:
+                shared = self._read_firestore(missing)
+            except Exception as e:
+                print(f"Warning: Embedding cache read failed: {e}")
+                shared = {}
+            self._store_memory(shared)
+            for key, packed in shared.items():
+                found[key] = array("f", packed).tolist()
+
+        # Batches of one document may be looked up concurrently
+        with self._stats_lock:
+            self.memory_hits += memory_hits
+            self.firestore_hits += len(shared)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(
+        self, entries: Dict[str, List[float]], user_id: str, document_id: str
+    ) -> None:
+        """
+        Store freshly computed vectors in memory and Firestore (best effort).
+
+        Args:
+            entries: Vectors by cache key (from make_key with user_id)
+            user_id: Owner of the texts
+            document_id: Document the texts came from (its deletion deletes them)
+        """
+        if not entries:
+            return
+        packed = {key: array("f", vector).tobytes() for key, vector in entries.items()}
+        self._store_memory(packed)
+
+        expires_at = datetime.now(timezone.utc) + timedelta(days=self.ttl_days)
+        items = list(packed.items())
+        try:
+            for start in range(0, len(items), CACHE_WRITE_BATCH):
+                batch = self.db.batch()
+                for key, vector in items[start : start + CACHE_WRITE_BATCH]:
+                    batch.set(
+                        self.db.collection(self.collection).document(key),
+                        {
+                            "vector": vector,
+                            "model": self.model_name,
+                            "user_id": user_id,
+                            "document_id": document_id,
+                            "expires_at": expires_at,
+                        },
+                    )
+                batch.commit()
+        except Exception as e:
+            print(f"Warning: Embedding cache write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for this cache instance."""
+        with self._stats_lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "firestore_hits": self.firestore_hits,
+                "misses": self.misses,
+            }
+
+    def _read_firestore(self, keys: List[str]) -> Dict[str, bytes]:
+        """Fetch packed vectors for keys with get_all round trips."""
+        found = {}
+        for start in range(0, len(keys), CACHE_READ_BATCH):
+            refs = [
+                self.db.collection(self.collection).document(key)
+                for key in keys[start : start + CACHE_READ_BATCH]
+            ]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    found[doc.id] = doc.to_dict()["vector"]
+        return found
+
+    @staticmethod
+    def _store_memory(entries: Dict[str, bytes]) -> None:
+        """Insert packed vectors into the memory front, evicting the oldest."""
+        with _memory_lock:
+            for key, packed in entries.items():
+                _memory_entries[key] = packed
+                _memory_entries.move_to_end(key)
+            while len(_memory_entries) > EMBEDDING_CACHE_MEMORY_ENTRIES:
+                _memory_entries.popitem(last=False)
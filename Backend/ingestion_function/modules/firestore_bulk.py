@@ -0,0 +1,90 @@
+"""Parallel Firestore writes with BulkWriter."""
+from typing import Any, Dict, Iterable, Optional, Tuple
+from dataclasses import dataclass, field
+import threading
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+# Ramp-up starts at Firestore's recommended 500 ops/s and grows 50% every
+# 5 minutes, up to the cap. Keep in sync with the query API's
+# app/repositories/firestore_repo.py.
+BULK_WRITE_INITIAL_OPS_PER_SECOND = 500
+BULK_WRITE_MAX_OPS_PER_SECOND = 10000
+
+# Writes failing with a transient gRPC status are retried (with BulkWriter's
+# backoff) up to this many attempts; any other error fails the write at once
+BULK_WRITE_MAX_ATTEMPTS = 5
+BULK_WRITE_RETRYABLE_CODES = frozenset(
+    {
+        4,  # DEADLINE_EXCEEDED
+        8,  # RESOURCE_EXHAUSTED
+        10,  # ABORTED
+        13,  # INTERNAL
+        14,  # UNAVAILABLE
+    }
+)
+
+# (operation, document reference, data): operation is "set", "update" or
+# "delete" (data is ignored for deletes)
+BulkOperation = Tuple[str, firestore.DocumentReference, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class BulkWriteResult:
+    """Outcome of a bulk write."""
+
+    written: int = 0
+    # Document path -> error message of writes that failed for good
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+def bulk_write(db: firestore.Client, operations: Iterable[BulkOperation]) -> BulkWriteResult:
+    """
+    Apply writes through a BulkWriter (batches are flushed in parallel).
+
+    Args:
+        db: Firestore client
+        operations: Writes to apply; they are not atomic as a whole
+
+    Returns:
+        Counts of written documents and per-document failures
+    """
+    result = BulkWriteResult()
+    lock = threading.Lock()
+    bulk_writer = db.bulk_writer(
+        options=BulkWriterOptions(
+            initial_ops_per_second=BULK_WRITE_INITIAL_OPS_PER_SECOND,
+            max_ops_per_second=BULK_WRITE_MAX_OPS_PER_SECOND,
+        )
+    )
+
+    def on_result(reference, write_result, writer) -> None:
+        with lock:
+            result.written += 1
+
+    def on_error(failure, writer) -> bool:
+        if (
+            failure.code in BULK_WRITE_RETRYABLE_CODES
+            and failure.attempts < BULK_WRITE_MAX_ATTEMPTS
+        ):
+            return True
+        with lock:
+            result.failed[failure.operation.reference.path] = failure.message
+        return False
+
+    bulk_writer.on_write_result(on_result)
+    bulk_writer.on_write_error(on_error)
+
+    for operation, reference, data in operations:
+        if operation == "set":
+            bulk_writer.set(reference, data)
+        elif operation == "update":
+            bulk_writer.update(reference, data)
+        elif operation == "delete":
+            bulk_writer.delete(reference)
+        else:
+            raise ValueError(f"Unknown bulk write operation: {operation}")
+
+    bulk_writer.close()
+    return result
@@ -0,0 +1,114 @@
+"""Keyword (BM25) postings written alongside the vector index."""
+from typing import Dict, List
+import json
+import re
+import zlib
+
+from google.cloud import firestore
+
+# Tokenizer shared with the query API (app/utils/lexical.py). Keep the two in
+# sync: a query only matches terms produced the same way at ingestion.
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were with what which who how when my i me you your do does did".split()
+)
+
+# Chunks per postings segment (keeps each Firestore document well under 1 MiB)
+POSTINGS_SEGMENT_CHUNKS = 500
+POSTINGS_COLLECTION = "lexical_postings"
+POSTINGS_FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Compound tokens such as drug codes, lab names or ICD strings ("e11.9",
+    "covid-19", "hba1c") are kept whole and also contribute their parts, so
+    both "covid-19" and "covid" match.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(
+                part
+                for part in re.split(r"[.\-/]", token)
+                if part not in STOPWORDS and (len(part) > 1 or part.isdigit())
+            )
+    return [t for t in terms if len(t) > 1 or t.isdigit()]
+
+
+def encode_postings(chunk_ids: List[str], texts: List[str]) -> bytes:
+    """
+    Build a compressed postings segment for a group of chunks.
+
+    Layout (zlib-compressed JSON):
+        {"v": 1, "chunk_ids": [...], "lengths": [...],
+         "postings": {term: [chunk_index, tf, chunk_index, tf, ...]}}
+    """
+    lengths = []
+    postings: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        terms = tokenize(text)
+        lengths.append(len(terms))
+
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, tf in frequencies.items():
+            postings.setdefault(term, []).extend((index, tf))
+
+    payload = {
+        "v": POSTINGS_FORMAT_VERSION,
+        "chunk_ids": chunk_ids,
+        "lengths": lengths,
+        "postings": postings,
+    }
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+class LexicalIndexWriter:
+    """Writes per-document postings segments consumed by the query API."""
+
+    def __init__(self, project_id: str):
+        """Initialize Firestore client."""
+        self.db = firestore.Client(project=project_id)
+
+    def write_document(
+        self, user_id: str, document_id: str, chunk_ids: List[str], texts: List[str]
+    ) -> None:
+        """
+        Write postings for one document's chunks.
+
+        Args:
+            user_id: Owner of the document
+            document_id: Document ID
+            chunk_ids: Chunk IDs as saved to the chunks collection
+            texts: Chunk texts, parallel to chunk_ids
+        """
+        if not chunk_ids:
+            return
+
+        batch = self.db.batch()
+        total_bytes = 0
+        for segment, start in enumerate(range(0, len(chunk_ids), POSTINGS_SEGMENT_CHUNKS)):
+            end = start + POSTINGS_SEGMENT_CHUNKS
+            blob = encode_postings(chunk_ids[start:end], texts[start:end])
+            total_bytes += len(blob)
+            batch.set(
+                self.db.collection(POSTINGS_COLLECTION).document(f"{document_id}-{segment}"),
+                {
+                    "user_id": user_id,
+                    "document_id": document_id,
+                    "segment": segment,
+                    "chunk_count": len(chunk_ids[start:end]),
+                    "postings": blob,
+                    "created_at": firestore.SERVER_TIMESTAMP,
+                },
+            )
+        batch.commit()
+        print(f"✓ Saved keyword postings for {len(chunk_ids)} chunks ({total_bytes} bytes)")
@@ -0,0 +1,109 @@
+"""Per-stage ingestion progress on the document record."""
+from typing import Any, Dict
+import threading
+import time
+
+from google.cloud import firestore
+
+# Counter updates are coalesced into at most one write per interval
+# (Firestore sustains about one write per second to a single document)
+PROGRESS_MIN_WRITE_INTERVAL_SECONDS = 2.0
+
+# progress.stage values, in order; "failed" can follow any of them
+STAGE_OCR = "ocr"
+STAGE_INDEXING = "indexing"
+STAGE_COMPLETED = "completed"
+STAGE_FAILED = "failed"
+
+
+class IngestionProgress:
+    """
+    Writes ingestion progress to the ``progress`` map of a document.
+
+    Fields: ``stage``, ``ocr_done``, ``chunks_persisted``,
+    ``vectors_upserted`` and ``vectors_total`` (set once chunking has
+    finished). Stage changes are written at once; counters are thread-safe
+    and throttled. Progress is informational, so write failures are logged
+    and never fail the ingestion.
+    """
+
+    def __init__(
+        self,
+        doc_ref: firestore.DocumentReference,
+        min_interval_seconds: float = PROGRESS_MIN_WRITE_INTERVAL_SECONDS,
+    ):
+        """
+        Initialize progress reporter.
+
+        Args:
+            doc_ref: The document's Firestore record
+            min_interval_seconds: Minimum time between counter writes
+        """
+        self.doc_ref = doc_ref
+        self.min_interval_seconds = min_interval_seconds
+        self.counters: Dict[str, int] = {"chunks_persisted": 0, "vectors_upserted": 0}
+        self._dirty = False
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Mark the document as processing, at the OCR stage."""
+        self._write(
+            {
+                "processing_status": "processing",
+                "progress": {
+                    "stage": STAGE_OCR,
+                    "ocr_done": False,
+                    "chunks_persisted": 0,
+                    "vectors_upserted": 0,
+                    "vectors_total": None,
+                },
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }
+        )
+
+    def set_stage(self, stage: str, **fields: Any) -> None:
+        """Write a stage change (and any extra progress fields) immediately."""
+        self._write(
+            {
+                "progress.stage": stage,
+                **{f"progress.{name}": value for name, value in fields.items()},
+            }
+        )
+
+    def increment(self, counter: str, amount: int) -> None:
+        """Add to a counter, writing all counters if the interval has passed."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+            self._dirty = True
+            if time.monotonic() - self._last_write < self.min_interval_seconds:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Write pending counter changes."""
+        with self._lock:
+            if not self._dirty:
+                return
+            update = {f"progress.{name}": value for name, value in self.counters.items()}
+            self._dirty = False
+            self._last_write = time.monotonic()
+        self._write(update)
+
+    def fail(self, error: Exception) -> None:
+        """Mark the ingestion as failed, keeping how far it got."""
+        self.flush()
+        self._write(
+            {
+                "processing_status": "failed",
+                "progress.stage": STAGE_FAILED,
+                "progress.error": str(error)[:500],
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }
+        )
+
+    def _write(self, update: Dict[str, Any]) -> None:
+        try:
+            self.doc_ref.update(update)
+        except Exception as e:
+            print(f"Warning: Could not write ingestion progress: {e}")
@@ -7,6 +7,8 @@ rather than arbitrary token boundaries.
 from typing import Dict, Any, List, Optional
 import re
 
+from .docai_access import DocNode, get_field
+
 
 class SemanticChunker:
     """Handles semantic, structure-aware document chunking."""
@@ -16,16 +18,16 @@ class SemanticChunker:
 
     @staticmethod
     def extract_text_from_text_anchor(
-        text_anchor: Dict[str, Any], full_text: str
+        text_anchor: Optional[DocNode], full_text: str
     ) -> str:
         """Extract text from a text anchor reference."""
         if not text_anchor:
             return ""
 
         segments = []
-        for segment in text_anchor.get("textSegments", []):
-            start = int(segment.get("startIndex", 0))
-            end = int(segment.get("endIndex", 0))
+        for segment in get_field(text_anchor, "text_segments", []):
+            start = int(get_field(segment, "start_index", 0))
+            end = int(get_field(segment, "end_index", 0))
             if start < len(full_text) and end <= len(full_text):
                 segments.append(full_text[start:end])
 
@@ -33,34 +35,33 @@ class SemanticChunker:
 
     @classmethod
     def extract_semantic_chunks(
-        cls, layout_json: Dict[str, Any], form_json: Dict[str, Any]
+        cls, layout_json: DocNode, form_json: DocNode
     ) -> List[Dict[str, Any]]:
         """
         Extract chunks based on Document AI's semantic structure.
 
         Args:
-            layout_json: Layout parser output
-            form_json: Form parser output
+            layout_json: Layout parser output (Document proto or JSON dict)
+            form_json: Form parser output (Document proto or JSON dict)
 
         Returns:
             List of semantic chunk dicts with text, type, metadata
         """
         chunks = []
-        full_text = layout_json.get("text", "")
+        full_text = get_field(layout_json, "text", "")
 
         # 1. Extract chunks from document layout blocks
-        doc_layout = layout_json.get("documentLayout", {})
-        if doc_layout and "blocks" in doc_layout:
+        doc_layout = get_field(layout_json, "document_layout")
+        blocks = get_field(doc_layout, "blocks")
+        if blocks is not None:
             chunks.extend(
-                cls._extract_from_layout_blocks(
-                    doc_layout["blocks"], full_text, layout_json
-                )
+                cls._extract_from_layout_blocks(blocks, full_text, layout_json)
             )
 
         # 2. Extract chunks from pages (paragraphs, tables)
-        pages = layout_json.get("pages", [])
+        pages = get_field(layout_json, "pages", [])
         for page_idx, page in enumerate(pages):
-            page_number = page.get("pageNumber", page_idx + 1)
+            page_number = get_field(page, "page_number", page_idx + 1)
 
             # Extract paragraphs
             chunks.extend(
@@ -90,39 +91,39 @@ class SemanticChunker:
 
     @classmethod
     def _extract_from_layout_blocks(
-        cls, blocks: List[Dict[str, Any]], full_text: str, layout_json: Dict[str, Any]
+        cls, blocks: List[DocNode], full_text: str, layout_json: DocNode
     ) -> List[Dict[str, Any]]:
         """Extract chunks from documentLayout blocks (recursive)."""
         chunks = []
 
         for block in blocks:
+            text_block = get_field(block, "text_block")
+            table_block = get_field(block, "table_block")
+
             # Text block (paragraph, heading, etc.)
-            if "textBlock" in block:
-                text_block = block["textBlock"]
-                text = text_block.get("text", "")
+            if text_block is not None:
+                text = get_field(text_block, "text", "")
 
                 if text.strip():
-                    chunk_type = text_block.get("type", "paragraph")
+                    chunk_type = get_field(text_block, "type", "paragraph")
                     chunks.append(
                         {
                             "text": text.strip(),
                             "type": "text_block",
                             "semantic_label": chunk_type,
-                            "confidence": block.get("confidence", 1.0),
+                            "confidence": get_field(block, "confidence", 1.0),
                         }
                     )
 
                 # Recursively process nested blocks
-                if "blocks" in text_block:
+                nested = get_field(text_block, "blocks")
+                if nested is not None:
                     chunks.extend(
-                        cls._extract_from_layout_blocks(
-                            text_block["blocks"], full_text, layout_json
-                        )
+                        cls._extract_from_layout_blocks(nested, full_text, layout_json)
                     )
 
             # Table block
-            elif "tableBlock" in block:
-                table_block = block["tableBlock"]
+            elif table_block is not None:
                 table_text = cls._convert_table_to_text(table_block, full_text)
 
                 if table_text.strip():
@@ -131,7 +132,7 @@ class SemanticChunker:
                             "text": table_text.strip(),
                             "type": "table",
                             "semantic_label": "table",
-                            "confidence": block.get("confidence", 1.0),
+                            "confidence": get_field(block, "confidence", 1.0),
                         }
                     )
 
@@ -139,14 +140,14 @@ class SemanticChunker:
 
     @classmethod
     def _extract_paragraphs(
-        cls, page: Dict[str, Any], full_text: str, page_number: int
+        cls, page: DocNode, full_text: str, page_number: int
     ) -> List[Dict[str, Any]]:
         """Extract paragraph chunks from page."""
         chunks = []
 
-        for para in page.get("paragraphs", []):
-            layout = para.get("layout", {})
-            text_anchor = layout.get("textAnchor", {})
+        for para in get_field(page, "paragraphs", []):
+            layout = get_field(para, "layout")
+            text_anchor = get_field(layout, "text_anchor")
 
             text = cls.extract_text_from_text_anchor(text_anchor, full_text)
 
@@ -157,7 +158,7 @@ class SemanticChunker:
                         "type": "paragraph",
                         "semantic_label": "paragraph",
                         "page": page_number,
-                        "confidence": layout.get("confidence", 1.0),
+                        "confidence": get_field(layout, "confidence", 1.0),
                     }
                 )
 
@@ -165,12 +166,12 @@ class SemanticChunker:
 
     @classmethod
     def _extract_tables(
-        cls, page: Dict[str, Any], full_text: str, page_number: int
+        cls, page: DocNode, full_text: str, page_number: int
     ) -> List[Dict[str, Any]]:
         """Extract table chunks from page."""
         chunks = []
 
-        for table in page.get("tables", []):
+        for table in get_field(page, "tables", []):
             table_text = cls._convert_table_to_markdown(table, full_text)
 
             if table_text.strip():
@@ -187,18 +188,17 @@ class SemanticChunker:
 
     @classmethod
     def _convert_table_to_markdown(
-        cls, table: Dict[str, Any], full_text: str
+        cls, table: DocNode, full_text: str
     ) -> str:
         """Convert Document AI table structure to markdown format."""
         lines = []
 
         # Process header rows
-        header_rows = table.get("headerRows", [])
+        header_rows = get_field(table, "header_rows", [])
         for row in header_rows:
             cells = []
-            for cell in row.get("cells", []):
-                layout = cell.get("layout", {})
-                text_anchor = layout.get("textAnchor", {})
+            for cell in get_field(row, "cells", []):
+                text_anchor = get_field(get_field(cell, "layout"), "text_anchor")
                 cell_text = cls.extract_text_from_text_anchor(text_anchor, full_text)
                 cells.append(cell_text.strip() or " ")
 
@@ -207,12 +207,11 @@ class SemanticChunker:
                 lines.append("| " + " | ".join(["---"] * len(cells)) + " |")
 
         # Process body rows
-        body_rows = table.get("bodyRows", [])
+        body_rows = get_field(table, "body_rows", [])
         for row in body_rows:
             cells = []
-            for cell in row.get("cells", []):
-                layout = cell.get("layout", {})
-                text_anchor = layout.get("textAnchor", {})
+            for cell in get_field(row, "cells", []):
+                text_anchor = get_field(get_field(cell, "layout"), "text_anchor")
                 cell_text = cls.extract_text_from_text_anchor(text_anchor, full_text)
                 cells.append(cell_text.strip() or " ")
 
@@ -223,19 +222,19 @@ class SemanticChunker:
 
     @classmethod
     def _convert_table_to_text(
-        cls, table_block: Dict[str, Any], full_text: str
+        cls, table_block: DocNode, full_text: str
     ) -> str:
         """Convert table block to readable text format."""
         lines = []
 
         # Process header rows
-        for row in table_block.get("headerRows", []):
+        for row in get_field(table_block, "header_rows", []):
             row_text = cls._extract_table_row_text(row, full_text)
             if row_text:
                 lines.append(f"Header: {row_text}")
 
         # Process body rows
-        for row in table_block.get("bodyRows", []):
+        for row in get_field(table_block, "body_rows", []):
             row_text = cls._extract_table_row_text(row, full_text)
             if row_text:
                 lines.append(row_text)
@@ -244,18 +243,18 @@ class SemanticChunker:
 
     @classmethod
     def _extract_table_row_text(
-        cls, row: Dict[str, Any], full_text: str
+        cls, row: DocNode, full_text: str
     ) -> str:
         """Extract text from a table row."""
         cells = []
-        for cell in row.get("cells", []):
+        for cell in get_field(row, "cells", []):
             # Check if cell has blocks (nested structure)
-            if "blocks" in cell:
-                cell_text = cls._extract_text_from_blocks(cell["blocks"], full_text)
+            blocks = get_field(cell, "blocks")
+            if blocks is not None:
+                cell_text = cls._extract_text_from_blocks(blocks, full_text)
             else:
                 # Extract from layout
-                layout = cell.get("layout", {})
-                text_anchor = layout.get("textAnchor", {})
+                text_anchor = get_field(get_field(cell, "layout"), "text_anchor")
                 cell_text = cls.extract_text_from_text_anchor(text_anchor, full_text)
 
             if cell_text.strip():
@@ -265,33 +264,34 @@ class SemanticChunker:
 
     @classmethod
     def _extract_text_from_blocks(
-        cls, blocks: List[Dict[str, Any]], full_text: str
+        cls, blocks: List[DocNode], full_text: str
     ) -> str:
         """Extract text from nested blocks."""
         texts = []
         for block in blocks:
-            if "textBlock" in block:
-                text = block["textBlock"].get("text", "")
+            text_block = get_field(block, "text_block")
+            if text_block is not None:
+                text = get_field(text_block, "text", "")
                 if text.strip():
                     texts.append(text.strip())
         return " ".join(texts)
 
     @classmethod
-    def _extract_form_fields(cls, form_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _extract_form_fields(cls, form_json: DocNode) -> List[Dict[str, Any]]:
         """Extract form fields as key-value pair chunks."""
         chunks = []
-        full_text = form_json.get("text", "")
+        full_text = get_field(form_json, "text", "")
 
-        for page in form_json.get("pages", []):
-            page_number = page.get("pageNumber", 0)
+        for page in get_field(form_json, "pages", []):
+            page_number = get_field(page, "page_number", 0)
 
-            for field in page.get("formFields", []):
-                field_name = field.get("fieldName", {})
-                field_value = field.get("fieldValue", {})
+            for field in get_field(page, "form_fields", []):
+                field_name = get_field(field, "field_name")
+                field_value = get_field(field, "field_value")
 
                 # Extract key and value text
-                key_anchor = field_name.get("textAnchor", {})
-                value_anchor = field_value.get("textAnchor", {})
+                key_anchor = get_field(field_name, "text_anchor")
+                value_anchor = get_field(field_value, "text_anchor")
 
                 key = cls.extract_text_from_text_anchor(key_anchor, full_text)
                 value = cls.extract_text_from_text_anchor(value_anchor, full_text)
@@ -311,7 +311,7 @@ class SemanticChunker:
                             "type": "form_field",
                             "semantic_label": "key_value_pair",
                             "page": page_number,
-                            "confidence": field_name.get("confidence", 1.0),
+                            "confidence": get_field(field_name, "confidence", 1.0),
                         }
                     )
 
@@ -0,0 +1,366 @@
+"""Map-reduce summarization of ingested documents."""
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import hashlib
+
+from google.api_core import exceptions as core_exceptions
+from google.api_core.retry import Retry, if_exception_type
+from google.cloud import firestore
+
+from .chunking import get_encoding
+
+SUMMARY_MODEL_NAME = "gemini-2.0-flash-exp"
+
+# Documents up to this many tokens are summarized in a single call, as
+# before; longer ones are split into sections that are summarized
+# independently (map) and then combined (reduce)
+SUMMARY_SINGLE_PASS_MAX_TOKENS = 6000
+
+# Section boundaries are content-defined: a section may close after a chunk
+# whose text hash is divisible by SUMMARY_SECTION_BOUNDARY_DIVISOR once it
+# holds SUMMARY_SECTION_MIN_TOKENS, and must close before exceeding
+# SUMMARY_SECTION_MAX_TOKENS. Editing one chunk therefore only moves the
+# boundaries of its own section (and at most the next), so the other
+# sections' cached notes stay valid.
+SUMMARY_SECTION_MIN_TOKENS = 2000
+SUMMARY_SECTION_MAX_TOKENS = 6000
+SUMMARY_SECTION_BOUNDARY_DIVISOR = 4
+
+# Section notes fed to the reduce call are capped; beyond this they are
+# condensed by another map pass over the notes themselves
+SUMMARY_REDUCE_MAX_TOKENS = 24000
+
+# Section summaries generated at once
+SUMMARY_CONCURRENCY = 4
+
+# Quota and transient errors are retried with exponential backoff, up to this
+# total time per call
+SUMMARY_RETRY_BUDGET_SECONDS = 300.0
+SUMMARY_RETRYABLE_ERRORS = (
+    core_exceptions.ResourceExhausted,
+    core_exceptions.ServiceUnavailable,
+    core_exceptions.DeadlineExceeded,
+    core_exceptions.InternalServerError,
+)
+
+# Section notes (PHI) are cached per document, in the documents/{id}
+# subcollection below (deleted with the document), keyed by
+# hash(model + prompt version + section text). Bump SECTION_PROMPT_VERSION
+# whenever SECTION_PROMPT changes.
+SECTION_CACHE_COLLECTION = "summary_sections"
+SECTION_CACHE_TTL_DAYS = 90
+SECTION_PROMPT_VERSION = "1"
+
+# Firestore limits: keys per get_all round trip, writes per batch
+CACHE_READ_BATCH = 300
+CACHE_WRITE_BATCH = 500
+
+SECTION_PROMPT = """You are extracting facts from one section of a longer medical document. Another step will combine the notes from all sections into a patient-friendly summary.
+
+Write concise markdown notes that capture EVERY clinically relevant fact in this section, grouped under whichever of these headings apply (omit headings with nothing to report):
+Patient Information, Reason for Visit, Previous Health Problems, Current Medications, Allergies, Symptoms, Vital Signs, Physical Exam, Tests & Results, Diagnosis, Treatment, Follow-up.
+
+- Keep exact values, units, reference ranges, dates, doses and names
+- Mark abnormal or critical results as **IMPORTANT**
+- Do not explain or simplify terms yet, and do not add information that is not in the section
+
+**SECTION {index} OF {count}:**
+{content}"""
+
+SUMMARY_PROMPT = """You are a medical document summarizer. Create a comprehensive summary that explains medical information in VERY SIMPLE, CLEAR language that anyone can understand - as if explaining to someone with no medical knowledge.
+
+**CRITICAL REQUIREMENTS:**
+1. **Explain ALL medical jargon** - Never use medical terms without immediately explaining them in plain English
+2. Use VERY SIMPLE language - write as if talking to a friend
+3. Keep the summary up to 2000 tokens (approximately 1500 words)
+4. Use markdown formatting with headers, bullet points, and bold for highlights
+5. Include ALL important information from the document
+6. Be STRAIGHT TO THE POINT - no complex sentences
+
+**STRUCTURE YOUR SUMMARY:**
+
+# Brief Summary
+[In 2-3 SIMPLE sentences, explain what this medical document is about and the main points. Use everyday language.]
+
+# Patient Information
+- **Name:** [if available]
+- **Age/DOB:** [if available]
+- **Gender:** [if available]
+- **ID Number:** [if available]
+
+# Why They Went to the Doctor
+[Explain in simple words what problem or symptoms brought them to the hospital/clinic]
+
+# Medical Background
+## Previous Health Problems
+- [List conditions in plain English. For example: "High blood pressure (when blood pushes too hard against artery walls)" or "Diabetes (body can't properly control blood sugar levels)"]
+
+## Current Medications
+- [List medications and explain what they do. For example: "Metformin (helps lower blood sugar)" or "Lisinopril (lowers blood pressure)"]
+
+## Allergies
+- [List any allergies and reactions in simple terms]
+
+# This Visit
+## What They Were Experiencing
+- [Describe symptoms in everyday language. Instead of "dyspnea", say "trouble breathing" or "shortness of breath"]
+
+## What the Doctor Found
+- **Vital Signs:** [Explain what these numbers mean. For example: "Blood pressure 140/90 (a bit high, normal is around 120/80)"]
+- **Physical Exam:** [Describe findings in plain English]
+
+## Tests Done & Results
+- [Explain tests and results simply. For example: "Blood sugar test: 180 mg/dL (higher than normal, which is 70-100)" or "X-ray showed fluid in lungs (meaning lungs had extra water in them)"]
+- **IMPORTANT RESULTS** in bold with explanations
+
+## What's Wrong (Diagnosis)
+- [Explain conditions in simple terms. For example: instead of "acute myocardial infarction", say "heart attack (when blood flow to the heart is blocked)"]
+
+## Treatment & What They Did
+- [Describe treatments clearly. For example: "Started on antibiotics (medicine to kill bacteria causing infection)" or "Given IV fluids (water and minerals through a tube into the vein)"]
+
+# Most Important Things to Know
+[List the critical points in simple bullet points - things that really matter for the patient to understand]
+
+# What Happens Next
+[Explain follow-up care, instructions, or next appointments in clear, simple language]
+
+---
+
+**{content_label}:**
+{content}
+
+---
+
+**REMEMBER: Explain EVERY medical term you use. Be as simple and clear as possible. Imagine explaining to someone who knows nothing about medicine.**"""
+
+
+class DocumentSummarizer:
+    """
+    Summarizes documents of any length with Gemini.
+
+    Short documents are summarized in one call. Long ones are split into
+    token-budgeted sections whose notes are generated in parallel (map) and
+    then combined into the patient-facing markdown summary (reduce), so no
+    part of the document is dropped. Section notes are cached under the
+    document by content hash: regenerating its summary only re-runs changed
+    sections.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        db: Optional[firestore.Client] = None,
+        model_name: str = SUMMARY_MODEL_NAME,
+    ):
+        """
+        Initialize summarizer.
+
+        Args:
+            project_id: GCP project ID
+            db: Firestore client for the section cache (created if not given)
+            model_name: Gemini model name
+        """
+        from vertexai.generative_models import GenerationConfig, GenerativeModel
+
+        self.db = db or firestore.Client(project=project_id)
+        self.model_name = model_name
+        self.section_model = GenerativeModel(
+            model_name,
+            generation_config=GenerationConfig(max_output_tokens=1024, temperature=0.1),
+        )
+        self.summary_model = GenerativeModel(
+            model_name,
+            generation_config=GenerationConfig(
+                max_output_tokens=2048,  # Allow full 2000 token summary
+                temperature=0.3,  # Lower temperature for more factual, structured output
+            ),
+        )
+        self.cache_hits = 0
+        self.sections_generated = 0
+
+    def summarize(self, texts: List[str], document_id: str) -> str:
+        """
+        Summarize a document.
+
+        Args:
+            texts: Chunk texts, in document order
+            document_id: Document whose section cache is used
+
+        Returns:
+            Markdown summary
+
+        Raises:
+            Exception: If a model call still fails after retries
+        """
+        counts = [self.count_tokens(text) for text in texts]
+        if sum(counts) <= SUMMARY_SINGLE_PASS_MAX_TOKENS:
+            return self._generate(
+                self.summary_model,
+                SUMMARY_PROMPT.format(
+                    content_label="MEDICAL DOCUMENT", content="\n\n".join(texts)
+                ),
+            )
+
+        cache = self.db.collection("documents").document(document_id).collection(
+            SECTION_CACHE_COLLECTION
+        )
+        sections = self.split_sections(texts, counts)
+        notes = self._summarize_sections(sections, cache)
+        print(
+            f"✓ Summarized {len(sections)} sections "
+            f"({self.cache_hits} cached, {self.sections_generated} generated)"
+        )
+
+        # Condense the notes until they fit the reduce call
+        while len(notes) > 1 and sum(map(self.count_tokens, notes)) > SUMMARY_REDUCE_MAX_TOKENS:
+            notes = self._summarize_sections(self.split_sections(notes), cache)
+            print(f"Condensed section notes into {len(notes)} groups")
+
+        content = "\n\n".join(
+            f"## Section {i} of {len(notes)}\n{note}" for i, note in enumerate(notes, start=1)
+        )
+        return self._generate(
+            self.summary_model,
+            SUMMARY_PROMPT.format(
+                content_label="SECTION NOTES (in document order, from a longer medical document)",
+                content=content,
+            ),
+        )
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Count tokens in text (tiktoken approximation of the Gemini tokenizer)."""
+        return len(get_encoding().encode(text))
+
+    @classmethod
+    def split_sections(
+        cls, texts: List[str], token_counts: Optional[List[int]] = None
+    ) -> List[str]:
+        """
+        Group consecutive texts into token-budgeted sections.
+
+        Args:
+            texts: Chunk texts, in document order
+            token_counts: Token count of each text (computed if not given)
+
+        Returns:
+            Section texts, in document order
+        """
+        if token_counts is None:
+            token_counts = [cls.count_tokens(text) for text in texts]
+
+        sections = []
+        current: List[str] = []
+        current_tokens = 0
+        for text, tokens in zip(texts, token_counts):
+            if current and current_tokens + tokens > SUMMARY_SECTION_MAX_TOKENS:
+                sections.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+            if current_tokens >= SUMMARY_SECTION_MIN_TOKENS and cls._is_boundary(text):
+                sections.append("\n\n".join(current))
+                current, current_tokens = [], 0
+        if current:
+            sections.append("\n\n".join(current))
+        return sections
+
+    @staticmethod
+    def _is_boundary(text: str) -> bool:
+        """Content-defined section boundary after this text."""
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") % SUMMARY_SECTION_BOUNDARY_DIVISOR == 0
+
+    def make_key(self, section: str) -> str:
+        """Build a section cache key from the model, prompt version and text."""
+        return hashlib.sha256(
+            f"{self.model_name}\x00{SECTION_PROMPT_VERSION}\x00{section}".encode("utf-8")
+        ).hexdigest()
+
+    def _summarize_sections(
+        self, sections: List[str], cache: firestore.CollectionReference
+    ) -> List[str]:
+        """Return notes for each section, generating only misses in the cache collection."""
+        keys = [self.make_key(section) for section in sections]
+        notes = self._read_cache(cache, list(dict.fromkeys(keys)))
+        self.cache_hits += sum(1 for key in keys if key in notes)
+
+        missing = {}
+        for i, (key, section) in enumerate(zip(keys, sections), start=1):
+            if key not in notes and key not in missing:
+                missing[key] = SECTION_PROMPT.format(
+                    index=i, count=len(sections), content=section
+                )
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as executor:
+                generated = dict(
+                    zip(
+                        missing,
+                        executor.map(
+                            lambda prompt: self._generate(self.section_model, prompt),
+                            missing.values(),
+                        ),
+                    )
+                )
+            self.sections_generated += len(generated)
+            self._write_cache(cache, generated)
+            notes.update(generated)
+
+        return [notes[key] for key in keys]
+
+    def _generate(self, model, prompt: str) -> str:
+        """Run one generation, backing off on quota and transient errors."""
+
+        def on_retry(error: Exception) -> None:
+            print(f"Summary request failed ({error}), retrying")
+
+        retry = Retry(
+            predicate=if_exception_type(*SUMMARY_RETRYABLE_ERRORS),
+            initial=2.0,
+            maximum=60.0,
+            multiplier=2.0,
+            timeout=SUMMARY_RETRY_BUDGET_SECONDS,
+            on_error=on_retry,
+        )
+        response = retry(model.generate_content)(prompt)
+        return response.text.strip()
+
+    def _read_cache(
+        self, cache: firestore.CollectionReference, keys: List[str]
+    ) -> Dict[str, str]:
+        """Fetch cached section notes (failures count as misses)."""
+        found = {}
+        try:
+            for start in range(0, len(keys), CACHE_READ_BATCH):
+                refs = [cache.document(key) for key in keys[start : start + CACHE_READ_BATCH]]
+                for doc in self.db.get_all(refs):
+                    if doc.exists:
+                        found[doc.id] = doc.to_dict()["notes"]
+        except Exception as e:
+            print(f"Warning: Summary section cache read failed: {e}")
+        return found
+
+    def _write_cache(
+        self, cache: firestore.CollectionReference, entries: Dict[str, str]
+    ) -> None:
+        """Store section notes (best effort)."""
+        expires_at = datetime.now(timezone.utc) + timedelta(days=SECTION_CACHE_TTL_DAYS)
+        items = list(entries.items())
+        try:
+            for start in range(0, len(items), CACHE_WRITE_BATCH):
+                batch = self.db.batch()
+                for key, notes in items[start : start + CACHE_WRITE_BATCH]:
+                    batch.set(
+                        cache.document(key),
+                        {
+                            "notes": notes,
+                            "model": self.model_name,
+                            "expires_at": expires_at,
+                        },
+                    )
+                batch.commit()
+        except Exception as e:
+            print(f"Warning: Summary section cache write failed: {e}")
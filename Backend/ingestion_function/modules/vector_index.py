@@ -1,14 +1,71 @@
 """Vector index upload operations."""
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 import uuid
 from dataclasses import dataclass
 
+from google.api_core import exceptions as core_exceptions
+from google.api_core.retry import Retry, if_exception_type
 from google.cloud import aiplatform, firestore
 from google.cloud.aiplatform_v1.services.index_service import IndexServiceClient
 from google.cloud.aiplatform_v1.types import IndexDatapoint, UpsertDatapointsRequest
 from vertexai.language_models import TextEmbeddingModel
 
+from .chunking import get_encoding
+from .embedding_cache import EmbeddingCache
+from .firestore_bulk import bulk_write
+from .progress import STAGE_INDEXING, IngestionProgress
+
+EMBEDDING_MODEL_NAME = "text-embedding-004"
+
+# Per-request limits of text-embedding-004: 250 inputs and 20,000 tokens,
+# each input truncated at 2,048 tokens. Token counts come from tiktoken, which
+# only approximates the Vertex tokenizer, so the token budget keeps headroom.
+EMBEDDING_MAX_TEXTS_PER_CALL = 250
+EMBEDDING_MAX_TOKENS_PER_CALL = 16000
+EMBEDDING_MAX_TOKENS_PER_TEXT = 2048
+
+# get_embeddings calls in flight at once
+EMBEDDING_CONCURRENCY = 4
+
+# Quota and transient errors are retried with exponential backoff, up to this
+# total time per batch; anything else fails the ingestion
+EMBEDDING_RETRY_BUDGET_SECONDS = 300.0
+EMBEDDING_RETRYABLE_ERRORS = (
+    core_exceptions.ResourceExhausted,
+    core_exceptions.ServiceUnavailable,
+    core_exceptions.DeadlineExceeded,
+    core_exceptions.InternalServerError,
+)
+
+# Streaming pipeline: chunks are grouped into embedding-call-sized batches
+# that move through embed -> Firestore save -> vector upsert independently,
+# so the stages overlap. At most PIPELINE_MAX_IN_FLIGHT_BATCHES are in flight
+# (the chunk producer blocks beyond that, bounding memory); each stage also
+# has its own concurrency limit.
+PIPELINE_MAX_IN_FLIGHT_BATCHES = 8
+PIPELINE_WRITE_CONCURRENCY = 4
+
+# Datapoint upserts: requests are bounded by datapoint count and serialized
+# size (a 768-d datapoint with restricts is ~3.2 KB), sent concurrently, and
+# each retried independently on transient errors
+UPSERT_MAX_DATAPOINTS_PER_REQUEST = 500
+UPSERT_MAX_REQUEST_BYTES = 4 * 1024 * 1024
+UPSERT_CONCURRENCY = 4
+UPSERT_CALL_TIMEOUT_SECONDS = 60.0
+UPSERT_RETRY_BUDGET_SECONDS = 180.0
+UPSERT_RETRYABLE_ERRORS = EMBEDDING_RETRYABLE_ERRORS
+
+T = TypeVar("T")
+
+# Restrict namespaces used by the query API to scope searches to a tenant
+# (see app/repositories/vector_repo.py). Keep the two in sync.
+USER_ID_NAMESPACE = "user_id"
+DOCUMENT_ID_NAMESPACE = "document_id"
+
 
 @dataclass
 class Document:
@@ -18,6 +75,99 @@ class Document:
     metadata: Dict[str, Any]
 
 
+@dataclass
+class UpsertBatchResult:
+    """Outcome of one upsert request."""
+
+    datapoint_ids: List[str]
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the batch was upserted."""
+        return self.error is None
+
+
+# IndexServiceClient per API endpoint, reused across warm invocations
+_index_service_clients: Dict[str, IndexServiceClient] = {}
+
+
+def _get_index_service_client(region: str) -> IndexServiceClient:
+    """Get or create the IndexServiceClient for a region."""
+    api_endpoint = f"{region}-aiplatform.googleapis.com"
+    if api_endpoint not in _index_service_clients:
+        _index_service_clients[api_endpoint] = IndexServiceClient(
+            client_options={"api_endpoint": api_endpoint}
+        )
+    return _index_service_clients[api_endpoint]
+
+
+def build_restricts(
+    user_id: str, document_id: str
+) -> List[IndexDatapoint.Restriction]:
+    """Build the user_id/document_id restricts attached to every datapoint."""
+    return [
+        IndexDatapoint.Restriction(namespace=USER_ID_NAMESPACE, allow_list=[user_id]),
+        IndexDatapoint.Restriction(
+            namespace=DOCUMENT_ID_NAMESPACE, allow_list=[document_id]
+        ),
+    ]
+
+
+def count_embedding_tokens(text: str) -> int:
+    """Approximate a text's token count as billed against the per-call limit."""
+    return min(len(get_encoding().encode(text)), EMBEDDING_MAX_TOKENS_PER_TEXT)
+
+
+def pack_embedding_batches(
+    items: Iterable[T], token_count: Callable[[T], int]
+) -> Iterator[List[T]]:
+    """
+    Greedily pack items into embedding requests within the per-call limits.
+
+    Args:
+        items: Texts (or anything standing for one), consumed lazily
+        token_count: Token count of an item (capped per text)
+
+    Yields:
+        Batches of items, in order
+    """
+    current: List[T] = []
+    current_tokens = 0
+    for item in items:
+        tokens = token_count(item)
+        if current and (
+            len(current) >= EMBEDDING_MAX_TEXTS_PER_CALL
+            or current_tokens + tokens > EMBEDDING_MAX_TOKENS_PER_CALL
+        ):
+            yield current
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        yield current
+
+
+def pack_upsert_batches(datapoints: List[IndexDatapoint]) -> List[List[IndexDatapoint]]:
+    """Split datapoints into upsert requests within the count and size limits."""
+    batches: List[List[IndexDatapoint]] = []
+    current: List[IndexDatapoint] = []
+    current_bytes = 0
+    for datapoint in datapoints:
+        size = IndexDatapoint.pb(datapoint).ByteSize()
+        if current and (
+            len(current) >= UPSERT_MAX_DATAPOINTS_PER_REQUEST
+            or current_bytes + size > UPSERT_MAX_REQUEST_BYTES
+        ):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(datapoint)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
 class VectorIndexUploader:
     """Handles vector index upload operations."""
 
@@ -28,9 +178,10 @@ class VectorIndexUploader:
         self.index_id = index_id
         aiplatform.init(project=project_id, location=region)
         self.embedding_model = TextEmbeddingModel.from_pretrained(
-            "text-embedding-004"
+            EMBEDDING_MODEL_NAME
         )
         self.db = firestore.Client(project=project_id)
+        self.embedding_cache = EmbeddingCache(self.db, EMBEDDING_MODEL_NAME)
 
     def upsert_documents(
         self,
@@ -38,7 +189,6 @@ class VectorIndexUploader:
         user_id: str,
         document_id: str,
         gcs_path: str,
-        batch_size: int = 100,
     ) -> None:
         """
         Upload documents to vector index using streaming upsert.
@@ -48,65 +198,345 @@ class VectorIndexUploader:
             user_id: User ID
             document_id: Document ID
             gcs_path: GCS path of source document
-            batch_size: Batch size for processing
         """
         if not documents:
             print("No documents to upsert")
             return
+        self.upsert_stream(documents, user_id, document_id, gcs_path)
+
+    def upsert_stream(
+        self,
+        documents: Iterable[Document],
+        user_id: str,
+        document_id: str,
+        gcs_path: str,
+        progress: Optional[IngestionProgress] = None,
+    ) -> List[Document]:
+        """
+        Embed, save and upsert documents as a bounded, overlapping pipeline.
+
+        Documents are consumed lazily (pass a generator to overlap chunking
+        too) and grouped into embedding-call-sized batches. Each batch is
+        embedded, saved to Firestore and upserted to the index on its own,
+        so while one batch is being embedded earlier ones are being written.
+        End-to-end time approaches that of the slowest stage, and only the
+        in-flight batches' embeddings are held in memory.
+
+        Args:
+            documents: Documents to upload (chunk IDs are assigned here)
+            user_id: User ID
+            document_id: Document ID
+            gcs_path: GCS path of source document
+            progress: Receives chunks_persisted/vectors_upserted counts and
+                vectors_total once all documents have been consumed
 
-        print(f"Processing {len(documents)} documents for streaming index")
+        Returns:
+            The uploaded documents, with metadata["chunk_id"] set
 
-        # Save chunks to Firestore
-        self._save_chunks_to_firestore(documents, user_id, document_id, gcs_path)
+        Raises:
+            Exception: The first error of any stage (remaining batches are
+                not started), or RuntimeError if datapoints still fail to
+                upsert after one more pass
+        """
+        start = time.perf_counter()
+        restricts = build_restricts(user_id, document_id)
+        in_flight = threading.BoundedSemaphore(PIPELINE_MAX_IN_FLIGHT_BATCHES)
+        embed_slots = threading.Semaphore(EMBEDDING_CONCURRENCY)
+        write_slots = threading.Semaphore(PIPELINE_WRITE_CONCURRENCY)
+        stopped = threading.Event()
+        stats_lock = threading.Lock()
+        stage_seconds = {"embed": 0.0, "save": 0.0, "upsert": 0.0}
+        embedding_stats: Dict[str, int] = {}
+        cache_before = self.embedding_cache.stats()
 
-        # Get embeddings
-        texts = [doc.page_content for doc in documents]
-        all_embeddings = []
+        def timed(stage: str, since: float) -> None:
+            with stats_lock:
+                stage_seconds[stage] += time.perf_counter() - since
 
-        for i in range(0, len(texts), 200):
-            sub_batch = texts[i : i + 200]
-            print(f"Getting embeddings for {len(sub_batch)} texts")
-            embeddings_response = self.embedding_model.get_embeddings(sub_batch)
-            all_embeddings.extend([emb.values for emb in embeddings_response])
-            time.sleep(0.5)
+        def process(batch: List[Document]) -> List[IndexDatapoint]:
+            """Run one batch through all stages; return datapoints that failed to upsert."""
+            try:
+                with embed_slots:
+                    since = time.perf_counter()
+                    embeddings, batch_stats = self._embed_texts(
+                        [doc.page_content for doc in batch], user_id, document_id
+                    )
+                    timed("embed", since)
+                with stats_lock:
+                    for name, value in batch_stats.items():
+                        embedding_stats[name] = embedding_stats.get(name, 0) + value
 
-        # Create datapoints
-        datapoints = []
-        for doc, embedding in zip(documents, all_embeddings):
-            datapoint = IndexDatapoint(
-                datapoint_id=doc.metadata["chunk_id"], feature_vector=embedding
-            )
-            datapoints.append(datapoint)
+                # Datapoints are tagged so queries can be restricted to the tenant
+                datapoints = [
+                    IndexDatapoint(
+                        datapoint_id=doc.metadata["chunk_id"],
+                        feature_vector=embedding,
+                        restricts=restricts,
+                    )
+                    for doc, embedding in zip(batch, embeddings)
+                ]
+
+                with write_slots:
+                    # Chunks (with their embeddings, for the query API's local
+                    # exact-search backend) are saved before their vectors
+                    # become searchable
+                    since = time.perf_counter()
+                    self._save_chunks_to_firestore(
+                        batch, embeddings, user_id, document_id, gcs_path
+                    )
+                    timed("save", since)
+                    if progress:
+                        progress.increment("chunks_persisted", len(batch))
+                    since = time.perf_counter()
+                    results = self.upsert_datapoints(datapoints)
+                    timed("upsert", since)
+                if progress:
+                    progress.increment(
+                        "vectors_upserted",
+                        sum(len(result.datapoint_ids) for result in results if result.ok),
+                    )
+
+                failed_ids = {
+                    datapoint_id
+                    for result in results
+                    if not result.ok
+                    for datapoint_id in result.datapoint_ids
+                }
+                return [dp for dp in datapoints if dp.datapoint_id in failed_ids]
+            except Exception:
+                stopped.set()
+                raise
+            finally:
+                in_flight.release()
+
+        uploaded: List[Document] = []
+        futures = []
+        batches = pack_embedding_batches(
+            self._with_chunk_ids(documents),
+            lambda doc: count_embedding_tokens(doc.page_content),
+        )
+        with ThreadPoolExecutor(max_workers=PIPELINE_MAX_IN_FLIGHT_BATCHES) as executor:
+            for batch in batches:
+                in_flight.acquire()  # backpressure: wait for a batch to finish
+                if stopped.is_set():
+                    in_flight.release()
+                    break
+                futures.append(executor.submit(process, batch))
+                uploaded.extend(batch)
+            if progress and not stopped.is_set():
+                progress.set_stage(STAGE_INDEXING, vectors_total=len(uploaded))
+
+        retry_datapoints = []
+        for future in futures:
+            retry_datapoints.extend(future.result())
+
+        if not uploaded:
+            print("No documents to upsert")
+            return uploaded
 
-        print(f"Upserting {len(datapoints)} datapoints to streaming index")
+        # Each request has already been retried on transient errors; give
+        # the batches that still failed one more pass before giving up
+        if retry_datapoints:
+            print(f"Retrying {len(retry_datapoints)} datapoints from failed upsert batches")
+            results = self.upsert_datapoints(retry_datapoints)
+            failed = [result for result in results if not result.ok]
+            if progress:
+                progress.increment(
+                    "vectors_upserted",
+                    sum(len(result.datapoint_ids) for result in results if result.ok),
+                )
+            if failed:
+                failed_count = sum(len(result.datapoint_ids) for result in failed)
+                raise RuntimeError(
+                    f"{failed_count} of {len(uploaded)} datapoints could not be upserted: "
+                    f"{failed[0].error}"
+                )
 
-        # Use IndexServiceClient for streaming upsert
-        client = IndexServiceClient(
-            client_options={"api_endpoint": f"{self.region}-aiplatform.googleapis.com"}
+        self._log_embedding_stats(embedding_stats, cache_before)
+        elapsed = time.perf_counter() - start
+        print(
+            f"✓ Uploaded {len(uploaded)} chunks in {len(futures)} batches in {elapsed:.2f}s "
+            f"(stage time: embed {stage_seconds['embed']:.2f}s, "
+            f"save {stage_seconds['save']:.2f}s, upsert {stage_seconds['upsert']:.2f}s)"
         )
+        print(f"✓ Datapoints are immediately searchable")
+        return uploaded
+
+    @staticmethod
+    def _with_chunk_ids(documents: Iterable[Document]) -> Iterator[Document]:
+        """Assign each document its chunk ID (used by Firestore and the index)."""
+        for doc in documents:
+            doc.metadata.setdefault("chunk_id", str(uuid.uuid4()))
+            yield doc
+
+    def upsert_datapoints(self, datapoints: List[IndexDatapoint]) -> List[UpsertBatchResult]:
+        """
+        Streaming-upsert datapoints in size-bounded batches, concurrently.
+
+        Args:
+            datapoints: Datapoints to upsert
 
+        Returns:
+            One result per request; failed batches carry their error, so the
+            caller can resubmit just those datapoints
+        """
+        batches = pack_upsert_batches(datapoints)
+        with ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY) as executor:
+            results = list(executor.map(self._upsert_batch, batches))
+
+        failed = sum(1 for result in results if not result.ok)
+        print(f"Upserted {len(batches) - failed}/{len(batches)} batches")
+        return results
+
+    def _upsert_batch(self, datapoints: List[IndexDatapoint]) -> UpsertBatchResult:
+        """Send one upsert request, retrying transient errors."""
+        datapoint_ids = [datapoint.datapoint_id for datapoint in datapoints]
         index_name = (
             f"projects/{self.project_id}/locations/{self.region}/indexes/{self.index_id}"
         )
 
+        def on_retry(error: Exception) -> None:
+            print(f"Upsert of {len(datapoints)} datapoints failed ({error}), retrying")
+
         # Streaming upsert (works because index has STREAM_UPDATE enabled)
-        request = UpsertDatapointsRequest(index=index_name, datapoints=datapoints)
+        try:
+            _get_index_service_client(self.region).upsert_datapoints(
+                request=UpsertDatapointsRequest(index=index_name, datapoints=datapoints),
+                timeout=UPSERT_CALL_TIMEOUT_SECONDS,
+                retry=Retry(
+                    predicate=if_exception_type(*UPSERT_RETRYABLE_ERRORS),
+                    initial=1.0,
+                    maximum=30.0,
+                    multiplier=2.0,
+                    timeout=UPSERT_RETRY_BUDGET_SECONDS,
+                    on_error=on_retry,
+                ),
+            )
+        except Exception as e:
+            print(f"ERROR: Upsert of {len(datapoints)} datapoints failed: {e}")
+            return UpsertBatchResult(datapoint_ids=datapoint_ids, error=e)
+        return UpsertBatchResult(datapoint_ids=datapoint_ids)
 
-        response = client.upsert_datapoints(request=request)
-        print(f"✓ Successfully uploaded {len(datapoints)} datapoints")
-        print(f"✓ Datapoints are immediately searchable")
-        print(f"✓ Completed processing {len(documents)} documents")
+    def _embed_texts(
+        self, texts: List[str], user_id: str, document_id: str
+    ) -> Tuple[List[List[float]], Dict[str, int]]:
+        """
+        Embed texts, sending only embedding-cache misses to the model.
+
+        Args:
+            texts: Chunk texts
+            user_id: Owner of the texts (the cache is per user)
+            document_id: Document the texts belong to
+
+        Returns:
+            One embedding per text, in order, and counters for
+            _log_embedding_stats (texts, reused, repeated, calls_made,
+            calls_without_cache)
+        """
+        cache = self.embedding_cache
+        keys = [cache.make_key(text, user_id) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        embeddings = cache.get_many(unique_keys)
+
+        # One model input per distinct missing key
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in embeddings and key not in missing:
+                missing[key] = text
+
+        token_counts = {key: count_embedding_tokens(text) for key, text in zip(keys, texts)}
+        batches = list(pack_embedding_batches(missing, token_counts.__getitem__))
+
+        computed = {}
+        if batches:
+            with ThreadPoolExecutor(max_workers=EMBEDDING_CONCURRENCY) as executor:
+                responses = executor.map(
+                    lambda batch: self._get_embeddings([missing[key] for key in batch]),
+                    batches,
+                )
+                for batch, vectors in zip(batches, responses):
+                    computed.update(zip(batch, vectors))
+
+        cache.set_many(computed, user_id, document_id)
+        embeddings.update(computed)
+
+        stats = {
+            "texts": len(texts),
+            "reused": len(texts) - len(missing),
+            "repeated": len(keys) - len(unique_keys),
+            "calls_made": len(batches),
+            "calls_without_cache": sum(
+                1 for _ in pack_embedding_batches(keys, token_counts.__getitem__)
+            ),
+        }
+        return [embeddings[key] for key in keys], stats
+
+    def _log_embedding_stats(
+        self, stats: Dict[str, int], cache_before: Dict[str, int]
+    ) -> None:
+        """
+        Print one summary of embedding cache effectiveness for a document.
+
+        Args:
+            stats: Summed _embed_texts counters
+            cache_before: Embedding cache stats() taken before the first batch
+        """
+        if not stats.get("texts"):
+            return
+        after = self.embedding_cache.stats()
+        avoided = stats["calls_without_cache"] - stats["calls_made"]
+        print(
+            f"✓ Embedding cache: {stats['reused']}/{stats['texts']} texts reused "
+            f"({stats['reused'] / stats['texts']:.0%} hit rate: "
+            f"{after['memory_hits'] - cache_before['memory_hits']} memory, "
+            f"{after['firestore_hits'] - cache_before['firestore_hits']} Firestore, "
+            f"{stats['repeated']} repeated within a batch); "
+            f"{avoided} of {stats['calls_without_cache']} embedding calls avoided"
+        )
+
+    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed one packed batch, backing off on quota and transient errors."""
+
+        def on_retry(error: Exception) -> None:
+            print(f"Embedding request for {len(texts)} texts failed ({error}), retrying")
+
+        retry = Retry(
+            predicate=if_exception_type(*EMBEDDING_RETRYABLE_ERRORS),
+            initial=1.0,
+            maximum=60.0,
+            multiplier=2.0,
+            timeout=EMBEDDING_RETRY_BUDGET_SECONDS,
+            on_error=on_retry,
+        )
+        response = retry(self.embedding_model.get_embeddings)(texts)
+        return [embedding.values for embedding in response]
 
     def _save_chunks_to_firestore(
-        self, documents: List[Document], user_id: str, document_id: str, gcs_path: str
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        user_id: str,
+        document_id: str,
+        gcs_path: str,
     ) -> None:
-        """Save document chunks to Firestore."""
+        """
+        Save document chunks to Firestore.
+
+        Each chunk's embedding is stored as packed float32 bytes
+        (``embedding_f32``, ~3 KB for 768 dimensions) rather than a float array,
+        which Firestore would store as 768 separately indexed values.
+
+        Writes go through a BulkWriter (parallel flushes with ramp-up), and
+        each write is retried on transient errors.
+
+        Raises:
+            RuntimeError: If any chunk could not be written
+        """
         if not documents:
             return
 
-        print(f"Saving {len(documents)} chunks to Firestore...")
-
-        batch = self.db.batch()
+        start = time.perf_counter()
+        operations = []
         filename = gcs_path.split("/")[-1]
         doc_title = (
             filename.rsplit(".pdf", 1)[0].split("_", 1)[-1]
@@ -114,21 +544,22 @@ class VectorIndexUploader:
             else filename
         )
 
-        for i, doc in enumerate(documents):
-            chunk_id = str(uuid.uuid4())
+        for i, (doc, embedding) in enumerate(zip(documents, embeddings)):
+            chunk_id = doc.metadata.get("chunk_id") or str(uuid.uuid4())
 
             # Store chunks in TOP-LEVEL collection (not subcollection)
             # This matches the query code expectation in firestore_repo.py
             doc_ref = self.db.collection("chunks").document(chunk_id)
 
-            batch.set(
+            operations.append((
+                "set",
                 doc_ref,
                 {
                     "chunk_id": chunk_id,
                     "user_id": user_id,
                     "document_id": document_id,
                     "text": doc.page_content,
-                    "embedding": [],
+                    "embedding_f32": array("f", embedding).tobytes(),
                     "metadata": {
                         "chunk_type": doc.metadata.get("chunk_type", "unknown"),
                         "chunk_index": doc.metadata.get("chunk_index", i),
@@ -137,14 +568,16 @@ class VectorIndexUploader:
                     },
                     "created_at": firestore.SERVER_TIMESTAMP,
                 },
-            )
+            ))
 
             doc.metadata["chunk_id"] = chunk_id
 
-            if (i + 1) % 500 == 0:
-                batch.commit()
-                batch = self.db.batch()
-                print(f"  Saved {i + 1}/{len(documents)} chunks")
-
-        batch.commit()
-        print(f"✓ Saved all {len(documents)} chunks to Firestore")
+        result = bulk_write(self.db, operations)
+        if result.failed:
+            path, error = next(iter(result.failed.items()))
+            raise RuntimeError(
+                f"{len(result.failed)} of {len(documents)} chunks could not be saved "
+                f"(first: {path}: {error})"
+            )
+        elapsed = time.perf_counter() - start
+        print(f"✓ Saved {result.written} chunks to Firestore in {elapsed:.2f}s")
@@ -0,0 +1,74 @@
+"""
+Vendor the tokenizer resources into the deployment artifact.
+
+Downloads NLTK's English punkt_tab sentence model into vendor/nltk_data and
+the tiktoken cl100k_base ranks into vendor/tiktoken_cache, where
+modules.chunking loads them from on first use. Run before every deploy so
+cold starts never download anything.
+
+Usage (from Backend/ingestion_function):
+    python scripts/vendor_tokenizer_resources.py
+"""
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chunking import (  # noqa: E402
+    NLTK_DATA_DIR,
+    NLTK_SENTENCE_RESOURCE,
+    TIKTOKEN_CACHE_DIR,
+    TIKTOKEN_ENCODING_NAME,
+)
+
+# Only the English model is used; the other punkt_tab languages are pruned
+NLTK_LANGUAGES = {"english"}
+
+
+def vendor_nltk() -> None:
+    import nltk
+
+    if not nltk.download(NLTK_SENTENCE_RESOURCE, download_dir=NLTK_DATA_DIR, quiet=True):
+        raise RuntimeError(f"Could not download NLTK {NLTK_SENTENCE_RESOURCE}")
+
+    tokenizers_dir = os.path.join(NLTK_DATA_DIR, "tokenizers")
+    archive = os.path.join(tokenizers_dir, f"{NLTK_SENTENCE_RESOURCE}.zip")
+    if os.path.exists(archive):
+        os.remove(archive)
+
+    resource_dir = os.path.join(tokenizers_dir, NLTK_SENTENCE_RESOURCE)
+    for name in os.listdir(resource_dir):
+        path = os.path.join(resource_dir, name)
+        if os.path.isdir(path) and name not in NLTK_LANGUAGES:
+            shutil.rmtree(path)
+    print(f"✓ Vendored NLTK {NLTK_SENTENCE_RESOURCE} ({', '.join(sorted(NLTK_LANGUAGES))})")
+
+
+def vendor_tiktoken() -> None:
+    os.makedirs(TIKTOKEN_CACHE_DIR, exist_ok=True)
+    # tiktoken writes downloaded files to its cache directory
+    os.environ["TIKTOKEN_CACHE_DIR"] = TIKTOKEN_CACHE_DIR
+    import tiktoken
+
+    tiktoken.get_encoding(TIKTOKEN_ENCODING_NAME)
+    if not os.listdir(TIKTOKEN_CACHE_DIR):
+        raise RuntimeError(f"tiktoken did not cache {TIKTOKEN_ENCODING_NAME}")
+    print(f"✓ Vendored tiktoken {TIKTOKEN_ENCODING_NAME}")
+
+
+def main() -> None:
+    vendor_nltk()
+    vendor_tiktoken()
+
+    size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for directory in (NLTK_DATA_DIR, TIKTOKEN_CACHE_DIR)
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+    print(f"✓ Tokenizer resources ready ({size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Checks for merging per-shard Document AI outputs."""
+import os
+import sys
+
+from google.cloud import documentai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.docai_sharding import merge_documents  # noqa: E402
+
+
+def make_shard(text: str, start: int, page_number: int, text_offset: int = 0):
+    """A one-page shard whose single paragraph anchors all of its text at start."""
+    anchor = documentai.Document.TextAnchor(
+        text_segments=[
+            documentai.Document.TextAnchor.TextSegment(
+                start_index=start, end_index=start + len(text)
+            )
+        ]
+    )
+    return documentai.Document(
+        text=text,
+        pages=[
+            documentai.Document.Page(
+                page_number=page_number,
+                paragraphs=[
+                    documentai.Document.Page.Paragraph(
+                        layout=documentai.Document.Page.Layout(text_anchor=anchor)
+                    )
+                ],
+            )
+        ],
+        shard_info=documentai.Document.ShardInfo(text_offset=text_offset),
+    )
+
+
+def paragraph_texts(document: documentai.Document):
+    texts = []
+    for page in document.pages:
+        for paragraph in page.paragraphs:
+            segment = paragraph.layout.text_anchor.text_segments[0]
+            texts.append(document.text[segment.start_index : segment.end_index])
+    return texts
+
+
+def test_merge_online_shards_rebases_local_anchors():
+    # Online shards: anchors and page numbers are local to each shard
+    merged = merge_documents(
+        [make_shard("Hello ", 0, 1), make_shard("World", 0, 1)], page_offsets=[0, 1]
+    )
+
+    assert merged.text == "Hello World"
+    assert paragraph_texts(merged) == ["Hello ", "World"]
+    assert [page.page_number for page in merged.pages] == [1, 2]
+
+
+def test_merge_batch_shards_keeps_global_anchors():
+    # Batch output shards: anchors are already global (shard_info.text_offset)
+    shards = [make_shard("Hello ", 0, 1, text_offset=0), make_shard("World", 6, 2, text_offset=6)]
+    merged = merge_documents(
+        shards,
+        page_offsets=[0, 0],
+        text_offsets=[shard.shard_info.text_offset for shard in shards],
+    )
+
+    assert merged.text == "Hello World"
+    assert paragraph_texts(merged) == ["Hello ", "World"]
+    assert [page.page_number for page in merged.pages] == [1, 2]
@@ -3,6 +3,8 @@ import os
 from dataclasses import dataclass
 from typing import Optional
 
+VECTOR_BACKENDS = ("vertex", "auto", "local")
+
 
 @dataclass
 class Config:
@@ -10,29 +12,64 @@ class Config:
 
     project_id: str
     vertex_region: str
-    index_endpoint: str
-    deployed_index_id: str
-    index_id: str
+    index_endpoint: Optional[str]
+    deployed_index_id: Optional[str]
+    index_id: Optional[str]
+    # Holds Document AI checkpoints (PHI) written by the ingestion function
+    artifact_bucket: Optional[str]
 
     # Optional configurations
     cors_origins: list[str]
     rate_limit: str
+    tenant_filter_enabled: bool
+    hybrid_retrieval_enabled: bool
+    vector_backend: str
+    local_index_max_chunks: int
+    local_index_byte_budget: int
 
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables."""
+        # "vertex": Vertex AI Vector Search only (default)
+        # "auto":   exact in-memory search for small tenants, Vertex AI otherwise
+        # "local":  exact in-memory search only (no deployed index required)
+        vector_backend = cls.get_optional_env("VECTOR_BACKEND", "vertex").lower()
+        if vector_backend not in VECTOR_BACKENDS:
+            raise RuntimeError(
+                f"Invalid VECTOR_BACKEND: {vector_backend} "
+                f"(expected one of {', '.join(VECTOR_BACKENDS)})"
+            )
+        index_env = cls.get_optional_env if vector_backend == "local" else cls._require_env
+
         return cls(
             project_id=cls._require_env("PROJECT_ID"),
             vertex_region=cls._require_env("VERTEX_AI_REGION"),
-            index_endpoint=cls._require_env("VERTEX_INDEX_ENDPOINT"),
-            deployed_index_id=cls._require_env("DEPLOYED_INDEX_ID"),
-            index_id=cls._require_env("VERTEX_INDEX_ID"),
+            index_endpoint=index_env("VERTEX_INDEX_ENDPOINT"),
+            deployed_index_id=index_env("DEPLOYED_INDEX_ID"),
+            index_id=index_env("VERTEX_INDEX_ID"),
+            artifact_bucket=cls.get_optional_env("ARTIFACT_BUCKET"),
             cors_origins=[
                 "https://clearchartai.io",
                 "http://localhost:5173",
                 "http://127.0.0.1:5173",
             ],
             rate_limit="100/minute",
+            # Only enable once existing datapoints carry user_id restricts
+            # (see Backend/backfill_vector_restricts.py)
+            tenant_filter_enabled=cls.get_optional_env(
+                "VECTOR_TENANT_FILTER", "false"
+            ).lower() == "true",
+            # BM25 keyword search fused with vector results
+            hybrid_retrieval_enabled=cls.get_optional_env(
+                "HYBRID_RETRIEVAL", "true"
+            ).lower() == "true",
+            vector_backend=vector_backend,
+            local_index_max_chunks=int(
+                cls.get_optional_env("LOCAL_INDEX_MAX_CHUNKS", "5000")
+            ),
+            local_index_byte_budget=int(
+                cls.get_optional_env("LOCAL_INDEX_BYTE_BUDGET_MB", "256")
+            ) * 1024 * 1024,
         )
 
     @staticmethod
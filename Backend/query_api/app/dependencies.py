@@ -0,0 +1,120 @@
+"""Process-wide API clients and the FastAPI dependencies that expose them."""
+from typing import Optional
+
+from fastapi import Request
+from google.cloud import firestore, storage
+
+from app.config import Config
+from app.repositories.firestore_repo import FirestoreRepository
+from app.repositories.async_firestore_repo import AsyncFirestoreRepository
+from app.repositories.lexical_repo import LexicalRepository
+from app.repositories.vector_repo import VectorRepository
+from app.repositories.local_vector_repo import LocalVectorRepository
+from app.repositories.vector_router import VectorSearchRouter
+from app.services.query_service import QueryService
+
+
+class ClientRegistry:
+    """
+    Clients shared by every request in this process.
+
+    Google Cloud clients are thread-safe and hold connection pools (and, for
+    MatchingEngineIndexEndpoint, the result of a metadata API call), so they
+    are created once at startup by the app lifespan, stored on
+    ``app.state.clients`` and closed on shutdown.
+    """
+
+    def __init__(self, config: Config):
+        """Create all clients for the given configuration."""
+        self.config = config
+        self.firestore = firestore.Client(project=config.project_id)
+        self.async_firestore = firestore.AsyncClient(project=config.project_id)
+        self.storage = storage.Client(project=config.project_id)
+
+        self.firestore_repo = FirestoreRepository(db=self.firestore)
+        self.async_firestore_repo = AsyncFirestoreRepository(db=self.async_firestore)
+
+        self.local_vector_repo: Optional[LocalVectorRepository] = None
+        if config.vector_backend in ("auto", "local"):
+            self.local_vector_repo = LocalVectorRepository(
+                db=self.firestore,
+                max_chunks=config.local_index_max_chunks,
+                byte_budget=config.local_index_byte_budget,
+            )
+
+        self.vertex_vector_repo: Optional[VectorRepository] = None
+        if config.vector_backend in ("auto", "vertex"):
+            self.vertex_vector_repo = VectorRepository(
+                index_endpoint=config.index_endpoint,
+                deployed_index_id=config.deployed_index_id,
+                index_id=config.index_id,
+                tenant_filter=config.tenant_filter_enabled,
+            )
+
+        self.vector_search = VectorSearchRouter(
+            local_repo=self.local_vector_repo, vertex_repo=self.vertex_vector_repo
+        )
+
+        self.lexical_repo = LexicalRepository(db=self.firestore)
+
+        self.query_service = QueryService(
+            firestore_repo=self.async_firestore_repo,
+            vector_repo=self.vector_search,
+            tenant_filter=config.tenant_filter_enabled,
+            lexical_repo=self.lexical_repo if config.hybrid_retrieval_enabled else None,
+        )
+
+    async def close(self) -> None:
+        """Close transports held by the clients."""
+        for name, close in (
+            ("firestore", self.firestore.close),
+            ("async_firestore", self.async_firestore.close),
+            ("storage", self.storage.close),
+        ):
+            try:
+                close()
+            except Exception as e:
+                print(f"Warning: Failed to close {name} client: {e}")
+
+
+# ==================== FastAPI Dependencies ====================
+
+
+def get_clients(request: Request) -> ClientRegistry:
+    """Dependency to get the process-wide client registry."""
+    return request.app.state.clients
+
+
+def get_config(request: Request) -> Config:
+    """Dependency to get the application configuration."""
+    return get_clients(request).config
+
+
+def get_firestore_client(request: Request) -> firestore.Client:
+    """Dependency to get the shared Firestore client."""
+    return get_clients(request).firestore
+
+
+def get_storage_client(request: Request) -> storage.Client:
+    """Dependency to get the shared Storage client."""
+    return get_clients(request).storage
+
+
+def get_firestore_repo(request: Request) -> FirestoreRepository:
+    """Dependency to get the shared FirestoreRepository."""
+    return get_clients(request).firestore_repo
+
+
+def get_lexical_repo(request: Request) -> LexicalRepository:
+    """Dependency to get the shared LexicalRepository."""
+    return get_clients(request).lexical_repo
+
+
+def get_vertex_vector_repo(request: Request) -> Optional[VectorRepository]:
+    """Dependency to get the Vertex AI repository (None when VECTOR_BACKEND=local)."""
+    return get_clients(request).vertex_vector_repo
+
+
+def get_query_service(request: Request) -> QueryService:
+    """Dependency to get the shared QueryService."""
+    return get_clients(request).query_service
@@ -20,7 +20,9 @@ class Source(BaseModel):
     """Source information for a retrieved chunk."""
 
     id: str = Field(..., description="Chunk ID")
-    distance: float = Field(..., description="Vector similarity distance")
+    distance: Optional[float] = Field(
+        None, description="Vector similarity distance (None for keyword-only matches)"
+    )
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Chunk metadata")
     document_id: Optional[str] = Field(None, description="Source document ID")
 
@@ -1,5 +1,14 @@
 """Data access layer for Firestore and Vector Search."""
 from .firestore_repo import FirestoreRepository
 from .vector_repo import VectorRepository
+from .local_vector_repo import LocalVectorRepository
+from .vector_router import VectorSearchRouter
+from .lexical_repo import LexicalRepository
 
-__all__ = ["FirestoreRepository", "VectorRepository"]
+__all__ = [
+    "FirestoreRepository",
+    "VectorRepository",
+    "LocalVectorRepository",
+    "VectorSearchRouter",
+    "LexicalRepository",
+]
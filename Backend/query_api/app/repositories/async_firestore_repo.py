@@ -0,0 +1,142 @@
+"""Async Firestore data access operations for the query pipeline."""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+from datetime import datetime
+from google.cloud import firestore
+from google.cloud.firestore_v1 import Increment
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from app.repositories.firestore_repo import CHUNK_WINDOW_PARALLELISM, CHUNK_WINDOW_SIZE
+
+
+class AsyncFirestoreRepository:
+    """
+    Repository for the Firestore operations used by QueryService.
+
+    Mirrors the corresponding FirestoreRepository methods on top of
+    firestore.AsyncClient so that queries never block the event loop.
+    """
+
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        db: Optional[firestore.AsyncClient] = None,
+    ):
+        """Initialize with a shared async Firestore client, or create one for project_id."""
+        self.db = db or firestore.AsyncClient(project=project_id)
+
+    # ==================== Chat Operations ====================
+
+    async def get_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Get chat by ID."""
+        doc = await self.db.collection("chats").document(chat_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def create_chat(self, user_id: str, title: str = "New Chat") -> Dict[str, Any]:
+        """Create a new chat session."""
+        chat_id = self.db.collection("chats").document().id
+        chat = {
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "title": title,
+            "message_count": 0,
+            "created_at": firestore.SERVER_TIMESTAMP,
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }
+        await self.db.collection("chats").document(chat_id).set(chat)
+        return {**chat, "created_at": datetime.now(), "updated_at": datetime.now()}
+
+    async def update_chat_timestamp(self, chat_id: str) -> None:
+        """Update chat's last updated timestamp."""
+        await self.db.collection("chats").document(chat_id).update({
+            "updated_at": firestore.SERVER_TIMESTAMP
+        })
+
+    async def increment_message_count(self, chat_id: str, count: int = 1) -> None:
+        """Increment message count for a chat."""
+        await self.db.collection("chats").document(chat_id).update({
+            "message_count": Increment(count)
+        })
+
+    # ==================== Message Operations ====================
+
+    async def create_message(self, message: Dict[str, Any]) -> None:
+        """Create a new message."""
+        await self.db.collection("messages").document(message["message_id"]).set(message)
+
+    async def get_chat_messages(
+        self, chat_id: str, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get messages for a chat, ordered by timestamp."""
+        query = (
+            self.db.collection("messages")
+            .where(filter=FieldFilter("chat_id", "==", chat_id))
+            .order_by("timestamp")
+            .limit(limit)
+        )
+        return [doc.to_dict() async for doc in query.stream()]
+
+    # ==================== Chunk Operations ====================
+
+    async def get_chunks(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get multiple chunks in a single get_all round trip, keyed by ID."""
+        if not chunk_ids:
+            return {}
+        refs = [self.db.collection("chunks").document(chunk_id) for chunk_id in chunk_ids]
+        return {doc.id: doc.to_dict() async for doc in self.db.get_all(refs) if doc.exists}
+
+    async def iter_chunks(
+        self,
+        chunk_ids: List[str],
+        window_size: int = CHUNK_WINDOW_SIZE,
+        parallelism: int = CHUNK_WINDOW_PARALLELISM,
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Yield (chunk_id, chunk) pairs in the order of chunk_ids.
+
+        Same windowing as FirestoreRepository.iter_chunks: a wave of get_all
+        windows is awaited concurrently, and the next wave is only fetched
+        while the caller keeps iterating.
+        """
+        windows = [
+            chunk_ids[i : i + window_size] for i in range(0, len(chunk_ids), window_size)
+        ]
+        for start in range(0, len(windows), parallelism):
+            wave = windows[start : start + parallelism]
+            results = await asyncio.gather(*(self.get_chunks(window) for window in wave))
+            for window, found in zip(wave, results):
+                for chunk_id in window:
+                    yield chunk_id, found.get(chunk_id)
+
+    # ==================== Document Operations ====================
+
+    async def get_document_set_version(self, user_id: str) -> int:
+        """Get the user's document-set version (bumped whenever documents change)."""
+        doc = await self.db.collection("users").document(user_id).get(
+            field_paths=["document_set_version"]
+        )
+        if not doc.exists:
+            return 0
+        return (doc.to_dict() or {}).get("document_set_version", 0)
+
+    async def get_incomplete_documents(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get documents that are not (yet) queryable (ID, title, filename, status, progress).
+
+        These are still processing, or failed midway and may have left
+        partial chunks, vectors and postings behind.
+        """
+        docs = await (
+            self.db.collection("documents")
+            .where(filter=FieldFilter("user_id", "==", user_id))
+            .where(
+                filter=FieldFilter(
+                    "processing_status",
+                    "in",
+                    ["pending", "processing", "in_progress", "failed"],
+                )
+            )
+            .select(["title", "filename", "processing_status", "progress"])
+            .get()
+        )
+        return [{**(doc.to_dict() or {}), "document_id": doc.id} for doc in docs]
@@ -1,17 +1,125 @@
 """Firestore data access operations."""
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+import threading
 from google.cloud import firestore
 from google.cloud.firestore_v1 import Increment
 from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+
+# Chunk hydration: ids are fetched with get_all() in windows, and a wave of
+# windows is issued in parallel before the next wave is considered.
+CHUNK_WINDOW_SIZE = 20
+CHUNK_WINDOW_PARALLELISM = 4
+
+# Bulk writes: ramp-up starts at Firestore's recommended 500 ops/s and grows
+# 50% every 5 minutes, up to the cap. Keep in sync with the ingestion
+# function's modules/firestore_bulk.py.
+BULK_WRITE_INITIAL_OPS_PER_SECOND = 500
+BULK_WRITE_MAX_OPS_PER_SECOND = 10000
+
+# Writes failing with a transient gRPC status are retried (with BulkWriter's
+# backoff) up to this many attempts; any other error fails the write at once
+BULK_WRITE_MAX_ATTEMPTS = 5
+BULK_WRITE_RETRYABLE_CODES = frozenset(
+    {
+        4,  # DEADLINE_EXCEEDED
+        8,  # RESOURCE_EXHAUSTED
+        10,  # ABORTED
+        13,  # INTERNAL
+        14,  # UNAVAILABLE
+    }
+)
+
+# Per-user embedding cache written by the ingestion function; each entry
+# records the user_id and document_id it was computed from. Keep in sync with
+# the ingestion function's modules/embedding_cache.py.
+CHUNK_EMBEDDING_CACHE_COLLECTION = "chunk_embedding_cache"
+
+# (operation, document reference, data): operation is "set", "update" or
+# "delete" (data is ignored for deletes)
+BulkOperation = Tuple[str, firestore.DocumentReference, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class BulkWriteResult:
+    """Outcome of a bulk write."""
+
+    written: int = 0
+    # Document path -> error message of writes that failed for good
+    failed: Dict[str, str] = field(default_factory=dict)
 
 
 class FirestoreRepository:
     """Repository for all Firestore CRUD operations."""
 
-    def __init__(self, project_id: str):
-        """Initialize Firestore client."""
-        self.db = firestore.Client(project=project_id)
+    def __init__(
+        self, project_id: Optional[str] = None, db: Optional[firestore.Client] = None
+    ):
+        """Initialize with a shared Firestore client, or create one for project_id."""
+        self.db = db or firestore.Client(project=project_id)
+
+    # ==================== Bulk Operations ====================
+
+    def bulk_write(self, operations: Iterable[BulkOperation]) -> BulkWriteResult:
+        """
+        Apply writes through a BulkWriter (batches are flushed in parallel).
+
+        Args:
+            operations: Writes to apply; they are not atomic as a whole
+
+        Returns:
+            Counts of written documents and per-document failures
+        """
+        result = BulkWriteResult()
+        lock = threading.Lock()
+        bulk_writer = self.db.bulk_writer(
+            options=BulkWriterOptions(
+                initial_ops_per_second=BULK_WRITE_INITIAL_OPS_PER_SECOND,
+                max_ops_per_second=BULK_WRITE_MAX_OPS_PER_SECOND,
+            )
+        )
+
+        def on_result(reference, write_result, writer) -> None:
+            with lock:
+                result.written += 1
+
+        def on_error(failure, writer) -> bool:
+            if (
+                failure.code in BULK_WRITE_RETRYABLE_CODES
+                and failure.attempts < BULK_WRITE_MAX_ATTEMPTS
+            ):
+                return True
+            with lock:
+                result.failed[failure.operation.reference.path] = failure.message
+            return False
+
+        bulk_writer.on_write_result(on_result)
+        bulk_writer.on_write_error(on_error)
+
+        for operation, reference, data in operations:
+            if operation == "set":
+                bulk_writer.set(reference, data)
+            elif operation == "update":
+                bulk_writer.update(reference, data)
+            elif operation == "delete":
+                bulk_writer.delete(reference)
+            else:
+                raise ValueError(f"Unknown bulk write operation: {operation}")
+
+        bulk_writer.close()
+        if result.failed:
+            print(f"Warning: {len(result.failed)} bulk writes failed")
+        return result
+
+    def bulk_delete(
+        self, references: Iterable[firestore.DocumentReference]
+    ) -> BulkWriteResult:
+        """Delete documents through a BulkWriter."""
+        return self.bulk_write(("delete", reference, None) for reference in references)
 
     # ==================== Chat Operations ====================
 
@@ -87,16 +195,55 @@ class FirestoreRepository:
         doc = self.db.collection("chunks").document(chunk_id).get()
         return doc.to_dict() if doc.exists else None
 
+    def get_chunks(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get multiple chunks in a single get_all round trip, keyed by ID."""
+        if not chunk_ids:
+            return {}
+        refs = [self.db.collection("chunks").document(chunk_id) for chunk_id in chunk_ids]
+        return {doc.id: doc.to_dict() for doc in self.db.get_all(refs) if doc.exists}
+
+    def iter_chunks(
+        self,
+        chunk_ids: List[str],
+        window_size: int = CHUNK_WINDOW_SIZE,
+        parallelism: int = CHUNK_WINDOW_PARALLELISM,
+    ) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Yield (chunk_id, chunk) pairs in the order of chunk_ids.
+
+        IDs are fetched in windows of window_size using get_all, with up to
+        parallelism windows in flight at once. The next wave is only fetched
+        when the caller keeps iterating, so a caller that stops early (e.g.
+        once top_k chunks are collected) does not pay for the remaining reads.
+
+        Args:
+            chunk_ids: Chunk IDs in the desired order (e.g. by vector distance)
+            window_size: Number of IDs per get_all call
+            parallelism: Number of get_all calls issued concurrently
+
+        Yields:
+            (chunk_id, chunk dict or None if the chunk does not exist)
+        """
+        windows = [
+            chunk_ids[i : i + window_size] for i in range(0, len(chunk_ids), window_size)
+        ]
+        if not windows:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(parallelism, len(windows))) as executor:
+            for start in range(0, len(windows), parallelism):
+                wave = windows[start : start + parallelism]
+                for window, found in zip(wave, executor.map(self.get_chunks, wave)):
+                    for chunk_id in window:
+                        yield chunk_id, found.get(chunk_id)
+
     def get_chunks_by_ids(self, chunk_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
-        """Get multiple chunks by IDs, filtered by user_id."""
-        chunks = []
-        for chunk_id in chunk_ids:
-            doc = self.db.collection("chunks").document(chunk_id).get()
-            if doc.exists:
-                data = doc.to_dict()
-                if data.get("user_id") == user_id:
-                    chunks.append(data)
-        return chunks
+        """Get multiple chunks by IDs, filtered by user_id (input order preserved)."""
+        return [
+            chunk
+            for _, chunk in self.iter_chunks(chunk_ids)
+            if chunk and chunk.get("user_id") == user_id
+        ]
 
     # ==================== Document Operations ====================
 
@@ -113,25 +260,116 @@ class FirestoreRepository:
         )
         return [doc.to_dict() for doc in docs]
 
-    def get_processing_documents(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get documents that are still being processed."""
+    def get_incomplete_documents(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get documents that are not (yet) queryable (ID, title, filename, status, progress).
+
+        These are still processing, or failed midway and may have left
+        partial chunks, vectors and postings behind.
+        """
         docs = (
             self.db.collection("documents")
             .where(filter=FieldFilter("user_id", "==", user_id))
             .where(
                 filter=FieldFilter(
-                    "processing_status", "in", ["pending", "processing", "in_progress"]
+                    "processing_status",
+                    "in",
+                    ["pending", "processing", "in_progress", "failed"],
                 )
             )
-            .limit(1)
+            .select(["title", "filename", "processing_status", "progress"])
             .get()
         )
-        return [doc.to_dict() for doc in docs]
+        return [{**(doc.to_dict() or {}), "document_id": doc.id} for doc in docs]
 
     def delete_document(self, document_id: str) -> None:
         """Delete a document."""
         self.db.collection("documents").document(document_id).delete()
 
+    def get_embedding_cache_refs(
+        self, user_id: str, document_id: str
+    ) -> List[firestore.DocumentReference]:
+        """Get the chunk embedding cache entries computed from a document."""
+        entries = (
+            self.db.collection(CHUNK_EMBEDDING_CACHE_COLLECTION)
+            .where(filter=FieldFilter("user_id", "==", user_id))
+            .where(filter=FieldFilter("document_id", "==", document_id))
+            .select([])
+            .stream()
+        )
+        return [entry.reference for entry in entries]
+
+    def content_shared_by_other_documents(self, content_sha256: str, document_id: str) -> bool:
+        """Return True if any document other than document_id has this PDF fingerprint."""
+        docs = (
+            self.db.collection("documents")
+            .where(filter=FieldFilter("content_sha256", "==", content_sha256))
+            .select([])
+            .limit(2)
+            .get()
+        )
+        return any(doc.id != document_id for doc in docs)
+
+    def get_document_aliases(self, document_id: str) -> List[Dict[str, Any]]:
+        """Get documents that alias document_id (duplicate uploads), oldest first."""
+        docs = (
+            self.db.collection("documents")
+            .where(filter=FieldFilter("alias_of", "==", document_id))
+            .stream()
+        )
+        aliases = [{**doc.to_dict(), "document_id": doc.id} for doc in docs]
+        return sorted(aliases, key=lambda alias: alias.get("created_at", ""))
+
+    def promote_alias(
+        self, document_id: str, aliases: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        Hand a canonical document's chunks over to its oldest alias.
+
+        Used before deleting a canonical document that duplicate uploads still
+        point at: the chunks are re-pointed to the first alias, which becomes
+        the new canonical document, and the remaining aliases follow it.
+
+        Args:
+            document_id: Canonical document about to be deleted
+            aliases: Its aliases, oldest first (from get_document_aliases)
+
+        Returns:
+            The promoted document ID, or None if there are no aliases
+        """
+        if not aliases:
+            return None
+        promoted_id = aliases[0]["document_id"]
+
+        chunks = self.db.collection("chunks").where(
+            filter=FieldFilter("document_id", "==", document_id)
+        )
+        result = self.bulk_write(
+            ("update", chunk.reference, {"document_id": promoted_id})
+            for chunk in chunks.stream()
+        )
+        if result.failed:
+            raise RuntimeError(
+                f"Could not re-point {len(result.failed)} chunks of {document_id}"
+            )
+
+        documents = self.db.collection("documents")
+        batch = self.db.batch()
+        batch.update(
+            documents.document(promoted_id),
+            {"alias_of": firestore.DELETE_FIELD, "updated_at": datetime.now().isoformat()},
+        )
+        for alias in aliases[1:]:
+            batch.update(documents.document(alias["document_id"]), {"alias_of": promoted_id})
+        batch.commit()
+        return promoted_id
+
+    def bump_document_set_version(self, user_id: str) -> None:
+        """Mark the user's document set as changed (invalidates cached answers)."""
+        self.db.collection("users").document(user_id).set(
+            {"document_set_version": Increment(1)}, merge=True
+        )
+
     # ==================== User Profile Operations ====================
 
     def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,201 @@
+"""BM25 keyword search over per-user postings."""
+from typing import Collection, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import threading
+
+import numpy as np
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from app.utils.lexical import decode_postings, tokenize
+
+POSTINGS_COLLECTION = "lexical_postings"
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Users whose merged index is kept in memory
+LEXICAL_INDEX_MAX_USERS = 500
+
+
+@dataclass
+class UserLexicalIndex:
+    """A user's postings segments merged into one BM25 index."""
+
+    chunk_ids: List[str]
+    lengths: np.ndarray
+    # term -> (chunk indices, term frequencies)
+    postings: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    document_set_version: Optional[int]
+    # Owning document of each chunk
+    document_ids: List[str]
+
+    @property
+    def average_length(self) -> float:
+        """Average chunk length in terms."""
+        return float(self.lengths.mean()) if len(self.lengths) else 0.0
+
+
+class LexicalRepository:
+    """
+    Keyword search with BM25 scoring.
+
+    The ingestion function writes one compressed postings segment per
+    document (``lexical_postings`` collection). Segments are merged into a
+    per-user index on first use, cached LRU, and rebuilt when the user's
+    document-set version changes, so adding or deleting a document only
+    touches that document's segments.
+    """
+
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        max_users: int = LEXICAL_INDEX_MAX_USERS,
+        db: Optional[firestore.Client] = None,
+    ):
+        """Initialize Firestore client and an empty index cache."""
+        self.db = db or firestore.Client(project=project_id)
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, UserLexicalIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        query: str,
+        user_id: str,
+        num_results: int = 50,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the user's chunks that best match the query terms.
+
+        Args:
+            query: Query text
+            user_id: Tenant whose chunks are searched
+            num_results: Maximum number of results
+            document_set_version: User's current document-set version; a cached
+                index built for another version is discarded and reloaded
+            exclude_document_ids: Documents whose chunks are skipped (still
+                being ingested)
+
+        Returns:
+            List of (chunk_id, BM25 score) tuples, best first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        index = self.get_user_index(user_id, document_set_version)
+        if not index.chunk_ids:
+            return []
+
+        scores = np.zeros(len(index.chunk_ids), dtype=np.float32)
+        total = len(index.chunk_ids)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * index.lengths / max(index.average_length, 1e-9))
+        for term in terms:
+            if term not in index.postings:
+                continue
+            chunk_indices, frequencies = index.postings[term]
+            idf = math.log(1 + (total - len(chunk_indices) + 0.5) / (len(chunk_indices) + 0.5))
+            scores[chunk_indices] += idf * frequencies * (BM25_K1 + 1) / (
+                frequencies + norm[chunk_indices]
+            )
+
+        if exclude_document_ids:
+            excluded = set(exclude_document_ids)
+            scores[[i for i, doc_id in enumerate(index.document_ids) if doc_id in excluded]] = 0
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        k = min(num_results, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(index.chunk_ids[i], float(scores[i])) for i in top]
+
+    def get_user_index(
+        self, user_id: str, document_set_version: Optional[int] = None
+    ) -> UserLexicalIndex:
+        """Return the user's cached index, loading it if missing or stale."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.document_set_version == document_set_version:
+                self._indexes.move_to_end(user_id)
+                return index
+
+        index = self._load_user_index(user_id, document_set_version)
+
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def delete_document(self, document_id: str) -> None:
+        """Delete a document's postings segments."""
+        segments = self.db.collection(POSTINGS_COLLECTION).where(
+            filter=FieldFilter("document_id", "==", document_id)
+        )
+        batch = self.db.batch()
+        for segment in segments.stream():
+            batch.delete(segment.reference)
+        batch.commit()
+
+    def reassign_document(self, document_id: str, new_document_id: str) -> None:
+        """Re-point a document's postings segments to another document ID."""
+        segments = self.db.collection(POSTINGS_COLLECTION).where(
+            filter=FieldFilter("document_id", "==", document_id)
+        )
+        batch = self.db.batch()
+        for segment in segments.stream():
+            batch.update(segment.reference, {"document_id": new_document_id})
+        batch.commit()
+
+    def _load_user_index(
+        self, user_id: str, document_set_version: Optional[int]
+    ) -> UserLexicalIndex:
+        """Merge all of the user's postings segments into one index."""
+        segments = self.db.collection(POSTINGS_COLLECTION).where(
+            filter=FieldFilter("user_id", "==", user_id)
+        )
+
+        chunk_ids: List[str] = []
+        document_ids: List[str] = []
+        lengths: List[int] = []
+        merged: Dict[str, Tuple[List[int], List[int]]] = {}
+        for doc in segments.select(["postings", "document_id"]).stream():
+            data = doc.to_dict() or {}
+            blob = data.get("postings")
+            if not blob:
+                continue
+            try:
+                segment = decode_postings(blob)
+            except Exception as e:
+                print(f"Warning: Skipping unreadable postings segment {doc.id}: {e}")
+                continue
+
+            offset = len(chunk_ids)
+            chunk_ids.extend(segment["chunk_ids"])
+            document_ids.extend([data.get("document_id", "")] * len(segment["chunk_ids"]))
+            lengths.extend(segment["lengths"])
+            for term, flat in segment["postings"].items():
+                indices, frequencies = merged.setdefault(term, ([], []))
+                indices.extend(offset + i for i in flat[0::2])
+                frequencies.extend(flat[1::2])
+
+        postings = {
+            term: (np.asarray(indices, dtype=np.int64), np.asarray(frequencies, dtype=np.float32))
+            for term, (indices, frequencies) in merged.items()
+        }
+        return UserLexicalIndex(
+            chunk_ids=chunk_ids,
+            lengths=np.asarray(lengths, dtype=np.float32),
+            postings=postings,
+            document_set_version=document_set_version,
+            document_ids=document_ids,
+        )
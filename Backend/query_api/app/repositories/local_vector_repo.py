@@ -0,0 +1,206 @@
+"""Exact in-memory vector search for small tenants."""
+from typing import Collection, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+
+import numpy as np
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+# Tenants with more chunks than this are searched on Vertex AI
+LOCAL_INDEX_MAX_CHUNKS = 5000
+
+# Memory budget for all cached per-user matrices
+LOCAL_INDEX_BYTE_BUDGET = 256 * 1024 * 1024
+
+# Users remembered as ineligible (least recently seen evicted beyond this)
+LOCAL_INDEX_MAX_INELIGIBLE_USERS = 10000
+
+
+@dataclass
+class UserMatrix:
+    """A user's chunk embeddings as one row-per-chunk float32 matrix."""
+
+    chunk_ids: List[str]
+    vectors: np.ndarray
+    document_set_version: Optional[int]
+    # Owning document of each row
+    document_ids: List[str]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint."""
+        return self.vectors.nbytes + sum(len(cid) for cid in self.chunk_ids)
+
+    def rows_excluding(self, document_ids: Collection[str]) -> np.ndarray:
+        """Boolean mask of the rows not owned by any of document_ids."""
+        return np.fromiter(
+            (document_id not in document_ids for document_id in self.document_ids),
+            dtype=bool,
+            count=len(self.document_ids),
+        )
+
+
+class LocalVectorRepository:
+    """
+    Exact top-k search over per-user embedding matrices.
+
+    Drop-in alternative to VectorRepository for tenants that own few chunks:
+    scores are computed with one matrix-vector product (dot product, the same
+    distance measure the Vertex index uses), so recall is exact and there is
+    no network round trip once the matrix is cached.
+
+    Matrices are built lazily from the ``embedding_f32`` field the ingestion
+    function stores on each chunk, cached under a byte budget with LRU
+    eviction, and rebuilt when the user's document-set version changes.
+    """
+
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        max_chunks: int = LOCAL_INDEX_MAX_CHUNKS,
+        byte_budget: int = LOCAL_INDEX_BYTE_BUDGET,
+        db: Optional[firestore.Client] = None,
+        max_ineligible_users: int = LOCAL_INDEX_MAX_INELIGIBLE_USERS,
+    ):
+        """Initialize Firestore client and an empty matrix cache."""
+        self.db = db or firestore.Client(project=project_id)
+        self.max_chunks = max_chunks
+        self.byte_budget = byte_budget
+        self.max_ineligible_users = max_ineligible_users
+        self._matrices: "OrderedDict[str, UserMatrix]" = OrderedDict()
+        self._cached_bytes = 0
+        # Users that cannot be served locally, by document-set version
+        self._ineligible: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find_neighbors(
+        self,
+        query_embedding: List[float],
+        num_neighbors: int = 100,
+        user_id: Optional[str] = None,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Collection[str]] = None,
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Find the user's nearest chunks by exact dot-product search.
+
+        Args:
+            query_embedding: Query vector embedding
+            num_neighbors: Number of neighbors to retrieve
+            user_id: Tenant whose chunks are searched (required)
+            document_set_version: User's current document-set version; a cached
+                matrix built for another version is discarded and reloaded
+            exclude_document_ids: Documents whose chunks are skipped (still
+                being ingested)
+
+        Returns:
+            List of (chunk_id, distance) tuples, best first, or None if the
+            tenant is too large or has chunks without stored embeddings
+        """
+        if not user_id:
+            return None
+
+        matrix = self.get_user_matrix(user_id, document_set_version)
+        if matrix is None:
+            return None
+        if not matrix.chunk_ids:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = matrix.vectors @ query
+
+        candidates = np.arange(len(scores))
+        if exclude_document_ids:
+            candidates = candidates[matrix.rows_excluding(set(exclude_document_ids))]
+            if not len(candidates):
+                return []
+
+        k = min(num_neighbors, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(matrix.chunk_ids[i], float(scores[i])) for i in top]
+
+    def get_user_matrix(
+        self, user_id: str, document_set_version: Optional[int] = None
+    ) -> Optional[UserMatrix]:
+        """Return the user's cached matrix, loading it if missing or stale."""
+        with self._lock:
+            if user_id in self._ineligible:
+                if self._ineligible[user_id] == document_set_version:
+                    self._ineligible.move_to_end(user_id)
+                    return None
+                del self._ineligible[user_id]
+
+            matrix = self._matrices.get(user_id)
+            if matrix is not None:
+                if matrix.document_set_version == document_set_version:
+                    self._matrices.move_to_end(user_id)
+                    return matrix
+                self._evict(user_id)
+
+        matrix = self._load_user_matrix(user_id, document_set_version)
+
+        with self._lock:
+            if matrix is None:
+                self._ineligible[user_id] = document_set_version
+                self._ineligible.move_to_end(user_id)
+                while len(self._ineligible) > self.max_ineligible_users:
+                    self._ineligible.popitem(last=False)
+                return None
+            self._store(user_id, matrix)
+        return matrix
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop any cached state for the user (e.g. after a document change)."""
+        with self._lock:
+            self._ineligible.pop(user_id, None)
+            if user_id in self._matrices:
+                self._evict(user_id)
+
+    def _load_user_matrix(
+        self, user_id: str, document_set_version: Optional[int]
+    ) -> Optional[UserMatrix]:
+        """Build the user's matrix from Firestore, or None if not eligible."""
+        query = self.db.collection("chunks").where(
+            filter=FieldFilter("user_id", "==", user_id)
+        )
+
+        count = query.count().get()[0][0].value
+        if count > self.max_chunks:
+            print(f"Local vector search: user has {count} chunks, using Vertex AI")
+            return None
+
+        chunk_ids = []
+        document_ids = []
+        rows = []
+        for doc in query.select(["embedding_f32", "document_id"]).stream():
+            data = doc.to_dict() or {}
+            packed = data.get("embedding_f32")
+            if not packed:
+                # Chunk ingested before embeddings were stored on chunks
+                print("Local vector search: chunks without stored embeddings, using Vertex AI")
+                return None
+            chunk_ids.append(doc.id)
+            document_ids.append(data.get("document_id", ""))
+            rows.append(np.frombuffer(packed, dtype=np.float32))
+
+        vectors = np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+        return UserMatrix(chunk_ids, vectors, document_set_version, document_ids)
+
+    def _store(self, user_id: str, matrix: UserMatrix) -> None:
+        """Insert a matrix and evict least recently used users over budget (lock held)."""
+        if user_id in self._matrices:
+            self._evict(user_id)
+        self._matrices[user_id] = matrix
+        self._cached_bytes += matrix.nbytes
+        while self._cached_bytes > self.byte_budget and len(self._matrices) > 1:
+            oldest = next(iter(self._matrices))
+            self._evict(oldest)
+
+    def _evict(self, user_id: str) -> None:
+        """Remove a user's matrix from the cache (lock held)."""
+        matrix = self._matrices.pop(user_id)
+        self._cached_bytes -= matrix.nbytes
+
@@ -1,22 +1,41 @@
 """Vertex AI Vector Search operations."""
-from typing import List, Tuple
+from typing import Collection, List, Optional, Tuple
 from google.cloud import aiplatform
 from google.cloud.aiplatform.matching_engine.matching_engine_index_endpoint import (
     MatchingEngineIndexEndpoint,
+    Namespace,
 )
 
+# Restrict namespaces written on every datapoint by the ingestion function
+# (see VectorIndexUploader.upsert_documents). Keep the two in sync.
+USER_ID_NAMESPACE = "user_id"
+DOCUMENT_ID_NAMESPACE = "document_id"
+
 
 class VectorRepository:
     """Repository for Vertex AI Vector Search operations."""
 
-    def __init__(self, index_endpoint: str, deployed_index_id: str, index_id: str = None):
+    def __init__(
+        self,
+        index_endpoint: str,
+        deployed_index_id: str,
+        index_id: str = None,
+        tenant_filter: bool = False,
+    ):
         """Initialize Vector Search client."""
         self.endpoint = MatchingEngineIndexEndpoint(index_endpoint_name=index_endpoint)
         self.deployed_index_id = deployed_index_id
         self.index_id = index_id
+        self.tenant_filter = tenant_filter
+        self._index: Optional[aiplatform.MatchingEngineIndex] = None
 
     def find_neighbors(
-        self, query_embedding: List[float], num_neighbors: int = 100
+        self,
+        query_embedding: List[float],
+        num_neighbors: int = 100,
+        user_id: Optional[str] = None,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Collection[str]] = None,
     ) -> List[Tuple[str, float]]:
         """
         Find nearest neighbors for a query embedding.
@@ -24,14 +43,31 @@ class VectorRepository:
         Args:
             query_embedding: Query vector embedding
             num_neighbors: Number of neighbors to retrieve (default 100 for multi-tenant filtering)
+            user_id: Querying user. With tenant_filter enabled the search is
+                restricted to datapoints tagged with this user's ID, so the
+                index only returns the tenant's own vectors
+            document_set_version: Unused; accepted for interface parity with
+                LocalVectorRepository (streaming upserts keep the index current)
+            exclude_document_ids: Documents whose vectors must not be returned
+                (still being ingested). Denied in the index with tenant_filter
+                enabled; otherwise the caller filters them out after hydration
 
         Returns:
             List of (chunk_id, distance) tuples
         """
+        restricts = None
+        if user_id and self.tenant_filter:
+            restricts = [Namespace(USER_ID_NAMESPACE, allow_tokens=[user_id])]
+            if exclude_document_ids:
+                restricts.append(
+                    Namespace(DOCUMENT_ID_NAMESPACE, deny_tokens=list(exclude_document_ids))
+                )
+
         matches = self.endpoint.find_neighbors(
             deployed_index_id=self.deployed_index_id,
             queries=[query_embedding],
             num_neighbors=num_neighbors,
+            filter=restricts,
         )
 
         if not matches or not matches[0]:
@@ -58,8 +94,9 @@ class VectorRepository:
         if not self.index_id:
             raise ValueError("index_id is required for remove_vectors operation")
 
-        # Get the Index resource
-        index = aiplatform.MatchingEngineIndex(index_name=self.index_id)
+        # Get the Index resource (a metadata API call, so only done once)
+        if self._index is None:
+            self._index = aiplatform.MatchingEngineIndex(index_name=self.index_id)
 
         # Remove datapoints using the streaming API
-        index.remove_datapoints(datapoint_ids=datapoint_ids)
+        self._index.remove_datapoints(datapoint_ids=datapoint_ids)
@@ -0,0 +1,69 @@
+"""Routing between local exact search and Vertex AI Vector Search."""
+from typing import Collection, List, Optional, Tuple
+
+from app.repositories.local_vector_repo import LocalVectorRepository
+from app.repositories.vector_repo import VectorRepository
+
+
+class VectorSearchRouter:
+    """
+    Picks a vector search backend per tenant.
+
+    Small tenants (see LocalVectorRepository.max_chunks) are served by exact
+    in-memory search; everyone else, and any tenant whose chunks lack stored
+    embeddings, goes to the shared Vertex AI index. Exposes the same
+    find_neighbors/remove_vectors interface as VectorRepository.
+    """
+
+    def __init__(
+        self,
+        local_repo: Optional[LocalVectorRepository] = None,
+        vertex_repo: Optional[VectorRepository] = None,
+    ):
+        """Initialize with either or both backends."""
+        if local_repo is None and vertex_repo is None:
+            raise ValueError("At least one vector search backend is required")
+        self.local_repo = local_repo
+        self.vertex_repo = vertex_repo
+
+    def find_neighbors(
+        self,
+        query_embedding: List[float],
+        num_neighbors: int = 100,
+        user_id: Optional[str] = None,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find nearest neighbors, locally when the tenant is small enough.
+
+        Returns:
+            List of (chunk_id, distance) tuples
+        """
+        if self.local_repo is not None:
+            neighbors = self.local_repo.find_neighbors(
+                query_embedding,
+                num_neighbors=num_neighbors,
+                user_id=user_id,
+                document_set_version=document_set_version,
+                exclude_document_ids=exclude_document_ids,
+            )
+            if neighbors is not None:
+                return neighbors
+
+        if self.vertex_repo is None:
+            # Local-only mode (e.g. local development without a deployed index)
+            return []
+
+        return self.vertex_repo.find_neighbors(
+            query_embedding,
+            num_neighbors=num_neighbors,
+            user_id=user_id,
+            document_set_version=document_set_version,
+            exclude_document_ids=exclude_document_ids,
+        )
+
+    def remove_vectors(self, datapoint_ids: List[str]) -> None:
+        """Remove vectors from the Vertex AI index (local matrices are versioned)."""
+        if self.vertex_repo is not None:
+            self.vertex_repo.remove_vectors(datapoint_ids)
@@ -7,7 +7,7 @@ from google.cloud import firestore
 from app.models.auth import TokenData
 from app.utils.auth import get_current_user
 from app.repositories.firestore_repo import FirestoreRepository
-from app.config import Config
+from app.dependencies import get_firestore_repo
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
@@ -33,11 +33,6 @@ class MessageResponse(BaseModel):
     sources: List[dict] = []
 
 
-def get_firestore_repo(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get FirestoreRepository instance."""
-    return FirestoreRepository(project_id=config.project_id)
-
-
 @router.get("", response_model=List[ChatResponse])
 async def get_chats(
     current_user: TokenData = Depends(get_current_user),
@@ -139,18 +134,17 @@ async def delete_chat(
     if chat.get("user_id") != current_user.uid:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    # Delete all messages
+    # Delete all messages (any number; the old single batch failed past 500)
     messages_query = firestore_repo.db.collection("messages").where(
         filter=firestore.FieldFilter("chat_id", "==", chat_id)
     )
+    result = firestore_repo.bulk_delete(
+        msg_doc.reference for msg_doc in messages_query.stream()
+    )
+    if result.failed:
+        raise HTTPException(status_code=500, detail="Failed to delete chat messages")
 
-    batch = firestore_repo.db.batch()
-    for msg_doc in messages_query.stream():
-        batch.delete(msg_doc.reference)
-
-    # Delete chat
-    batch.delete(firestore_repo.db.collection("chats").document(chat_id))
-
-    batch.commit()
+    # Delete chat last, so a failed delete can be retried
+    firestore_repo.delete_chat(chat_id)
 
     return {"message": "Chat deleted successfully"}
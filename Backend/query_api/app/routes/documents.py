@@ -1,36 +1,41 @@
 """Document management endpoints."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
 from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from datetime import datetime, timedelta
+import hashlib
 import uuid
 import io
 
 from google.cloud import storage, firestore
 from google.cloud.firestore_v1 import Increment
 
+from app.config import Config
 from app.models.auth import TokenData
 from app.utils.auth import get_current_user
 from app.utils.user_profile import ensure_user_profile
 from app.repositories.firestore_repo import FirestoreRepository
-from app.config import Config
+from app.repositories.vector_repo import VectorRepository
+from app.repositories.lexical_repo import LexicalRepository
+from app.dependencies import (
+    get_config,
+    get_firestore_client,
+    get_firestore_repo,
+    get_lexical_repo,
+    get_storage_client,
+    get_vertex_vector_repo,
+)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 # Rate limiting
 limiter = Limiter(key_func=get_remote_address)
 
-
-def get_storage_client(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Storage client."""
-    return storage.Client(project=config.project_id)
-
-
-def get_firestore_client(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Firestore client."""
-    return firestore.Client(project=config.project_id)
+# Document AI checkpoints written by the ingestion function, per PDF hash
+# (keep in sync with ingestion_function/modules/docai_checkpoint.py)
+DOCAI_CHECKPOINT_PREFIX = "docai/checkpoints"
 
 
 @router.post("/upload")
@@ -41,21 +46,22 @@ async def upload_document(
     current_user: TokenData = Depends(get_current_user),
     storage_client: storage.Client = Depends(get_storage_client),
     db: firestore.Client = Depends(get_firestore_client),
+    firestore_repo: FirestoreRepository = Depends(get_firestore_repo),
 ):
     """
     Upload a PDF document to Cloud Storage.
 
     - Ensures user profile exists
     - Validates PDF format
+    - Creates Firestore metadata (with a SHA-256 content fingerprint)
     - Uploads to GCS bucket (encrypted at rest)
-    - Creates Firestore metadata
-    - Triggers Cloud Function for processing
+    - Triggers Cloud Function for processing (a re-upload of an already
+      processed PDF is aliased to it instead of being processed again)
     - Logs PHI upload (HIPAA §164.312(b) - Audit Controls)
     """
     from app.utils.hipaa_audit import HIPAAAuditLogger
 
     # Ensure user profile exists (creates if needed)
-    firestore_repo = FirestoreRepository(project_id=db.project)
     await ensure_user_profile(current_user, firestore_repo)
 
     if not file.filename.endswith(".pdf"):
@@ -65,12 +71,7 @@ async def upload_document(
     document_id = str(uuid.uuid4())
     blob_name = f"{user_id}/{document_id}_{file.filename}"
 
-    # Upload to GCS
-    bucket = storage_client.bucket("ccai-medrag-patient-uploads")
-    blob = bucket.blob(blob_name)
     content = await file.read()
-    blob.upload_from_string(content, content_type="application/pdf")
-
     gcs_path = f"gs://ccai-medrag-patient-uploads/{blob_name}"
     now_iso = datetime.now().isoformat()
 
@@ -83,13 +84,26 @@ async def upload_document(
         "gcs_path": gcs_path,
         "uploaded_at": now_iso,
         "file_size": len(content),
+        "content_sha256": hashlib.sha256(content).hexdigest(),
         "page_count": 0,
         "processing_status": "pending",
         "created_at": now_iso,
         "updated_at": now_iso,
     }
 
-    db.collection("documents").document(document_id).set(document_metadata)
+    # Metadata is written before the upload so the processing function
+    # (triggered by the upload) always finds the record
+    doc_ref = db.collection("documents").document(document_id)
+    doc_ref.set(document_metadata)
+
+    # Upload to GCS
+    bucket = storage_client.bucket("ccai-medrag-patient-uploads")
+    blob = bucket.blob(blob_name)
+    try:
+        blob.upload_from_string(content, content_type="application/pdf")
+    except Exception:
+        doc_ref.delete()
+        raise
 
     # Update user stats
     try:
@@ -99,6 +113,9 @@ async def upload_document(
     except Exception:
         pass  # Non-critical
 
+    # Document set changed: invalidate cached answers for this user
+    firestore_repo.bump_document_set_version(user_id)
+
     # HIPAA Audit: Log PHI upload
     audit_logger = HIPAAAuditLogger(db)
     audit_logger.log_phi_access(
@@ -139,6 +156,46 @@ async def list_documents(
     return documents
 
 
+@router.get("/status")
+async def get_document_statuses(
+    current_user: TokenData = Depends(get_current_user),
+    db: firestore.Client = Depends(get_firestore_client),
+):
+    """
+    Get processing progress of the current user's documents.
+
+    A lightweight alternative to /documents/list for polling while
+    documents are processing: only status fields are read (no summaries).
+
+    Returns:
+        Per document: processing_status, progress (stage, ocr_done,
+        chunks_persisted, vectors_upserted, vectors_total), summary_status
+    """
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    docs_ref = (
+        db.collection("documents")
+        .where(filter=FieldFilter("user_id", "==", current_user.uid))
+        .order_by("created_at", direction=firestore.Query.DESCENDING)
+        .select(["processing_status", "progress", "summary_status", "updated_at"])
+    )
+
+    documents = []
+    for doc in docs_ref.stream():
+        doc_data = doc.to_dict() or {}
+        documents.append(
+            {
+                "document_id": doc.id,
+                "processing_status": doc_data.get("processing_status"),
+                "progress": doc_data.get("progress"),
+                "summary_status": doc_data.get("summary_status"),
+                "updated_at": doc_data.get("updated_at"),
+            }
+        )
+
+    return {"documents": documents}
+
+
 @router.get("/{document_id}")
 async def get_document(
     document_id: str,
@@ -285,6 +342,10 @@ async def delete_document(
     current_user: TokenData = Depends(get_current_user),
     storage_client: storage.Client = Depends(get_storage_client),
     db: firestore.Client = Depends(get_firestore_client),
+    firestore_repo: FirestoreRepository = Depends(get_firestore_repo),
+    vector_repo: Optional[VectorRepository] = Depends(get_vertex_vector_repo),
+    lexical_repo: LexicalRepository = Depends(get_lexical_repo),
+    config: Config = Depends(get_config),
 ):
     """
     HIPAA-compliant deletion of document and ALL associated PHI.
@@ -292,14 +353,19 @@ async def delete_document(
     Deletes:
     - Document metadata (including summary - contains PHI)
     - PDF file from Cloud Storage (full PHI)
+    - Document AI checkpoints of the PDF (full OCR text), unless another
+      document record has the same content
     - All chunks from NEW subcollection (documents/{id}/chunks)
     - All chunks from OLD collection (chunks - backward compat)
     - All vector embeddings from Vertex AI Vector Search
+    - Chunk embedding cache entries computed from the document
+    - Cached summary section notes (documents/{id}/summary_sections)
+    - Keyword search postings for the document
     - Related chat messages (prevent PHI leakage)
-    """
-    from app.repositories.vector_repo import VectorRepository
-    from app.config import Config
 
+    If duplicate uploads alias this document, its chunks, vectors and
+    postings are handed over to the oldest alias instead of being deleted.
+    """
     # 1. Get document to verify ownership (HIPAA access control)
     doc_ref = db.collection("documents").document(document_id)
     doc = doc_ref.get()
@@ -313,49 +379,71 @@ async def delete_document(
 
     chunk_ids = []
 
-    # 2. Delete chunks from NEW subcollection (documents/{id}/chunks) - CRITICAL FIX
-    chunks_subcollection = doc_ref.collection("chunks")
-    batch = db.batch()
-    batch_count = 0
+    # 1b. Duplicate uploads still use this document's chunks: re-point them
+    # (and the postings) to the oldest alias rather than deleting them
+    promoted_id = None
+    postings_reassigned = True
+    if not doc_data.get("alias_of"):
+        promoted_id = firestore_repo.promote_alias(
+            document_id, firestore_repo.get_document_aliases(document_id)
+        )
+        if promoted_id:
+            try:
+                lexical_repo.reassign_document(document_id, promoted_id)
+            except Exception as e:
+                postings_reassigned = False
+                print(f"Keyword postings reassignment warning: {e}")
 
-    for chunk_doc in chunks_subcollection.stream():
+    # 2. Collect chunks from NEW subcollection (documents/{id}/chunks) - CRITICAL FIX
+    chunk_refs = []
+    for chunk_doc in doc_ref.collection("chunks").stream():
         chunk_ids.append(chunk_doc.id)
-        batch.delete(chunk_doc.reference)
-        batch_count += 1
+        chunk_refs.append(chunk_doc.reference)
 
-        if batch_count >= 500:  # Firestore batch limit
-            batch.commit()
-            batch = db.batch()
-            batch_count = 0
+    # 3. Collect chunks from OLD collection (backward compatibility; already
+    # re-pointed if an alias was promoted)
+    old_chunks_ref = db.collection("chunks").where("document_id", "==", document_id)
+    seen_chunk_ids = set(chunk_ids)
+    for chunk in old_chunks_ref.stream():
+        if chunk.id not in seen_chunk_ids:
+            chunk_ids.append(chunk.id)
+        chunk_refs.append(chunk.reference)
+
+    # 3b. Collect chunk embedding cache entries computed from this document
+    # and its cached summary section notes (both PHI; a promoted alias keeps
+    # its copy of the summary and just misses the caches)
+    chunk_refs.extend(firestore_repo.get_embedding_cache_refs(current_user.uid, document_id))
+    chunk_refs.extend(
+        section.reference for section in doc_ref.collection("summary_sections").stream()
+    )
 
-    if batch_count > 0:
-        batch.commit()
+    # Delete both sets of chunks (and the cached data) in parallel batches
+    # (failures are raised in step 7, once the remaining cleanup has run)
+    delete_result = firestore_repo.bulk_delete(chunk_refs)
 
-    # 3. Delete chunks from OLD collection (backward compatibility)
-    old_chunks_ref = db.collection("chunks").where("document_id", "==", document_id)
-    old_chunks = list(old_chunks_ref.stream())
-
-    if old_chunks:
-        batch = db.batch()
-        for chunk in old_chunks:
-            if chunk.id not in chunk_ids:
-                chunk_ids.append(chunk.id)
-            batch.delete(chunk.reference)
-        batch.commit()
-
-    # 4. Delete vectors from Vertex AI Vector Search
-    if chunk_ids:
+    # 4. Delete vectors from Vertex AI Vector Search (the local exact-search
+    # backend reads embeddings from the chunks deleted above, so with
+    # VECTOR_BACKEND=local there is no index to clean up)
+    if chunk_ids and vector_repo is not None:
         try:
-            config = Config.from_env()
-            vector_repo = VectorRepository(
-                index_endpoint=config.index_endpoint,
-                deployed_index_id=config.deployed_index_id,
-                index_id=config.index_id,
-            )
             vector_repo.remove_vectors(chunk_ids)
         except Exception as e:
             print(f"Vector deletion warning: {e}")
 
+    # 4b. Delete keyword postings (contain chunk terms, i.e. PHI). If they could
+    # not be handed over, the promoted alias's keyword search still uses them
+    # (they point at its chunks), so keep them
+    if postings_reassigned:
+        try:
+            lexical_repo.delete_document(document_id)
+        except Exception as e:
+            print(f"Keyword postings deletion warning: {e}")
+    else:
+        print(
+            f"Warning: Keeping keyword postings of {document_id}; "
+            f"they still serve its promoted alias {promoted_id}"
+        )
+
     # 5. Delete PDF from Cloud Storage (contains full PHI)
     gcs_path = doc_data.get("gcs_path", "")
     if gcs_path.startswith("gs://"):
@@ -369,8 +457,28 @@ async def delete_document(
             except Exception as e:
                 print(f"Storage deletion warning: {e}")
 
+    # 5b. Delete Document AI checkpoints (OCR output, full PHI). They are keyed
+    # by PDF content, so keep them while another upload of the same PDF exists
+    content_sha256 = doc_data.get("content_sha256")
+    if content_sha256 and not firestore_repo.content_shared_by_other_documents(
+        content_sha256, document_id
+    ):
+        if config.artifact_bucket:
+            try:
+                bucket = storage_client.bucket(config.artifact_bucket)
+                for blob in bucket.list_blobs(
+                    prefix=f"{DOCAI_CHECKPOINT_PREFIX}/{content_sha256}/"
+                ):
+                    blob.delete()
+            except Exception as e:
+                print(f"Checkpoint deletion warning: {e}")
+        else:
+            print("Checkpoint deletion warning: ARTIFACT_BUCKET is not set")
+
     # 6. Delete chat messages referencing this document (prevent PHI leakage)
+    message_failures = 0
     try:
+        message_refs = []
         chats_ref = db.collection("chats").where("user_id", "==", current_user.uid)
         for chat_doc in chats_ref.stream():
             messages_ref = db.collection("messages").where("chat_id", "==", chat_doc.id)
@@ -378,13 +486,25 @@ async def delete_document(
                 msg_data = msg_doc.to_dict()
                 sources = msg_data.get("sources", [])
                 if any(s.get("document_id") == document_id for s in sources):
-                    msg_doc.reference.delete()
+                    message_refs.append(msg_doc.reference)
+        message_failures = len(firestore_repo.bulk_delete(message_refs).failed)
     except Exception as e:
         print(f"Chat cleanup warning: {e}")
 
-    # 7. Delete document metadata (includes summary with PHI)
+    # 7. Delete document metadata (includes summary with PHI). Kept if any
+    # chunk or message survived, so the delete can be retried: without the
+    # record, the leftover PHI could no longer be found
+    if delete_result.failed:
+        print(f"ERROR: {len(delete_result.failed)} chunks of {document_id} not deleted")
+        raise HTTPException(status_code=500, detail="Failed to delete document chunks")
+    if message_failures:
+        print(f"ERROR: {message_failures} chat messages citing {document_id} not deleted")
+        raise HTTPException(status_code=500, detail="Failed to delete related chat messages")
     doc_ref.delete()
 
+    # Document set changed: invalidate cached answers (they may cite this document)
+    firestore_repo.bump_document_set_version(current_user.uid)
+
     # 8. Update user's document count
     user_ref = db.collection("users").document(current_user.uid)
     user_doc = user_ref.get()
@@ -397,5 +517,6 @@ async def delete_document(
         "message": "Document and ALL associated PHI deleted successfully",
         "document_id": document_id,
         "chunks_deleted": len(chunk_ids),
+        "chunks_reassigned_to": promoted_id,
         "hipaa_compliant": True,
     }
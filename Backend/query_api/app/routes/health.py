@@ -1,10 +1,16 @@
 """Health check endpoints."""
 from fastapi import APIRouter
 
+from app.utils.embeddings import get_embedding_cache_stats
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "clearchartai-query-api"}
+    return {
+        "status": "healthy",
+        "service": "clearchartai-query-api",
+        "embedding_cache": get_embedding_cache_stats(),
+    }
@@ -8,7 +8,7 @@ import uuid
 from app.models.auth import TokenData
 from app.utils.auth import get_current_user
 from app.repositories.firestore_repo import FirestoreRepository
-from app.config import Config
+from app.dependencies import get_firestore_repo
 from google.cloud import firestore
 
 router = APIRouter(prefix="/notes", tags=["notes"])
@@ -44,11 +44,6 @@ class NoteResponse(BaseModel):
     chat_name: Optional[str] = None
 
 
-def get_firestore_repo(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get FirestoreRepository instance."""
-    return FirestoreRepository(project_id=config.project_id)
-
-
 @router.post("", response_model=NoteResponse)
 async def create_note(
     note_request: CreateNoteRequest,
@@ -10,21 +10,11 @@ from app.models.auth import TokenData, ProfileUpdateRequest
 from app.utils.auth import get_current_user
 from app.utils.user_profile import ensure_user_profile
 from app.repositories.firestore_repo import FirestoreRepository
-from app.config import Config
+from app.dependencies import get_firestore_client, get_firestore_repo
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 
 
-def get_firestore_client(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Firestore client."""
-    return firestore.Client(project=config.project_id)
-
-
-def get_firestore_repo(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Firestore repository."""
-    return FirestoreRepository(project_id=config.project_id)
-
-
 @router.get("")
 async def get_user_profile(
     current_user: TokenData = Depends(get_current_user),
@@ -1,5 +1,6 @@
 """Query endpoints for medical RAG."""
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -9,8 +10,7 @@ from app.utils.auth import get_current_user
 from app.utils.user_profile import ensure_user_profile
 from app.services.query_service import QueryService
 from app.repositories.firestore_repo import FirestoreRepository
-from app.repositories.vector_repo import VectorRepository
-from app.config import Config
+from app.dependencies import get_firestore_repo, get_query_service
 
 router = APIRouter(prefix="/query", tags=["query"])
 
@@ -18,16 +18,6 @@ router = APIRouter(prefix="/query", tags=["query"])
 limiter = Limiter(key_func=get_remote_address)
 
 
-def get_query_service(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get QueryService instance."""
-    firestore_repo = FirestoreRepository(project_id=config.project_id)
-    vector_repo = VectorRepository(
-        index_endpoint=config.index_endpoint,
-        deployed_index_id=config.deployed_index_id,
-    )
-    return QueryService(firestore_repo=firestore_repo, vector_repo=vector_repo)
-
-
 @router.post("", response_model=QueryResponse)
 @limiter.limit("100/minute")
 async def query_endpoint(
@@ -35,11 +25,7 @@ async def query_endpoint(
     query_request: QueryRequest,
     current_user: TokenData = Depends(get_current_user),
     query_service: QueryService = Depends(get_query_service),
-    firestore_repo: FirestoreRepository = Depends(
-        lambda config=Depends(lambda: Config.from_env()): FirestoreRepository(
-            project_id=config.project_id
-        )
-    ),
+    firestore_repo: FirestoreRepository = Depends(get_firestore_repo),
 ):
     """
     Process a medical query using RAG.
@@ -53,7 +39,7 @@ async def query_endpoint(
     # Ensure user profile exists (creates if needed)
     await ensure_user_profile(current_user, firestore_repo)
 
-    result = query_service.process_query(
+    result = await query_service.process_query(
         question=query_request.question,
         user_id=current_user.uid,
         chat_id=query_request.chat_id,
@@ -62,3 +48,42 @@ async def query_endpoint(
     )
 
     return QueryResponse(**result)
+
+
+@router.post("/stream")
+@limiter.limit("100/minute")
+async def query_stream_endpoint(
+    request: Request,
+    query_request: QueryRequest,
+    current_user: TokenData = Depends(get_current_user),
+    query_service: QueryService = Depends(get_query_service),
+    firestore_repo: FirestoreRepository = Depends(get_firestore_repo),
+):
+    """
+    Process a medical query using RAG and stream the answer (server-sent events).
+
+    Events:
+    - sources: retrieved sources and chat_id, sent as soon as retrieval finishes
+    - token: incremental answer text as Gemini generates it
+    - done: stream complete; the full answer has been saved to chat history
+    - error: generation failed after streaming started
+    """
+    # Ensure user profile exists (creates if needed)
+    await ensure_user_profile(current_user, firestore_repo)
+
+    events = await query_service.stream_query(
+        question=query_request.question,
+        user_id=current_user.uid,
+        chat_id=query_request.chat_id,
+        top_k=query_request.top_k,
+        request=request,
+    )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering so tokens flush immediately
+        },
+    )
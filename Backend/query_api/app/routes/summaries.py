@@ -7,16 +7,11 @@ from google.cloud import firestore
 
 from app.models.auth import TokenData
 from app.utils.auth import get_current_user
-from app.config import Config
+from app.dependencies import get_firestore_client
 
 router = APIRouter(prefix="/documents", tags=["summaries"])
 
 
-def get_firestore_client(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Firestore client."""
-    return firestore.Client(project=config.project_id)
-
-
 @router.get("/summaries")
 async def get_document_summaries(
     current_user: TokenData = Depends(get_current_user),
@@ -46,6 +41,7 @@ async def get_document_summaries(
                 "filename": doc_data.get("filename"),
                 "upload_date": doc_data.get("created_at"),
                 "summary": doc_data.get("summary"),
+                "summary_status": doc_data.get("summary_status"),
                 "processing_status": doc_data.get("processing_status"),
                 "chunk_count": doc_data.get("chunk_count", 0),
             }
@@ -85,6 +81,7 @@ async def get_document_summary(
         "id": doc.id,
         "filename": doc_data.get("filename"),
         "summary": doc_data.get("summary"),
+        "summary_status": doc_data.get("summary_status"),
         "summary_generated_at": doc_data.get("summary_generated_at"),
         "chunk_count": doc_data.get("chunk_count", 0),
         "processing_status": doc_data.get("processing_status"),
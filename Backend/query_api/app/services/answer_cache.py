@@ -0,0 +1,133 @@
+"""Per-user semantic answer cache."""
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import threading
+import time
+
+# Cosine similarity between rewritten-question embeddings to count as a repeat
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+ANSWER_CACHE_MAX_ENTRIES_PER_USER = 50
+ANSWER_CACHE_MAX_USERS = 2000
+ANSWER_CACHE_TTL_SECONDS = 24 * 3600
+
+
+@dataclass
+class CachedAnswer:
+    """A generated answer and the context it was generated from."""
+
+    embedding: List[float]
+    answer: str
+    sources: List[Dict[str, Any]]
+    document_set_version: int
+    expires_at: float
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length so cosine similarity is a dot product."""
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else list(vector)
+
+
+class AnswerCache:
+    """
+    In-process cache of answers, keyed by user and question embedding.
+
+    An entry is reused when the new (rewritten) question's embedding is at
+    least ``threshold`` cosine-similar to a cached one AND the user's
+    document-set version is unchanged. The version is bumped whenever the
+    user's documents change (upload, delete, ingestion completion), so an
+    answer is never served from a stale set of documents.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        max_entries_per_user: int = ANSWER_CACHE_MAX_ENTRIES_PER_USER,
+        max_users: int = ANSWER_CACHE_MAX_USERS,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+    ):
+        """Initialize an empty cache."""
+        self.threshold = threshold
+        self.max_entries_per_user = max_entries_per_user
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[str, List[CachedAnswer]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self, user_id: str, embedding: List[float], document_set_version: int
+    ) -> Optional[CachedAnswer]:
+        """Return the most similar fresh entry above the threshold, if any."""
+        query = _normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._users.get(user_id)
+            if entries is None:
+                self.misses += 1
+                return None
+
+            # Drop entries from older document sets or past their TTL
+            entries[:] = [
+                e
+                for e in entries
+                if e.document_set_version == document_set_version and e.expires_at > now
+            ]
+            self._users.move_to_end(user_id)
+
+            best, best_score = None, self.threshold
+            for entry in entries:
+                score = sum(a * b for a, b in zip(query, entry.embedding))
+                if score >= best_score:
+                    best, best_score = entry, score
+
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def store(
+        self,
+        user_id: str,
+        embedding: List[float],
+        document_set_version: int,
+        answer: str,
+        sources: List[Dict[str, Any]],
+    ) -> None:
+        """Cache an answer for the user's current document-set version."""
+        entry = CachedAnswer(
+            embedding=_normalize(embedding),
+            answer=answer,
+            sources=sources,
+            document_set_version=document_set_version,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            entries = self._users.setdefault(user_id, [])
+            entries.append(entry)
+            del entries[: -self.max_entries_per_user]
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of cached users."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "users": len(self._users)}
+
+
+# Global answer cache (shared by all requests in this process)
+_answer_cache: AnswerCache = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get or initialize the process-wide answer cache (singleton pattern)."""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
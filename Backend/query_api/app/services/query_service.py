@@ -1,29 +1,75 @@
 """Query processing business logic."""
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Awaitable, List, Optional, Set, Union
+import asyncio
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 
 from vertexai.generative_models import GenerativeModel, GenerationConfig
 from fastapi import HTTPException, Request
 
-from app.repositories.firestore_repo import FirestoreRepository
+from app.repositories.async_firestore_repo import AsyncFirestoreRepository
+from app.repositories.lexical_repo import LexicalRepository
 from app.repositories.vector_repo import VectorRepository
-from app.utils.embeddings import get_embedding
-from app.utils.hipaa_audit import HIPAAAuditLogger
+from app.repositories.vector_router import VectorSearchRouter
+from app.services.answer_cache import AnswerCache, get_answer_cache
+from app.utils.embeddings import get_embedding_async
+from app.utils.hipaa_audit import AsyncHIPAAAuditLogger
+from app.utils.ranking import reciprocal_rank_fusion
+from app.utils.sse import format_sse
+from app.utils.timing import StageTimer
+
+# Candidates requested from the shared index when results are filtered by
+# ownership in Python (untagged datapoints, orphaned vectors from cleanup).
+UNFILTERED_NUM_NEIGHBORS = 200
+
+# With tenant restricts the index only returns the user's own vectors, so a
+# small headroom over top_k only has to absorb orphaned vectors.
+TENANT_NEIGHBOR_HEADROOM = 2
+
+# Shared deadline for the concurrent pre-retrieval Firestore lookups
+PRE_RETRIEVAL_DEADLINE_SECONDS = 5.0
+
+# Keyword (BM25) candidates fused with the vector results, per requested chunk
+LEXICAL_RESULTS_PER_CHUNK = 3
+
+
+@dataclass
+class RetrievedContext:
+    """Result of the retrieval half of the RAG pipeline."""
+
+    chat_id: str
+    chunks: List[str]
+    sources: List[Dict[str, Any]]
+    query_embedding: List[float]
+    document_set_version: int
+    cached_answer: Optional[str] = None
 
 
 class QueryService:
-    """Service for processing user queries with RAG."""
+    """
+    Service for processing user queries with RAG.
+
+    All I/O is non-blocking: Firestore goes through AsyncFirestoreRepository,
+    Gemini through generate_content_async, and the synchronous embedding and
+    Vector Search SDK calls are offloaded to worker threads.
+    """
 
     def __init__(
         self,
-        firestore_repo: FirestoreRepository,
-        vector_repo: VectorRepository,
+        firestore_repo: AsyncFirestoreRepository,
+        vector_repo: Union[VectorRepository, VectorSearchRouter],
         llm_model_name: str = "gemini-2.0-flash-exp",
+        tenant_filter: bool = False,
+        answer_cache: Optional[AnswerCache] = None,
+        lexical_repo: Optional[LexicalRepository] = None,
     ):
-        """Initialize query service."""
+        """Initialize query service (pass lexical_repo to enable hybrid retrieval)."""
         self.firestore_repo = firestore_repo
         self.vector_repo = vector_repo
+        self.lexical_repo = lexical_repo
+        self.tenant_filter = tenant_filter
+        self.answer_cache = answer_cache or get_answer_cache()
 
         # Configure generation parameters
         generation_config = GenerationConfig(
@@ -34,7 +80,7 @@ class QueryService:
 
         self.llm = GenerativeModel(llm_model_name, generation_config=generation_config)
 
-    def process_query(
+    async def process_query(
         self,
         question: str,
         user_id: str,
@@ -58,75 +104,320 @@ class QueryService:
         Raises:
             HTTPException: If processing fails or no documents found
         """
-        # 1. Check for processing documents
-        self._check_processing_documents(user_id)
+        # 1-6. Resolve chat, retrieve and filter chunks (or hit the answer cache)
+        context = await self._retrieve_context(question, user_id, chat_id, top_k)
+
+        # 7. Generate answer with LLM
+        answer = context.cached_answer
+        if answer is None:
+            answer = await self._generate_answer(question, context.chunks)
+            self._cache_answer(user_id, context, answer)
+
+        # 8-10. Persist messages, update chat metadata, HIPAA audit
+        await self._record_exchange(
+            context.chat_id, user_id, question, answer, context.sources, request
+        )
+
+        return {"answer": answer, "sources": context.sources, "chat_id": context.chat_id}
+
+    async def stream_query(
+        self,
+        question: str,
+        user_id: str,
+        chat_id: Optional[str] = None,
+        top_k: int = 10,
+        request: Optional[Request] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Process a user query and stream the answer as server-sent events.
 
-        # 2. Get or create chat
-        chat = self._get_or_create_chat(user_id, chat_id)
-        chat_id = chat["chat_id"]
+        Retrieval runs eagerly, so "no documents" and "still processing" errors
+        are raised as HTTPException before any bytes are sent. The returned
+        iterator then emits a ``sources`` event, one ``token`` event per
+        Gemini stream chunk, and a final ``done`` event. The full answer is
+        persisted only after the stream completes.
 
-        # 3. Enhance query with chat history context
-        enhanced_question = self._enhance_query(question, chat_id)
+        Args:
+            question: User's question
+            user_id: User ID
+            chat_id: Optional chat session ID
+            top_k: Number of chunks to retrieve
+            request: FastAPI request object (for audit logging)
 
-        # 4. Generate query embedding from enhanced question
-        query_embedding = get_embedding(enhanced_question)
+        Returns:
+            Async iterator of SSE-formatted strings
+
+        Raises:
+            HTTPException: If retrieval fails or no documents found
+        """
+        context = await self._retrieve_context(question, user_id, chat_id, top_k)
+        return self._stream_answer(context, user_id, question, request)
 
-        # 5. Search vector index
-        # Increased from 100 to 200 to handle orphaned vectors from cleanup
-        # This ensures we retrieve enough candidates to find valid chunks
-        neighbors = self.vector_repo.find_neighbors(
-            query_embedding=query_embedding, num_neighbors=200
+    async def _stream_answer(
+        self,
+        context: RetrievedContext,
+        user_id: str,
+        question: str,
+        request: Optional[Request],
+    ) -> AsyncIterator[str]:
+        """Yield SSE events for sources and answer tokens, then persist the exchange."""
+        chat_id, sources = context.chat_id, context.sources
+        yield format_sse("sources", {"chat_id": chat_id, "sources": sources})
+
+        if context.cached_answer is not None:
+            yield format_sse("token", {"text": context.cached_answer})
+            await self._record_exchange(
+                chat_id, user_id, question, context.cached_answer, sources, request
+            )
+            yield format_sse("done", {"chat_id": chat_id})
+            return
+
+        answer_parts = []
+        try:
+            responses = await self.llm.generate_content_async(
+                self._build_answer_prompt(question, context.chunks), stream=True
+            )
+            async for response in responses:
+                try:
+                    text = response.text
+                except ValueError:
+                    # Chunk without text parts (e.g. safety or finish metadata only)
+                    continue
+                if text:
+                    answer_parts.append(text)
+                    yield format_sse("token", {"text": text})
+        except Exception as e:
+            print(f"Answer streaming failed: {e}")
+            yield format_sse(
+                "error", {"detail": "Failed to generate answer. Please try again."}
+            )
+            return
+
+        answer = "".join(answer_parts)
+        self._cache_answer(user_id, context, answer)
+        await self._record_exchange(chat_id, user_id, question, answer, sources, request)
+        yield format_sse("done", {"chat_id": chat_id})
+
+    async def _retrieve_context(
+        self, question: str, user_id: str, chat_id: Optional[str], top_k: int
+    ) -> RetrievedContext:
+        """
+        Run the retrieval half of the RAG pipeline.
+
+        The independent pre-retrieval Firestore lookups (processing check,
+        chat lookup, chat history, document-set version) run concurrently
+        under one shared deadline.
+        The processing check stays in flight while the query is rewritten and
+        embedded, and a new chat is created while the vector search runs.
+        Per-stage timings are logged for every query.
+
+        Documents that are still processing, or whose ingestion failed midway
+        (possibly leaving partial chunks), are excluded from every search
+        backend, so the user's other documents stay queryable meanwhile.
+
+        If the answer cache holds an answer to an equivalent question for the
+        user's current document set, the vector search is skipped and the
+        cached answer and sources are returned in ``cached_answer``/``sources``.
+
+        Returns:
+            RetrievedContext with chat_id, chunk texts and sources
+
+        Raises:
+            HTTPException: If nothing relevant is found (409 instead of 404
+                when a document that is still processing may hold the answer)
+        """
+        timer = StageTimer()
+        deadline = asyncio.get_running_loop().time() + PRE_RETRIEVAL_DEADLINE_SECONDS
+
+        # 1. Look up documents still processing or failed, which retrieval
+        # excludes (awaited together with the embedding)
+        processing_check = asyncio.create_task(
+            timer.measure(
+                "processing_check", self.firestore_repo.get_incomplete_documents(user_id)
+            )
         )
+        create_chat_task = None
 
-        if not neighbors:
-            raise HTTPException(status_code=404, detail="No relevant documents found")
+        try:
+            # 2. Look up chat, its recent history and the document-set version
+            chat, history, document_set_version = await self._with_deadline(
+                deadline,
+                asyncio.gather(
+                    timer.measure("chat_lookup", self._get_chat(user_id, chat_id)),
+                    timer.measure("history", self._get_history(chat_id)),
+                    timer.measure(
+                        "version_lookup",
+                        self.firestore_repo.get_document_set_version(user_id),
+                    ),
+                ),
+            )
+            if chat is None:
+                # Unknown or foreign chat: its history must not leak into the rewrite
+                history = []
+
+            # 3. Enhance query with chat history context
+            with timer.stage("enhance"):
+                enhanced_question = await self._enhance_query(question, history)
+
+            # 4. Generate query embedding while the processing check completes
+            query_embedding, incomplete_docs = await asyncio.gather(
+                timer.measure("embedding", get_embedding_async(enhanced_question)),
+                self._with_deadline(deadline, processing_check),
+            )
+            excluded = {doc["document_id"] for doc in incomplete_docs}
+
+            # 5. Search vector index (a new chat is created in the meantime)
+            if chat is None:
+                create_chat_task = asyncio.create_task(
+                    timer.measure(
+                        "create_chat",
+                        self.firestore_repo.create_chat(user_id=user_id, title="New Chat"),
+                    )
+                )
 
-        # 6. Retrieve and filter chunks from Firestore
-        chunks, sources = self._retrieve_user_chunks(neighbors, user_id, top_k)
+            cached = self.answer_cache.lookup(user_id, query_embedding, document_set_version)
+            if cached is not None:
+                if create_chat_task:
+                    chat = await create_chat_task
+                print("✓ Answer cache hit")
+                return RetrievedContext(
+                    chat_id=chat["chat_id"],
+                    chunks=[],
+                    sources=cached.sources,
+                    query_embedding=query_embedding,
+                    document_set_version=document_set_version,
+                    cached_answer=cached.answer,
+                )
 
-        if not chunks:
-            raise HTTPException(
-                status_code=404,
-                detail="No documents found for your account. Please upload a medical document first.",
+            # Vector and keyword search run concurrently; their rankings are fused
+            neighbors, keyword_hits = await asyncio.gather(
+                timer.measure(
+                    "vector_search",
+                    self._search_vectors(
+                        query_embedding, user_id, top_k, document_set_version, excluded
+                    ),
+                ),
+                timer.measure(
+                    "keyword_search",
+                    self._search_keywords(
+                        enhanced_question, user_id, top_k, document_set_version, excluded
+                    ),
+                ),
             )
+            with timer.stage("fuse"):
+                candidates, prefetched = await self._rank_candidates(
+                    neighbors, keyword_hits, user_id, top_k, excluded
+                )
 
-        # 7. Generate answer with LLM
-        answer = self._generate_answer(question, chunks)
+            if not candidates:
+                self._raise_if_processing(incomplete_docs)
+                raise HTTPException(status_code=404, detail="No relevant documents found")
 
-        # 8. Save messages to Firestore
-        self._save_messages(chat_id, user_id, question, answer, sources)
+            # 6. Retrieve and filter chunks from Firestore
+            with timer.stage("hydrate_chunks"):
+                chunks, sources = await self._retrieve_user_chunks(
+                    candidates, dict(neighbors), user_id, top_k, excluded, prefetched
+                )
+
+            if not chunks:
+                self._raise_if_processing(incomplete_docs)
+                raise HTTPException(
+                    status_code=404,
+                    detail="No documents found for your account. Please upload a medical document first.",
+                )
+
+            if create_chat_task:
+                chat = await create_chat_task
+        finally:
+            self._settle(processing_check)
+            if create_chat_task:
+                self._settle(create_chat_task)
+            print(f"⏱ Query retrieval stages: {timer.summary()}")
+
+        return RetrievedContext(
+            chat_id=chat["chat_id"],
+            chunks=chunks,
+            sources=sources,
+            query_embedding=query_embedding,
+            document_set_version=document_set_version,
+        )
 
-        # 9. Update chat metadata
-        self.firestore_repo.update_chat_timestamp(chat_id)
-        self.firestore_repo.increment_message_count(chat_id, count=2)
+    def _cache_answer(self, user_id: str, context: RetrievedContext, answer: str) -> None:
+        """Store a freshly generated answer in the answer cache."""
+        if answer:
+            self.answer_cache.store(
+                user_id,
+                context.query_embedding,
+                context.document_set_version,
+                answer,
+                context.sources,
+            )
 
-        # 10. HIPAA Audit: Log PHI access via query
+    @staticmethod
+    async def _with_deadline(deadline: float, awaitable: Awaitable[Any]) -> Any:
+        """Await within the shared pre-retrieval deadline (loop time)."""
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await awaitable
+        except TimeoutError:
+            raise HTTPException(
+                status_code=504,
+                detail="Loading your chat took too long. Please try again.",
+            )
+
+    @staticmethod
+    def _settle(task: asyncio.Task) -> None:
+        """Cancel a task that is no longer needed, or consume its exception."""
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+    async def _record_exchange(
+        self,
+        chat_id: str,
+        user_id: str,
+        question: str,
+        answer: str,
+        sources: List[Dict[str, Any]],
+        request: Optional[Request],
+    ) -> None:
+        """Save messages, update chat metadata and write the HIPAA audit entry."""
+        writes = [
+            # Save messages to Firestore
+            self._save_messages(chat_id, user_id, question, answer, sources),
+            # Update chat metadata
+            self.firestore_repo.update_chat_timestamp(chat_id),
+            self.firestore_repo.increment_message_count(chat_id, count=2),
+        ]
+
+        # HIPAA Audit: Log PHI access via query
         if request:
-            audit_logger = HIPAAAuditLogger(self.firestore_repo.db)
+            audit_logger = AsyncHIPAAAuditLogger(self.firestore_repo.db)
             document_ids = list(set(s.get("document_id") for s in sources if s.get("document_id")))
-            audit_logger.log_query(
-                user_id=user_id,
-                query_text=question,
-                documents_accessed=document_ids,
-                request=request,
+            writes.append(
+                audit_logger.log_query(
+                    user_id=user_id,
+                    query_text=question,
+                    documents_accessed=document_ids,
+                    request=request,
+                )
             )
 
-        return {"answer": answer, "sources": sources, "chat_id": chat_id}
+        # The writes are independent, so issue them concurrently
+        await asyncio.gather(*writes)
 
-    def _enhance_query(self, question: str, chat_id: str) -> str:
+    async def _enhance_query(self, question: str, messages: List[Dict[str, Any]]) -> str:
         """
         Enhance query with chat history context to improve retrieval.
 
         Args:
             question: Original user question
-            chat_id: Current chat session ID
+            messages: Recent chat history (see _get_history)
 
         Returns:
             Enhanced question with context
         """
-        # Get recent chat history (last 5 messages)
-        messages = self.firestore_repo.get_chat_messages(chat_id, limit=5)
-
         # If no history, return original question
         if not messages or len(messages) <= 1:
             return question
@@ -164,7 +455,7 @@ Instructions:
 Rewritten Question:"""
 
         try:
-            response = self.llm.generate_content(prompt)
+            response = await self.llm.generate_content_async(prompt)
             enhanced = response.text.strip()
             print(f"✓ Enhanced query: '{question}' → '{enhanced}'")
             return enhanced
@@ -172,10 +463,12 @@ Rewritten Question:"""
             print(f"Warning: Query enhancement failed, using original: {e}")
             return question
 
-    def _check_processing_documents(self, user_id: str) -> None:
-        """Check if user has documents still processing."""
-        processing_docs = self.firestore_repo.get_processing_documents(user_id)
-
+    @staticmethod
+    def _raise_if_processing(incomplete_docs: List[Dict[str, Any]]) -> None:
+        """Explain an empty result by a document that is still processing."""
+        processing_docs = [
+            doc for doc in incomplete_docs if doc.get("processing_status") != "failed"
+        ]
         if processing_docs:
             doc = processing_docs[0]
             doc_name = doc.get("title") or doc.get("filename", "your document")
@@ -184,51 +477,216 @@ Rewritten Question:"""
                 detail=f"Please wait - '{doc_name}' is still being processed. This usually takes 20-30 seconds. Try again in a moment!",
             )
 
-    def _get_or_create_chat(
+    async def _get_chat(
         self, user_id: str, chat_id: Optional[str]
-    ) -> Dict[str, Any]:
-        """Get existing chat or create new one."""
+    ) -> Optional[Dict[str, Any]]:
+        """Get an existing chat if it belongs to the user."""
         if chat_id:
-            chat = self.firestore_repo.get_chat(chat_id)
+            chat = await self.firestore_repo.get_chat(chat_id)
             if chat and chat.get("user_id") == user_id:
                 return chat
+        return None
 
-        # Create new chat
-        return self.firestore_repo.create_chat(user_id=user_id, title="New Chat")
+    async def _get_history(self, chat_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Get recent chat history (last 5 messages)."""
+        if not chat_id:
+            return []
+        return await self.firestore_repo.get_chat_messages(chat_id, limit=5)
 
-    def _retrieve_user_chunks(
-        self, neighbors: List[tuple], user_id: str, top_k: int
+    async def _search_vectors(
+        self,
+        query_embedding: List[float],
+        user_id: str,
+        top_k: int,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Set[str]] = None,
+    ) -> List[tuple]:
+        """Search the vector index, scoped to the user when restricts are enabled."""
+        # With restricts only the user's vectors come back; a shared index
+        # without them needs over-fetching so that enough candidates survive
+        # the ownership filter in _retrieve_user_chunks
+        if self.tenant_filter:
+            num_neighbors = top_k * TENANT_NEIGHBOR_HEADROOM
+        else:
+            num_neighbors = UNFILTERED_NUM_NEIGHBORS
+
+        # The vector search backends are synchronous; run them in a worker thread
+        return await asyncio.to_thread(
+            self.vector_repo.find_neighbors,
+            query_embedding=query_embedding,
+            num_neighbors=num_neighbors,
+            user_id=user_id,
+            document_set_version=document_set_version,
+            exclude_document_ids=exclude_document_ids,
+        )
+
+    async def _search_keywords(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        document_set_version: Optional[int] = None,
+        exclude_document_ids: Optional[Set[str]] = None,
+    ) -> List[tuple]:
+        """BM25 search over the user's chunks (empty when hybrid retrieval is off)."""
+        if self.lexical_repo is None:
+            return []
+
+        try:
+            return await asyncio.to_thread(
+                self.lexical_repo.search,
+                query,
+                user_id,
+                num_results=top_k * LEXICAL_RESULTS_PER_CHUNK,
+                document_set_version=document_set_version,
+                exclude_document_ids=exclude_document_ids,
+            )
+        except Exception as e:
+            # Keyword search only refines ranking; fall back to vectors alone
+            print(f"Warning: Keyword search failed: {e}")
+            return []
+
+    async def _rank_candidates(
+        self,
+        neighbors: List[tuple],
+        keyword_hits: List[tuple],
+        user_id: str,
+        top_k: int,
+        exclude_document_ids: Optional[Set[str]] = None,
+    ) -> tuple[List[str], Dict[str, Dict[str, Any]]]:
+        """
+        Order the candidates to hydrate, fusing keyword hits when there are any.
+
+        Without tenant restricts the shared index returns mostly other
+        tenants' chunks, and fusing that list as-is would leave BM25 alone to
+        decide the order. The vector candidates are then hydrated in ranked
+        order first, until as many of the user's own chunks as keyword hits
+        were requested are found, and only those enter the fusion. The
+        hydrated chunks are returned so they are not read twice.
+
+        Returns:
+            Tuple of (ranked chunk IDs, prefetched chunks by ID)
+        """
+        if not keyword_hits or self.tenant_filter:
+            return self._fuse_rankings(neighbors, keyword_hits), {}
+
+        depth = top_k * LEXICAL_RESULTS_PER_CHUNK
+        prefetched: Dict[str, Dict[str, Any]] = {}
+        async for chunk_id, chunk_data in self.firestore_repo.iter_chunks(
+            [chunk_id for chunk_id, _ in neighbors], window_size=max(depth, 1)
+        ):
+            if self._is_user_chunk(chunk_data, user_id, exclude_document_ids):
+                prefetched[chunk_id] = chunk_data
+                if len(prefetched) >= depth:
+                    break
+
+        owned_neighbors = [
+            (chunk_id, distance) for chunk_id, distance in neighbors if chunk_id in prefetched
+        ]
+        return self._fuse_rankings(owned_neighbors, keyword_hits), prefetched
+
+    @staticmethod
+    def _is_user_chunk(
+        chunk_data: Optional[Dict[str, Any]],
+        user_id: str,
+        exclude_document_ids: Optional[Set[str]] = None,
+    ) -> bool:
+        """Whether a hydrated chunk is the user's and its document is queryable."""
+        return bool(
+            chunk_data
+            and chunk_data.get("user_id") == user_id
+            and chunk_data.get("document_id") not in (exclude_document_ids or set())
+        )
+
+    @staticmethod
+    def _fuse_rankings(neighbors: List[tuple], keyword_hits: List[tuple]) -> List[str]:
+        """Combine vector and keyword rankings with reciprocal rank fusion."""
+        vector_ids = [chunk_id for chunk_id, _ in neighbors]
+        if not keyword_hits:
+            return vector_ids
+
+        keyword_ids = [chunk_id for chunk_id, _ in keyword_hits]
+        return [chunk_id for chunk_id, _ in reciprocal_rank_fusion([vector_ids, keyword_ids])]
+
+    async def _retrieve_user_chunks(
+        self,
+        chunk_ids: List[str],
+        distances: Dict[str, float],
+        user_id: str,
+        top_k: int,
+        exclude_document_ids: Optional[Set[str]] = None,
+        prefetched: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> tuple[List[str], List[Dict[str, Any]]]:
-        """Retrieve chunks from Firestore and filter by user_id."""
+        """
+        Retrieve chunks from Firestore and filter by user_id.
+
+        Candidates are hydrated in parallel get_all windows while keeping
+        their ranked order; hydration stops as soon as top_k owned chunks
+        have been collected. Keyword-only matches have no vector distance.
+        Chunks of documents that are still processing are skipped, and
+        chunks already in ``prefetched`` are not read again.
+        """
+        prefetched = prefetched or {}
         chunks = []
         sources = []
 
-        for chunk_id, distance in neighbors:
-            if len(chunks) >= top_k:
-                break
-
-            chunk_data = self.firestore_repo.get_chunk(chunk_id)
+        fetched = self.firestore_repo.iter_chunks(
+            [chunk_id for chunk_id in chunk_ids if chunk_id not in prefetched],
+            window_size=max(top_k, 1),
+        )
+        try:
+            async for chunk_id, chunk_data in self._merge_prefetched(
+                chunk_ids, prefetched, fetched
+            ):
+                if not self._is_user_chunk(chunk_data, user_id, exclude_document_ids):
+                    continue
 
-            if chunk_data and chunk_data.get("user_id") == user_id:
                 chunks.append(chunk_data["text"])
                 sources.append(
                     {
                         "id": chunk_id,
-                        "distance": distance,
+                        "distance": distances.get(chunk_id),
                         "metadata": chunk_data.get("metadata", {}),
                         "document_id": chunk_data.get("document_id"),
                     }
                 )
 
+                if len(chunks) >= top_k:
+                    break
+        finally:
+            await fetched.aclose()
+
         return chunks, sources
 
-    def _generate_answer(self, question: str, chunks: List[str]) -> str:
+    @staticmethod
+    async def _merge_prefetched(
+        chunk_ids: List[str],
+        prefetched: Dict[str, Dict[str, Any]],
+        fetched: AsyncIterator[tuple],
+    ) -> AsyncIterator[tuple]:
+        """Yield (chunk_id, chunk) in ranked order from prefetched or fetched chunks."""
+        for chunk_id in chunk_ids:
+            if chunk_id in prefetched:
+                yield chunk_id, prefetched[chunk_id]
+            else:
+                # fetched yields the remaining IDs in the same order
+                yield await anext(fetched)
+
+    async def _generate_answer(self, question: str, chunks: List[str]) -> str:
         """Generate answer using LLM with retrieved context."""
+        response = await self.llm.generate_content_async(
+            self._build_answer_prompt(question, chunks)
+        )
+        return response.text
+
+    @staticmethod
+    def _build_answer_prompt(question: str, chunks: List[str]) -> str:
+        """Build the answer prompt from the question and retrieved chunks."""
         context = "\n\n".join(
             [f"Chunk {i + 1}:\n{chunk}" for i, chunk in enumerate(chunks)]
         )
 
-        prompt = f"""You are a helpful medical assistant. Answer the question based ONLY on the provided medical document excerpts.
+        return f"""You are a helpful medical assistant. Answer the question based ONLY on the provided medical document excerpts.
 
 Question: {question}
 
@@ -244,10 +702,7 @@ Instructions:
 
 Answer:"""
 
-        response = self.llm.generate_content(prompt)
-        return response.text
-
-    def _save_messages(
+    async def _save_messages(
         self,
         chat_id: str,
         user_id: str,
@@ -267,7 +722,7 @@ Answer:"""
             "content": question,
             "timestamp": now_iso,
         }
-        self.firestore_repo.create_message(user_message)
+        await self.firestore_repo.create_message(user_message)
 
         # Save assistant message
         assistant_message = {
@@ -279,4 +734,4 @@ Answer:"""
             "timestamp": now_iso,
             "sources": sources,
         }
-        self.firestore_repo.create_message(assistant_message)
+        await self.firestore_repo.create_message(assistant_message)
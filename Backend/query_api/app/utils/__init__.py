@@ -1,5 +1,5 @@
 """Utility functions and middleware."""
-from .embeddings import get_embedding, get_embeddings_batch
+from .embeddings import get_embedding, get_embeddings_batch, get_embedding_async
 from .auth import verify_token, get_current_user
 
-__all__ = ["get_embedding", "get_embeddings_batch", "verify_token", "get_current_user"]
+__all__ = ["get_embedding", "get_embeddings_batch", "get_embedding_async", "verify_token", "get_current_user"]
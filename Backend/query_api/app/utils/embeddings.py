@@ -1,7 +1,23 @@
 """Embedding generation utilities."""
-from typing import List
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import re
+import threading
+import time
+
 from vertexai.language_models import TextEmbeddingModel
 
+EMBEDDING_MODEL_NAME = "text-embedding-004"
+
+# In-process query embedding cache
+EMBEDDING_CACHE_MAX_ENTRIES = 4096
+EMBEDDING_CACHE_TTL_SECONDS = 6 * 3600
+
 
 # Global embedding model (initialized once)
 _embedding_model: TextEmbeddingModel = None
@@ -11,10 +27,189 @@ def _get_embedding_model() -> TextEmbeddingModel:
     """Get or initialize the embedding model (singleton pattern)."""
     global _embedding_model
     if _embedding_model is None:
-        _embedding_model = TextEmbeddingModel.from_pretrained("text-embedding-004")
+        _embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
     return _embedding_model
 
 
+class EmbeddingCacheBackend(ABC):
+    """
+    Interface for an embedding cache shared between instances.
+
+    Implementations are consulted after the in-process cache misses and are
+    written to whenever the model is called. Keys are opaque hashes (see
+    EmbeddingCache.make_key), so no query text is ever stored.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the keys that are present and fresh."""
+
+    @abstractmethod
+    def set_many(self, entries: Dict[str, List[float]], ttl_seconds: float) -> None:
+        """Store vectors for the given keys."""
+
+
+class FirestoreEmbeddingBackend(EmbeddingCacheBackend):
+    """
+    Shared embedding cache stored in Firestore as packed float32 vectors.
+
+    Entries carry an ``expires_at`` timestamp, which the TTL policy in
+    firestore.indexes.json uses to delete expired entries.
+    """
+
+    def __init__(self, db, collection: str = "query_embedding_cache"):
+        """Initialize with a firestore.Client."""
+        self.db = db
+        self.collection = collection
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch entries in a single get_all round trip."""
+        if not keys:
+            return {}
+        refs = [self.db.collection(self.collection).document(key) for key in keys]
+        now = datetime.now(timezone.utc)
+        found = {}
+        for doc in self.db.get_all(refs):
+            if not doc.exists:
+                continue
+            data = doc.to_dict()
+            if data.get("expires_at") and data["expires_at"] < now:
+                continue
+            found[doc.id] = array("f", data["vector"]).tolist()
+        return found
+
+    def set_many(self, entries: Dict[str, List[float]], ttl_seconds: float) -> None:
+        """Write entries in one batch (best effort)."""
+        if not entries:
+            return
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        batch = self.db.batch()
+        for key, vector in entries.items():
+            batch.set(
+                self.db.collection(self.collection).document(key),
+                {"vector": array("f", vector).tobytes(), "expires_at": expires_at},
+            )
+        batch.commit()
+
+
+class EmbeddingCache:
+    """
+    Bounded in-process LRU cache with TTL for embedding vectors.
+
+    Thread-safe, since embeddings are computed in worker threads. An optional
+    shared backend lets several instances reuse each other's entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = EMBEDDING_CACHE_TTL_SECONDS,
+        backend: Optional[EmbeddingCacheBackend] = None,
+    ):
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> str:
+        """Build a cache key from whitespace-normalized text and the model name."""
+        normalized = re.sub(r"\s+", " ", text).strip()
+        return hashlib.sha256(f"{model_name}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for keys, consulting the shared backend on local misses."""
+        found = {}
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                    self.hits += 1
+                else:
+                    if entry:
+                        del self._entries[key]
+                    missing.append(key)
+
+        if missing and self.backend:
+            try:
+                shared = self.backend.get_many(missing)
+            except Exception as e:
+                print(f"Warning: Shared embedding cache read failed: {e}")
+                shared = {}
+            if shared:
+                self._store_local(shared)
+                found.update(shared)
+                missing = [key for key in missing if key not in shared]
+                with self._lock:
+                    self.shared_hits += len(shared)
+
+        with self._lock:
+            self.misses += len(missing)
+
+        return found
+
+    def set_many(self, entries: Dict[str, List[float]]) -> None:
+        """Store freshly computed vectors locally and in the shared backend."""
+        self._store_local(entries)
+        if self.backend:
+            try:
+                self.backend.set_many(entries, self.ttl_seconds)
+            except Exception as e:
+                print(f"Warning: Shared embedding cache write failed: {e}")
+
+    def _store_local(self, entries: Dict[str, List[float]]) -> None:
+        """Insert entries into the local LRU, evicting the oldest beyond max_entries."""
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, vector in entries.items():
+                self._entries[key] = (expires_at, vector)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+# Global embedding cache (shared by all requests in this process)
+_embedding_cache = EmbeddingCache()
+
+
+def configure_embedding_cache(
+    backend: Optional[EmbeddingCacheBackend] = None,
+    max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_seconds: float = EMBEDDING_CACHE_TTL_SECONDS,
+) -> EmbeddingCache:
+    """Replace the global embedding cache (e.g. to attach a shared backend)."""
+    global _embedding_cache
+    _embedding_cache = EmbeddingCache(
+        max_entries=max_entries, ttl_seconds=ttl_seconds, backend=backend
+    )
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters of the global embedding cache."""
+    return _embedding_cache.stats()
+
+
 def get_embedding(text: str) -> List[float]:
     """
     Generate embedding for a single text.
@@ -25,21 +220,52 @@ def get_embedding(text: str) -> List[float]:
     Returns:
         Embedding vector as list of floats
     """
-    model = _get_embedding_model()
-    response = model.get_embeddings([text])
-    return response[0].values
+    return get_embeddings_batch([text])[0]
+
+
+async def get_embedding_async(text: str) -> List[float]:
+    """
+    Generate embedding for a single text without blocking the event loop.
+
+    The Vertex AI SDK call is synchronous, so it runs in a worker thread.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Embedding vector as list of floats
+    """
+    return await asyncio.to_thread(get_embedding, text)
 
 
 def get_embeddings_batch(texts: List[str]) -> List[List[float]]:
     """
     Generate embeddings for multiple texts.
 
+    Each text is looked up in the embedding cache; only the misses are sent
+    to the model, in a single call.
+
     Args:
         texts: List of input texts
 
     Returns:
         List of embedding vectors
     """
-    model = _get_embedding_model()
-    response = model.get_embeddings(texts)
-    return [emb.values for emb in response]
+    cache = _embedding_cache
+    keys = [cache.make_key(text) for text in texts]
+    embeddings = cache.get_many(list(dict.fromkeys(keys)))
+
+    # One model input per distinct missing key
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in embeddings and key not in missing:
+            missing[key] = text
+
+    if missing:
+        model = _get_embedding_model()
+        response = model.get_embeddings(list(missing.values()))
+        computed = {key: emb.values for key, emb in zip(missing, response)}
+        cache.set_many(computed)
+        embeddings.update(computed)
+
+    return [embeddings[key] for key in keys]
@@ -3,6 +3,7 @@ HIPAA-compliant audit logging for PHI access tracking.
 
 Required by: 45 CFR §164.312(b) - Audit Controls
 """
+from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
 from datetime import datetime
 from google.cloud import firestore
@@ -10,14 +11,17 @@ from fastapi import Request
 import uuid
 
 
-class HIPAAAuditLogger:
-    """Audit logger for HIPAA compliance."""
+class _AuditRecordBuilder(ABC):
+    """
+    Audit record building shared by the sync and async loggers.
 
-    def __init__(self, db: firestore.Client):
-        """Initialize audit logger."""
-        self.db = db
-        self.collection = "audit_logs"
+    Subclasses implement log_phi_access; the helpers below return whatever
+    it returns (a log ID, or an awaitable of one for the async logger).
+    """
+
+    collection = "audit_logs"
 
+    @abstractmethod
     def log_phi_access(
         self,
         user_id: str,
@@ -27,22 +31,20 @@ class HIPAAAuditLogger:
         success: bool = True,
         request: Optional[Request] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        """
-        Log PHI access event.
-
-        Args:
-            user_id: User performing action
-            action: Action performed (view, create, update, delete, query, export)
-            resource_type: Type of resource (document, chunk, chat, user_profile)
-            resource_id: ID of resource accessed
-            success: Whether action succeeded
-            request: FastAPI request object (for IP, user agent)
-            metadata: Additional context
+    ):
+        """Write an audit log entry (see HIPAAAuditLogger.log_phi_access)."""
 
-        Returns:
-            Audit log ID
-        """
+    @staticmethod
+    def _build_entry(
+        user_id: str,
+        action: str,
+        resource_type: str,
+        resource_id: str,
+        success: bool,
+        request: Optional[Request],
+        metadata: Optional[Dict[str, Any]],
+    ) -> tuple[str, Dict[str, Any]]:
+        """Build an audit log entry. Returns (log_id, entry)."""
         log_id = str(uuid.uuid4())
         timestamp = datetime.utcnow()
 
@@ -66,10 +68,7 @@ class HIPAAAuditLogger:
             "metadata": metadata or {},
         }
 
-        # Store in Firestore (append-only collection)
-        self.db.collection(self.collection).document(log_id).set(audit_entry)
-
-        return log_id
+        return log_id, audit_entry
 
     def log_authentication(
         self,
@@ -169,6 +168,48 @@ class HIPAAAuditLogger:
             metadata={"failure_reason": reason},
         )
 
+
+class HIPAAAuditLogger(_AuditRecordBuilder):
+    """Audit logger for HIPAA compliance."""
+
+    def __init__(self, db: firestore.Client):
+        """Initialize audit logger."""
+        self.db = db
+
+    def log_phi_access(
+        self,
+        user_id: str,
+        action: str,
+        resource_type: str,
+        resource_id: str,
+        success: bool = True,
+        request: Optional[Request] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Log PHI access event.
+
+        Args:
+            user_id: User performing action
+            action: Action performed (view, create, update, delete, query, export)
+            resource_type: Type of resource (document, chunk, chat, user_profile)
+            resource_id: ID of resource accessed
+            success: Whether action succeeded
+            request: FastAPI request object (for IP, user agent)
+            metadata: Additional context
+
+        Returns:
+            Audit log ID
+        """
+        log_id, audit_entry = self._build_entry(
+            user_id, action, resource_type, resource_id, success, request, metadata
+        )
+
+        # Store in Firestore (append-only collection)
+        self.db.collection(self.collection).document(log_id).set(audit_entry)
+
+        return log_id
+
     def get_user_access_history(
         self,
         user_id: str,
@@ -264,3 +305,37 @@ class HIPAAAuditLogger:
                 logs.append(log_data)
 
         return logs
+
+
+class AsyncHIPAAAuditLogger(_AuditRecordBuilder):
+    """
+    Audit logger backed by firestore.AsyncClient.
+
+    log_phi_access is a coroutine, so the convenience helpers (log_query,
+    log_document_view, ...) return awaitables. It only writes records; the
+    audit review queries live on HIPAAAuditLogger.
+    """
+
+    def __init__(self, db: firestore.AsyncClient):
+        """Initialize async audit logger."""
+        self.db = db
+
+    async def log_phi_access(
+        self,
+        user_id: str,
+        action: str,
+        resource_type: str,
+        resource_id: str,
+        success: bool = True,
+        request: Optional[Request] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Log PHI access event (see HIPAAAuditLogger.log_phi_access)."""
+        log_id, audit_entry = self._build_entry(
+            user_id, action, resource_type, resource_id, success, request, metadata
+        )
+
+        # Store in Firestore (append-only collection)
+        await self.db.collection(self.collection).document(log_id).set(audit_entry)
+
+        return log_id
@@ -0,0 +1,55 @@
+"""Keyword search helpers: tokenizer and postings decoding."""
+from typing import Any, Dict, List
+import json
+import re
+import zlib
+
+# Tokenizer shared with the ingestion function (modules/lexical_index.py).
+# Keep the two in sync: a query only matches terms produced the same way at
+# ingestion.
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were with what which who how when my i me you your do does did".split()
+)
+
+POSTINGS_FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Compound tokens such as drug codes, lab names or ICD strings ("e11.9",
+    "covid-19", "hba1c") are kept whole and also contribute their parts, so
+    both "covid-19" and "covid" match.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(
+                part
+                for part in re.split(r"[.\-/]", token)
+                if part not in STOPWORDS and (len(part) > 1 or part.isdigit())
+            )
+    return [t for t in terms if len(t) > 1 or t.isdigit()]
+
+
+def decode_postings(blob: bytes) -> Dict[str, Any]:
+    """
+    Decode a postings segment written by the ingestion function.
+
+    Returns:
+        Dict with chunk_ids, lengths and postings
+        ({term: [chunk_index, tf, chunk_index, tf, ...]})
+
+    Raises:
+        ValueError: If the segment uses an unknown format version
+    """
+    payload = json.loads(zlib.decompress(blob))
+    if payload.get("v") != POSTINGS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported postings format version: {payload.get('v')}")
+    return payload
@@ -0,0 +1,30 @@
+"""Rank fusion for combining retrieval result lists."""
+from typing import Dict, List, Tuple
+
+# Standard RRF constant: dampens the influence of top ranks so that an item
+# ranked well by several retrievers beats one ranked first by a single one
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists with reciprocal rank fusion.
+
+    Each ID scores sum(1 / (k + rank)) over the lists it appears in (rank is
+    1-based). Only ranks are used, so lists with incomparable scores (vector
+    distances, BM25) can be combined directly.
+
+    Args:
+        rankings: ID lists, each ordered best first
+        k: RRF constant
+
+    Returns:
+        List of (id, fused score) tuples, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
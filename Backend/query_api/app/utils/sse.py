@@ -0,0 +1,17 @@
+"""Server-sent events formatting utilities."""
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a single server-sent event.
+
+    Args:
+        event: Event name (e.g. "sources", "token", "done")
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,48 @@
+"""Per-stage latency measurement utilities."""
+from typing import Awaitable, Dict, Iterator, TypeVar
+from contextlib import contextmanager
+import time
+
+T = TypeVar("T")
+
+
+class StageTimer:
+    """
+    Records wall-clock durations (ms) of named pipeline stages.
+
+    Stages may overlap (e.g. lookups awaited concurrently), so the sum of the
+    stage timings can exceed the total elapsed time; the difference is the
+    saving from running them concurrently.
+    """
+
+    def __init__(self):
+        """Start the timer."""
+        self._start = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a synchronous block or a sequence of awaits."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await a single awaitable and record its duration (safe under gather)."""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the timer was created."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def summary(self) -> str:
+        """Format timings as 'stage=12.3ms ... total=45.6ms' for logging."""
+        parts = [f"{name}={ms:.1f}ms" for name, ms in self.timings.items()]
+        parts.append(f"total={self.elapsed_ms():.1f}ms")
+        return " ".join(parts)
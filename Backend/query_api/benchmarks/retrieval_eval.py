@@ -0,0 +1,150 @@
+"""
+Retrieval quality benchmark: dense-only vs. hybrid (BM25 + vector, RRF).
+
+Reads a labelled question set and reports recall@k and retrieval latency
+for both modes. Rankings come from QueryService itself (candidate sizing,
+ownership filtering before fusion, hydration), using the same repositories
+the API uses (so VECTOR_BACKEND, VECTOR_TENANT_FILTER etc. apply).
+
+Eval set format (JSON lines):
+    {"user_id": "...", "question": "What is my HbA1c?", "relevant_chunk_ids": ["...", "..."]}
+
+Usage (from Backend/query_api, with the same env vars as the API):
+    python benchmarks/retrieval_eval.py --eval-set eval.jsonl [--k 5 --k 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+from google.cloud import aiplatform  # noqa: E402
+import vertexai  # noqa: E402
+
+from app.config import Config  # noqa: E402
+from app.dependencies import ClientRegistry  # noqa: E402
+from app.services.query_service import QueryService  # noqa: E402
+from app.utils.embeddings import get_embedding  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare dense-only and hybrid retrieval.")
+    parser.add_argument("--eval-set", required=True, help="JSONL file of labelled questions")
+    parser.add_argument(
+        "--k", type=int, action="append", help="Cutoff for recall@k (repeatable; default 5, 10)"
+    )
+    return parser.parse_args()
+
+
+async def rank(
+    service: QueryService,
+    question: str,
+    embedding: List[float],
+    user_id: str,
+    top_k: int,
+    latencies: Dict[str, List[float]],
+) -> Tuple[List[str], List[str]]:
+    """Return the dense-only and hybrid chunk rankings the API would hydrate."""
+    version = await service.firestore_repo.get_document_set_version(user_id)
+    incomplete_docs = await service.firestore_repo.get_incomplete_documents(user_id)
+    excluded = {doc["document_id"] for doc in incomplete_docs}
+
+    start = time.perf_counter()
+    neighbors = await service._search_vectors(embedding, user_id, top_k, version, excluded)
+    latencies["dense"].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    keyword_hits = await service._search_keywords(question, user_id, top_k, version, excluded)
+    latencies["keyword"].append((time.perf_counter() - start) * 1000)
+
+    rankings = []
+    for hits in ([], keyword_hits):
+        candidates, prefetched = await service._rank_candidates(
+            neighbors, hits, user_id, top_k, excluded
+        )
+        _, sources = await service._retrieve_user_chunks(
+            candidates, dict(neighbors), user_id, top_k, excluded, prefetched
+        )
+        rankings.append([source["id"] for source in sources])
+    return rankings[0], rankings[1]
+
+
+def recall_at(ranking: List[str], relevant: Set[str], k: int) -> float:
+    return len(set(ranking[:k]) & relevant) / len(relevant)
+
+
+async def evaluate(
+    clients: ClientRegistry,
+    examples: List[dict],
+    cutoffs: List[int],
+    recalls: Dict[str, Dict[int, List[float]]],
+    latencies: Dict[str, List[float]],
+) -> None:
+    """Rank every example both ways and record recall@k per cutoff."""
+    top_k = max(cutoffs)
+    try:
+        for example in examples:
+            user_id = example["user_id"]
+            relevant = set(example["relevant_chunk_ids"])
+            if not relevant:
+                continue
+
+            embedding = get_embedding(example["question"])
+            dense, hybrid = await rank(
+                clients.query_service, example["question"], embedding, user_id, top_k, latencies
+            )
+
+            for k in cutoffs:
+                recalls["dense"][k].append(recall_at(dense, relevant, k))
+                recalls["hybrid"][k].append(recall_at(hybrid, relevant, k))
+    finally:
+        await clients.close()
+
+
+def main() -> None:
+    args = parse_args()
+    cutoffs = args.k or [5, 10]
+    load_dotenv()
+
+    config = Config.from_env()
+    aiplatform.init(project=config.project_id, location=config.vertex_region)
+    vertexai.init(project=config.project_id, location=config.vertex_region)
+    clients = ClientRegistry(config)
+    # Hybrid ranking needs the keyword index even when the API has it disabled
+    clients.query_service.lexical_repo = clients.lexical_repo
+
+    with open(args.eval_set) as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    print(f"Evaluating {len(examples)} questions...")
+
+    recalls: Dict[str, Dict[int, List[float]]] = {
+        mode: {k: [] for k in cutoffs} for mode in ("dense", "hybrid")
+    }
+    latencies: Dict[str, List[float]] = {"dense": [], "keyword": []}
+
+    # One event loop for the whole run: the async Firestore client is bound to it
+    asyncio.run(evaluate(clients, examples, cutoffs, recalls, latencies))
+
+    for mode in ("dense", "hybrid"):
+        summary = " ".join(
+            f"recall@{k}={statistics.mean(values):.3f}"
+            for k, values in recalls[mode].items()
+            if values
+        )
+        print(f"{mode:<7} {summary}")
+
+    for stage, values in latencies.items():
+        if values:
+            p95 = sorted(values)[max(int(len(values) * 0.95) - 1, 0)]
+            print(f"{stage:<7} latency mean={statistics.mean(values):.1f}ms p95={p95:.1f}ms")
+    print("(keyword search runs concurrently with vector search in the API)")
+
+
+if __name__ == "__main__":
+    main()
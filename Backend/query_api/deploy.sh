@@ -8,6 +8,7 @@ echo "🚀 Starting ClearChartAI backend deployment to Cloud Run..."
 PROJECT_ID="sunlit-adviser-471323-p0"
 SERVICE_NAME="clearchartai-api"
 REGION="us-central1"
+ARTIFACT_BUCKET="ccai-medrag-artifacts"  # Document AI checkpoints, deleted with their document
 
 # Build and deploy to Cloud Run
 echo "📦 Building and deploying to Cloud Run..."
@@ -22,7 +23,7 @@ gcloud run deploy $SERVICE_NAME \
   --timeout 300 \
   --max-instances 10 \
   --min-instances 0 \
-  --set-env-vars PROJECT_ID=$PROJECT_ID,GOOGLE_CLOUD_PROJECT=$PROJECT_ID,ENVIRONMENT=production \
+  --set-env-vars PROJECT_ID=$PROJECT_ID,GOOGLE_CLOUD_PROJECT=$PROJECT_ID,ENVIRONMENT=production,ARTIFACT_BUCKET=$ARTIFACT_BUCKET \
   --project $PROJECT_ID
 
 # Check if deployment succeeded
@@ -4,6 +4,8 @@ ClearChartAI Query API - Clean Entry Point
 This is the main application entry point. All business logic has been
 extracted to modular services, repositories, and routes.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -18,6 +20,7 @@ load_dotenv()
 
 # Import configuration
 from app.config import Config
+from app.dependencies import ClientRegistry
 from app.routes import query_router, documents_router, health_router, profile_router, summaries_router, notes_router, chats_router
 
 # Initialize configuration
@@ -27,11 +30,33 @@ config = Config.from_env()
 aiplatform.init(project=config.project_id, location=config.vertex_region)
 vertexai.init(project=config.project_id, location=config.vertex_region)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create API clients once per process and close them on shutdown."""
+    clients = ClientRegistry(config)
+    app.state.clients = clients
+
+    # Optionally share query embeddings across instances
+    if Config.get_optional_env("EMBEDDING_CACHE_BACKEND") == "firestore":
+        from app.utils.embeddings import FirestoreEmbeddingBackend, configure_embedding_cache
+
+        configure_embedding_cache(backend=FirestoreEmbeddingBackend(clients.firestore))
+
+    print("✓ API clients initialized")
+    try:
+        yield
+    finally:
+        await clients.close()
+        print("✓ API clients closed")
+
+
 # Create FastAPI app
 app = FastAPI(
     title="ClearChartAI Medical RAG API",
     description="AI-powered medical document analysis and Q&A system",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # Rate limiting
@@ -69,6 +94,7 @@ def root():
         "endpoints": {
             "health": "/health",
             "query": "/query",
+            "query_stream": "/query/stream",
             "documents": "/documents/*",
             "profile": "/profile",
         },
@@ -1,7 +1,8 @@
 """One-time script to provision core GCP resources for the MedRAG backend.
 
 Steps performed:
-1. Creates (or verifies) the required GCS buckets for uploads and artifacts.
+1. Creates (or verifies) the required GCS buckets for uploads and artifacts,
+   with a lifecycle rule expiring Document AI outputs in the artifact bucket.
 2. Creates a Vertex AI Vector Search index and deploys it to an index endpoint.
 3. Waits for the endpoint deployment to complete instead of sleeping blindly.
 4. Produces a config JSON file with the resource identifiers needed by the
@@ -40,6 +41,11 @@ DEFAULT_INDEX_DISPLAY_NAME = "medical-rag-index"
 DEFAULT_ENDPOINT_DISPLAY_NAME = "medical-rag-endpoint"
 TEXT_EMBEDDING_DIMENSIONS = 768
 
+# Document AI checkpoints and batch staging (OCR output, i.e. PHI) in the
+# artifact bucket are deleted this many days after they were written
+DOCAI_ARTIFACT_PREFIX = "docai/"
+DOCAI_ARTIFACT_TTL_DAYS = 30
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Provision core backend resources.")
@@ -58,7 +64,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--artifact-bucket",
         required=True,
-        help="Name of the GCS bucket used for vector store artifacts",
+        help="Name of the GCS bucket used for vector store and Document AI artifacts",
     )
     parser.add_argument(
         "--config-output",
@@ -90,6 +96,28 @@ def ensure_bucket(storage_client: storage.Client, project_id: str, bucket_name:
         raise RuntimeError(f"Failed to ensure bucket {bucket_name}: {exc}") from exc
 
 
+def ensure_docai_artifact_lifecycle(storage_client: storage.Client, bucket_name: str) -> None:
+    try:
+        bucket = storage_client.get_bucket(bucket_name)
+        for rule in bucket.lifecycle_rules:
+            if (
+                rule.get("action", {}).get("type") == "Delete"
+                and rule.get("condition", {}).get("matchesPrefix") == [DOCAI_ARTIFACT_PREFIX]
+            ):
+                print(f"Lifecycle rule for {DOCAI_ARTIFACT_PREFIX} already exists: {bucket_name}")
+                return
+        bucket.add_lifecycle_delete_rule(
+            age=DOCAI_ARTIFACT_TTL_DAYS, matches_prefix=[DOCAI_ARTIFACT_PREFIX]
+        )
+        bucket.patch()
+        print(
+            f"Added lifecycle rule: delete {DOCAI_ARTIFACT_PREFIX} objects in {bucket_name} "
+            f"after {DOCAI_ARTIFACT_TTL_DAYS} days"
+        )
+    except Exception as exc:  # pylint: disable=broad-except
+        raise RuntimeError(f"Failed to set lifecycle rule on {bucket_name}: {exc}") from exc
+
+
 def create_index(display_name: str, project_id: str, region: str) -> MatchingEngineIndex:
     print(f"Creating Vertex AI Matching Engine index '{display_name}' (if it does not exist)...")
     
@@ -219,6 +247,7 @@ def main() -> None:
     storage_client = storage.Client(project=args.project_id)
     ensure_bucket(storage_client, args.project_id, args.upload_bucket)
     ensure_bucket(storage_client, args.project_id, args.artifact_bucket)
+    ensure_docai_artifact_lifecycle(storage_client, args.artifact_bucket)
 
     index = create_index(args.index_display_name, args.project_id, args.region)
     endpoint, deployed_index_id = create_and_deploy_endpoint(
@@ -17,6 +17,9 @@ const getUiStatus = (processingStatus) => {
   if (['pending', 'processing', 'in_progress', 'queued'].includes(normalized)) {
     return 'pending';
   }
+  if (normalized === 'failed') {
+    return 'failed';
+  }
   return 'pending';
 };
 
@@ -176,13 +179,40 @@ export default function DashboardPage() {
     loadDocuments(true);
   }, [currentUser]); // Removed loadDocuments from deps to prevent re-renders
 
-  // Auto-refresh documents while processing
+  // Poll the lightweight status endpoint while processing; reload the full
+  // list once everything has settled
   useEffect(() => {
     if (!hasProcessingDocs) return;
 
-    const interval = setInterval(() => {
-      console.log('🔄 Auto-refreshing documents (processing detected)');
-      loadDocuments(true); // Force reload when processing
+    const interval = setInterval(async () => {
+      try {
+        const response = await api.get('/documents/status');
+        const statuses = response?.data?.documents || [];
+        const statusById = Object.fromEntries(statuses.map((doc) => [doc.document_id, doc]));
+
+        setDocuments((prev) =>
+          prev.map((doc) => {
+            const update = statusById[doc.id];
+            if (!update) return doc;
+            return {
+              ...doc,
+              status: getUiStatus(update.processing_status),
+              raw_status: update.processing_status,
+              progress: update.progress,
+            };
+          })
+        );
+
+        const processing = statuses.some(
+          (doc) => getUiStatus(doc.processing_status) === 'pending'
+        );
+        if (!processing) {
+          console.log('✓ Processing finished, reloading documents');
+          loadDocuments(true);
+        }
+      } catch (error) {
+        console.error('Failed to poll document status:', error);
+      }
     }, 5000); // Check every 5 seconds
 
     return () => clearInterval(interval);
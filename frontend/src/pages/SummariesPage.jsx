@@ -251,7 +251,8 @@ export default function SummariesPage() {
                   <div className="rounded-lg border border-dashed border-slate-300 bg-slate-50 p-8 text-center">
                     <AlertCircle className="mx-auto h-8 w-8 text-slate-400" />
                     <p className="mt-3 text-sm font-medium text-slate-600">
-                      {selectedDoc.processing_status === 'pending'
+                      {selectedDoc.processing_status === 'pending' ||
+                      ['pending', 'running'].includes(selectedDoc.summary_status)
                         ? 'Summary is being generated...'
                         : 'No summary available for this document'}
                     </p>